@@ -3,6 +3,10 @@ from pathlib import Path
 import yaml
 import json
 import os
+
+from agents_store.db_agent.utils.db_prompt_bundles import db_prompt_bundle_store
+from agents_store.db_agent.utils.table_ranker import TABLE_PRUNING_ENGINE, table_ranker
+
 agents_list_path= os.path.join(os.getcwd(),r'agent_config_utils\agents_list.yaml')
 
 import yaml
@@ -65,6 +69,13 @@ def generate_yaml_db_query_agent(data,user):
             yaml.dump(examples_data, file, default_flow_style=False)
         print(f"Generated: {table_directory}/example_prompt.yaml")
 
+        # Flatten the table prompts now so query generation only concatenates them
+        db_prompt_bundle_store.precompile_table(user, table_name)
+
+    # Re-index the user's tables for the local pruning engine
+    if TABLE_PRUNING_ENGINE in ("bm25", "hybrid"):
+        table_ranker.build(user)
+
 
 def update_yaml_with_config(yaml_data, config_data, agent_name, file_type, append=False):
     """Update the YAML data with the configuration data for the specified agent."""
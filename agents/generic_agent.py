@@ -12,6 +12,7 @@ prompt-based configuration and dynamic model generation.
 # -----------------------------------------------------------------------------
 
 from typing import List, Optional, Any, Dict, Tuple
+import asyncio
 import json
 import logging
 from pathlib import Path
@@ -27,6 +28,9 @@ from langchain_core.pydantic_v1 import BaseModel, Field, create_model
 # Local application imports that are required
 from utils.helper_functions import load_prompt, load_prompt_yaml, find_directory, get_output_params
 from models.openai.azure_openai_model import llm_config_loader
+from utils.chain_cache import compiled_chain_cache
+from utils.prompt_store import prompt_store
+from utils.workflow_events import emit_event, is_streaming
 
 # Import the dynamic import utilities
 from utils.dynamic_imports import (
@@ -108,10 +112,394 @@ def get_subparams(sub_params):
         logger.error(f"Error extracting sub-parameters: {str(e)}")
         raise
 
+def resolve_prompt_path(user: str, agent_name: str, user_directory: Path, directory: str, prompt_kind: str) -> str:
+    """
+    Resolves the prompt file to use, preferring the user's override over the default template.
+    The resolution is cached by the prompt store per (user, agent, prompt kind).
+    
+    Args:
+        user (str): The user whose override is looked up.
+        agent_name (str): The agent the prompt belongs to.
+        user_directory (Path): The user's prompt directory under user_config_files.
+        directory (str): The default prompt directory of the agent.
+        prompt_kind (str): The prompt kind, e.g. "system" for "system_prompt.yaml".
+        
+    Returns:
+        str: Path of the user's prompt file if it exists, otherwise of the default one.
+    """
+    file_name = f"{prompt_kind}_prompt.yaml"
+    return prompt_store.resolve(
+        user, agent_name, prompt_kind,
+        os.path.join(user_directory, file_name),
+        os.path.join(directory, file_name)
+    )
+
+def build_query_chain(
+    function_name: str,
+    user: str,
+    prompt_paths: Dict[str, str],
+    db_prompt_texts: Optional[Tuple[str, str, str]] = None
+):
+    """
+    Compiles the prompt pipeline, output model, parser and LLM client into a query chain.
+    
+    Args:
+        function_name (str): Name of the agent function the chain is built for.
+        user (str): User whose configuration is used for the output params.
+        prompt_paths (Dict[str, str]): Resolved prompt files keyed by prompt kind
+            ("start", "system", "example", "schema").
+        db_prompt_texts (Optional[Tuple[str, str, str]]): Already loaded system, example and
+            schema texts for DB agents. When given, only the start prompt is read from disk.
+    
+    Returns:
+        Runnable: The query chain combining the prompt, model and parser.
+    """
+    # Variable Initialisation
+    param_names = []
+    data_types = []
+    subparams_values = None
+    subparams_datatypes = None
+
+    output_params = get_output_params(function_name,user)
+    logger.info(f"Retrieved {len(output_params)} output parameters for {function_name}")
+
+    start_text = load_prompt_yaml(prompt_paths["start"])
+    logger.info("Successfully loaded start prompt")
+
+    if db_prompt_texts is not None:
+        system_text, example_text, schema_text = db_prompt_texts
+    else:
+        logger.info("Loading standard prompts")
+        try:
+            system_text = load_prompt_yaml(prompt_paths["system"])
+            example_text = load_prompt_yaml(prompt_paths["example"])
+            schema_text = load_prompt_yaml(prompt_paths["schema"])
+            logger.info("Successfully loaded all standard prompts")
+        except Exception as e:
+            logger.error(f"Error loading standard prompts: {str(e)}")
+            raise
+
+    # -----------------------------------------------------------------------------
+    # SECTION: Define and Create Prompt Template
+    # -----------------------------------------------------------------------------
+    # Create chat prompt templates from the loaded prompts
+    logger.info("Creating prompt templates")
+    system_prompt = ChatPromptTemplate.from_template(system_text)
+    schema_prompt = ChatPromptTemplate.from_template(schema_text)
+    example_prompt = ChatPromptTemplate.from_template(example_text)
+    start_prompt = ChatPromptTemplate.from_template(start_text)
+
+    standard_template = """
+    ## System: {system}
+    ## Schema: {schema}
+    ## Example: {example}
+    ## Start: {start}
+    """
+    standard_template = PromptTemplate.from_template(standard_template)
+
+    # Create the template as a list of tuples
+    template = [
+        ("system", system_prompt),
+        ("schema", schema_prompt),
+        ("example", example_prompt),
+        ("start", start_prompt)
+    ]
+    logger.info("Prompt templates created successfully")
+
+    # -----------------------------------------------------------------------------
+    # SECTION: Create Pydantic Models
+    # -----------------------------------------------------------------------------
+    logger.info("Preparing to create Pydantic models")
+    for params in output_params:
+        for key in params.keys():
+            param_names.append(params[key]['value'])
+            if params[key]['data_type'].lower() == 'list':
+                subparams_values, subparams_datatypes = get_subparams(params[key]['sub_params'])
+                logger.info(f"Extracted {len(subparams_values)} sub-parameters")
+                continue
+            data_types.append(params[key]['data_type'])
+
+    logger.info(f"Creating output models with {len(param_names)} parameters")
+    if not subparams_values and not subparams_datatypes:
+        logger.info("Creating simple GenericAgentModel without sub-parameters")
+        GenericAgentModel = create_generic_output_model(
+            "GenericAgentModel",
+            param_names,
+            data_types
+        )
+    
+    elif isinstance(subparams_values, List):
+        logger.info("Creating nested models with sub-parameters")
+        GenericSubAgentModel = create_generic_output_model(
+            "GenericSubAgentModel",
+            subparams_values,
+            subparams_datatypes,
+        )
+        data_types.append(List[GenericSubAgentModel])
+        GenericAgentModel = create_generic_output_model(
+            "GenericAgentModel",
+            param_names,
+            data_types
+        )
+
+    # Create a pipeline prompt template for the agent
+    logger.info("Creating pipeline prompt template")
+    query_prompt = PipelinePromptTemplate(
+        final_prompt=standard_template,
+        pipeline_prompts=template
+    )
+
+    parser = JsonOutputParser(pydantic_object=GenericAgentModel)
+    logger.info("Created JSON output parser with Pydantic model")
+
+    # Create the query chain by combining the prompt, model, and parser
+    logger.info("Building query chain")
+    query_chain = query_prompt | llm_config_loader() | parser
+
+    return query_chain
+
+def estimate_token_count(text: str) -> int:
+    """
+    Estimates the number of tokens of a text with the cl100k_base encoding.
+    """
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception as e:
+        logger.warning(f"Failed to estimate token count: {str(e)}")
+        return 0
+
+def emit_partial_tokens(partial_response: Any, streamed_fields: Dict[str, str], agent_name: str) -> None:
+    """
+    Emits the text added to each string field of a partially parsed response as "agent_token" events.
+    
+    Args:
+        partial_response (Any): The partially parsed response yielded by the JSON output parser.
+        streamed_fields (Dict[str, str]): The text already emitted per field; updated in place.
+        agent_name (str): Name of the agent reported in the events.
+    """
+    if not isinstance(partial_response, dict):
+        return
+    for field, value in partial_response.items():
+        if not isinstance(value, str):
+            continue
+        previous_value = streamed_fields.get(field, "")
+        if value.startswith(previous_value) and len(value) > len(previous_value):
+            emit_event("agent_token", {"agent": agent_name, "field": field, "token": value[len(previous_value):]})
+        streamed_fields[field] = value
+
+def estimate_chain_tokens(query_chain, func_params: dict, ai_response: Any) -> Tuple[int, int]:
+    """
+    Estimates the input and output tokens of a streamed chain call, for which the LLM does not
+    always report token usage.
+    """
+    try:
+        prompt_text = query_chain.first.format(**func_params)
+    except Exception as e:
+        logger.warning(f"Failed to format the prompt for token estimation: {str(e)}")
+        prompt_text = ""
+    return estimate_token_count(prompt_text), estimate_token_count(json.dumps(ai_response, default=str))
+
+def stream_query_chain(query_chain, func_params: dict, agent_name: str) -> Tuple[Any, int, int]:
+    """
+    Executes a query chain in streaming mode and emits the generated text as workflow events.
+    
+    The JSON output parser yields the partially parsed response after every LLM chunk; the text
+    added to each string field since the previous chunk is emitted as an "agent_token" event.
+    
+    Args:
+        query_chain (Runnable): The compiled query chain.
+        func_params (dict): Parameters to pass to the prompt templates.
+        agent_name (str): Name of the agent reported in the events.
+    
+    Returns:
+        tuple: The fully parsed response and the estimated input and output token counts.
+    """
+    ai_response = {}
+    streamed_fields = {}
+    for partial_response in query_chain.stream(func_params):
+        ai_response = partial_response
+        emit_partial_tokens(partial_response, streamed_fields, agent_name)
+    return (ai_response, *estimate_chain_tokens(query_chain, func_params, ai_response))
+
+async def astream_query_chain(query_chain, func_params: dict, agent_name: str) -> Tuple[Any, int, int]:
+    """
+    Async variant of `stream_query_chain` using `astream`.
+    """
+    ai_response = {}
+    streamed_fields = {}
+    async for partial_response in query_chain.astream(func_params):
+        ai_response = partial_response
+        emit_partial_tokens(partial_response, streamed_fields, agent_name)
+    return (ai_response, *estimate_chain_tokens(query_chain, func_params, ai_response))
+
+def prepare_agent_chain(function_name: str, func_params: dict, user: str) -> Tuple[Any, str, str, Optional[str], int, int]:
+    """
+    Resolves the prompts of an agent and returns its compiled query chain.
+    
+    For DB agents the DB-specific prompts are generated first (table pruning), which spends
+    tokens and replaces the function name with the DB configuration name.
+    
+    Args:
+        function_name (str): Name of the function configuration to use.
+        func_params (dict): Parameters to pass to the prompt templates and agent pipeline.
+        user (str): User whose configuration and prompt overrides are used.
+    
+    Returns:
+        tuple: The query chain, the agent name, the (possibly DB-specific) function name,
+            the DB configuration or None, and the input and output tokens spent so far.
+    """
+    combined_input_tokens_count = 0
+    combined_output_tokens_count = 0
+
+    # user ='user1'
+    user_config_directory = os.path.join(os.getcwd(), "user_config_files",user,function_name+"_prompts")
+    user_directory = Path(user_config_directory)
+    directory_name = function_name + "_prompts"
+    agent_name = function_name
+   
+    directory = find_directory(Path.cwd(), directory_name)
+    directory = r"{}".format(directory)
+    logger.info(f"Found prompt directory at: {directory}")
+
+    start_path = resolve_prompt_path(user, agent_name, user_directory, directory, "start")
+
+    # -----------------------------------------------------------------------------
+    # SECTION: Dynamic DB Configuration Check
+    # -----------------------------------------------------------------------------
+    # Try to get DB config safely (returns None if not available)
+    dboconfig = get_dboconfig_safe(function_name,user)
+    logger.info(f"DB configuration for {function_name}: {dboconfig if dboconfig else 'None'}")
+    db_prompt_texts = None
+    
+    # If we have a DB config, try to load DB-specific prompts
+    if dboconfig is not None:
+        # Get all DB dependencies
+        logger.info("Loading database dependencies")
+        db_deps = lazy_import_db_dependencies()
+        
+        # Check if we have all required dependencies for DB operations
+        required_deps = ["db_query_prompt_loader", "db_query_exec", "Queries"]
+        missing_deps = [dep for dep in required_deps if dep not in db_deps]
+        
+        if not missing_deps:
+            function_name = dboconfig
+            logger.info(f"Using DB-specific function name: {function_name}")
+            try:
+                # Use the DB prompt loader
+                logger.info("Loading DB-specific prompts")
+                system_text, example_text, schema_text, input_tokens_count, output_tokens_count = load_db_prompts(
+                    func_params, db_deps,user
+                )
+                db_prompt_texts = (system_text, example_text, schema_text)
+                combined_input_tokens_count += input_tokens_count
+                combined_output_tokens_count += output_tokens_count
+                logger.info(f"DB prompt loading complete. Input tokens: {input_tokens_count}, Output tokens: {output_tokens_count}")
+            except ImportError as e:
+                logger.warning(f"Failed to load DB prompts: {e}")
+                logger.info("Falling back to standard prompt loading")
+                # Fall back to standard prompt loading
+                dboconfig = None
+        else:
+            logger.warning(f"Missing required DB dependencies: {missing_deps}")
+            dboconfig = None
+
+    # -----------------------------------------------------------------------------
+    # SECTION: Compiled Chain Cache Lookup
+    # -----------------------------------------------------------------------------
+    # The chain depends on the resolved prompt files, the user's supervisor functions
+    # (output params) and the model configuration. DB prompts are generated per request
+    # from the pruned tables, so their text is part of the key instead of their files.
+    prompt_paths = {"start": start_path}
+    if db_prompt_texts is None:
+        for prompt_kind in ("system", "example", "schema"):
+            prompt_paths[prompt_kind] = resolve_prompt_path(user, agent_name, user_directory, directory, prompt_kind)
+    dependency_paths = list(prompt_paths.values()) + [
+        os.path.join(os.getcwd(), 'user_config_files', user, 'supervisor_functions.yaml'),
+        os.path.join(os.getcwd(), r'models\openai\openai_config.yaml')
+    ]
+    cache_key = compiled_chain_cache.make_key(
+        user, agent_name, dependency_paths, hash(db_prompt_texts) if db_prompt_texts else None
+    )
+    query_chain = compiled_chain_cache.get(cache_key)
+
+    if query_chain is not None:
+        logger.info(f"Using cached compiled chain for {agent_name}")
+    else:
+        logger.info(f"No cached chain for {agent_name}, compiling a new one")
+        query_chain = build_query_chain(agent_name, user, prompt_paths, db_prompt_texts)
+        compiled_chain_cache.put(cache_key, query_chain)
+
+    return query_chain, agent_name, function_name, dboconfig, combined_input_tokens_count, combined_output_tokens_count
+
+def process_agent_response(ai_response: Any, function_name: str, dboconfig: Optional[str]) -> Any:
+    """
+    Post-processes the parsed LLM response of an agent.
+    
+    For DB agents the generated query is stored in the query repository and executed; for
+    other agents the 'ai_response' field is extracted. String responses are parsed as JSON.
+    
+    Args:
+        ai_response (Any): The parsed response of the query chain.
+        function_name (str): The (possibly DB-specific) function name.
+        dboconfig (Optional[str]): The DB configuration of the agent, or None.
+    
+    Returns:
+        Any: The processed response.
+    """
+    # Handle DB-specific processing if DB config is available
+    if dboconfig is not None:
+        logger.info("Processing DB-specific response")
+        db_deps = lazy_import_db_dependencies()
+        
+        if "db_query_exec" in db_deps and "Queries" in db_deps:
+            # Extract query from response
+            query = ai_response.get('ai_response', ai_response)
+            logger.info(f"Extracted query from response")
+            
+            # Add query to repository
+            try:
+                add_query_to_repository(query, db_deps)
+                logger.info("Successfully added query to repository")
+            except Exception as e:
+                logger.warning(f"Failed to add query to repository: {str(e)}")
+            
+            # Execute the query
+            try:
+                logger.info(f"Executing DB query for function: {function_name}")
+                ai_response = execute_db_query(query, function_name, db_deps)
+                logger.info("Query execution successful")
+            except ImportError as e:
+                logger.warning(f"Failed to execute DB query: {e}")
+            except Exception as e:
+                logger.error(f"Error during DB query execution: {str(e)}")
+            
+            # Parse JSON response if needed
+            if isinstance(ai_response, str):
+                try:
+                    ai_response = json.loads(ai_response)
+                    logger.info("Successfully parsed JSON response")
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Failed to parse response as JSON: {str(e)}")
+    else:
+        # Extract AI response for non-DB cases
+        logger.info("Processing standard (non-DB) response")
+        if 'ai_response' in ai_response:
+            ai_response = ai_response['ai_response']
+            logger.info("Extracted 'ai_response' field from response")
+        if isinstance(ai_response, str):
+            try:
+                ai_response = json.loads(ai_response)
+                logger.info("Successfully parsed string response as JSON")
+            except json.JSONDecodeError as e:
+                logger.info(f"Response is not JSON format: {str(e)}")
+    return ai_response
+
 def generic_agent(
     function_name: str,
     func_params: dict,
-    user: str
+    user: str,
+    stream_tokens: bool = False
 ) -> tuple[Any, int, int]:
     """
     Creates and executes a generic AI agent pipeline based on specified function configuration.
@@ -126,6 +514,9 @@ def generic_agent(
         function_name (str): Name of the function configuration to use. This determines
             which prompt directory and utility functions to load.
         func_params (dict): Parameters to pass to the prompt templates and agent pipeline.
+        user (str): User whose configuration and prompt overrides are used.
+        stream_tokens (bool): Stream the LLM output as "agent_token" workflow events when a
+            workflow event sink is listening (e.g. for /ask-ellis/stream).
     
     Returns:
         tuple: A tuple containing:
@@ -134,247 +525,117 @@ def generic_agent(
             - output_tokens_count (int): Number of tokens in the model's response
     """
     logger.info(f"Starting generic agent execution for function: {function_name}")
-    
-    # Variable Initialisation
-    param_names = []
-    data_types = []
-    subparams_values = None
-    subparams_datatypes = None
-    # Combined Token Counts of table pruning agent and generic agent
-    combined_input_tokens_count = 0
-    combined_output_tokens_count = 0
 
     try:
-        # user ='user1'
-        user_config_directory = os.path.join(os.getcwd(), "user_config_files",user,function_name+"_prompts")
-        user_directory = Path(user_config_directory)
-        directory_name = function_name + "_prompts"
-        output_params = get_output_params(function_name,user)
-        logger.info(f"Retrieved {len(output_params)} output parameters for {function_name}")
-       
-        directory = find_directory(Path.cwd(), directory_name)
-        directory = r"{}".format(directory)
-        logger.info(f"Found prompt directory at: {directory}")
-
-        if user_directory.exists() and (user_directory / "start_prompt.yaml").exists():
-            start_text = load_prompt_yaml(user_directory / "start_prompt.yaml")
-        else:
-            start_text = load_prompt_yaml(directory + r"\start_prompt.yaml")
-        logger.info("Successfully loaded start prompt")
+        # Combined Token Counts of table pruning agent and generic agent
+        (query_chain, agent_name, function_name, dboconfig,
+         combined_input_tokens_count, combined_output_tokens_count) = prepare_agent_chain(function_name, func_params, user)
 
         # -----------------------------------------------------------------------------
-        # SECTION: Dynamic DB Configuration Check
+        # SECTION: Execute the Chain
         # -----------------------------------------------------------------------------
-        # Try to get DB config safely (returns None if not available)
-        dboconfig = get_dboconfig_safe(function_name,user)
-        logger.info(f"DB configuration for {function_name}: {dboconfig if dboconfig else 'None'}")
-        
-        # If we have a DB config, try to load DB-specific prompts
-        if dboconfig is not None:
-            # Get all DB dependencies
-            logger.info("Loading database dependencies")
-            db_deps = lazy_import_db_dependencies()
-            
-            # Check if we have all required dependencies for DB operations
-            required_deps = ["db_query_prompt_loader", "db_query_exec", "Queries"]
-            missing_deps = [dep for dep in required_deps if dep not in db_deps]
-            
-            if not missing_deps:
-                function_name = dboconfig
-                logger.info(f"Using DB-specific function name: {function_name}")
-                try:
-                    # Use the DB prompt loader
-                    logger.info("Loading DB-specific prompts")
-                    system_text, example_text, schema_text, input_tokens_count, output_tokens_count = load_db_prompts(
-                        func_params, db_deps,user
-                    )
-                    combined_input_tokens_count += input_tokens_count
-                    combined_output_tokens_count += output_tokens_count
-                    logger.info(f"DB prompt loading complete. Input tokens: {input_tokens_count}, Output tokens: {output_tokens_count}")
-                except ImportError as e:
-                    logger.warning(f"Failed to load DB prompts: {e}")
-                    logger.info("Falling back to standard prompt loading")
-                    # Fall back to standard prompt loading
-                    dboconfig = None
-            else:
-                logger.warning(f"Missing required DB dependencies: {missing_deps}")
-                dboconfig = None
-        
-        # If DB config was not available or failed, load standard prompts
-        if dboconfig is None:
-            logger.info("Loading standard prompts")
+        # Calling the LLM by passing the input parameters
+        logger.info("Executing the query chain with provided parameters")
+        with get_openai_callback() as cb:
             try:
-                if user_directory.exists() and os.path.exists(os.path.join(user_directory, "system_prompt.yaml")):
-                    system_text = load_prompt_yaml(os.path.join(user_directory, "system_prompt.yaml"))
-                else:
-                    system_text = load_prompt_yaml(os.path.join(directory, "system_prompt.yaml"))
-
-                if user_directory.exists() and os.path.exists(os.path.join(user_directory, "example_prompt.yaml")):
-                    example_text = load_prompt_yaml(os.path.join(user_directory, "example_prompt.yaml"))
-                else:
-                    example_text = load_prompt_yaml(os.path.join(directory, "example_prompt.yaml"))
-
-                if user_directory.exists() and os.path.exists(os.path.join(user_directory, "schema_prompt.yaml")):  
-                    schema_text = load_prompt_yaml(os.path.join(user_directory, "schema_prompt.yaml"))
+                if stream_tokens and is_streaming():
+                    ai_response, estimated_input_tokens, estimated_output_tokens = stream_query_chain(
+                        query_chain, func_params, agent_name
+                    )
+                    # Streamed calls do not always report token usage to the callback
+                    input_tokens_count = cb.prompt_tokens or estimated_input_tokens
+                    output_tokens_count = cb.completion_tokens or estimated_output_tokens
                 else:
-                    schema_text = load_prompt_yaml(os.path.join(directory, "schema_prompt.yaml"))
-                logger.info("Successfully loaded all standard prompts")
+                    ai_response = query_chain.invoke(func_params)
+                    input_tokens_count = cb.prompt_tokens
+                    output_tokens_count = cb.completion_tokens
+                logger.info(f"Query chain execution complete. Input tokens: {input_tokens_count}, Output tokens: {output_tokens_count}")
+                
+                print("AI Response: ", ai_response)
+                
+                ai_response = process_agent_response(ai_response, function_name, dboconfig)
+                
+                combined_input_tokens_count += input_tokens_count
+                combined_output_tokens_count += output_tokens_count
+                logger.info(f"Final token counts - Input: {combined_input_tokens_count}, Output: {combined_output_tokens_count}")
+            
             except Exception as e:
-                logger.error(f"Error loading standard prompts: {str(e)}")
+                logger.error(f"Error during query chain execution: {str(e)}")
                 raise
-
-        # -----------------------------------------------------------------------------
-        # SECTION: Define and Create Prompt Template
-        # -----------------------------------------------------------------------------
-        # Create chat prompt templates from the loaded prompts
-        logger.info("Creating prompt templates")
-        system_prompt = ChatPromptTemplate.from_template(system_text)
-        schema_prompt = ChatPromptTemplate.from_template(schema_text)
-        example_prompt = ChatPromptTemplate.from_template(example_text)
-        start_prompt = ChatPromptTemplate.from_template(start_text)
-
-        standard_template = """
-        ## System: {system}
-        ## Schema: {schema}
-        ## Example: {example}
-        ## Start: {start}
-        """
-        standard_template = PromptTemplate.from_template(standard_template)
-
-        # Create the template as a list of tuples
-        template = [
-            ("system", system_prompt),
-            ("schema", schema_prompt),
-            ("example", example_prompt),
-            ("start", start_prompt)
-        ]
-        logger.info("Prompt templates created successfully")
-
-        # -----------------------------------------------------------------------------
-        # SECTION: Create Pydantic Models
-        # -----------------------------------------------------------------------------
-        logger.info("Preparing to create Pydantic models")
-        for params in output_params:
-            for key in params.keys():
-                param_names.append(params[key]['value'])
-                if params[key]['data_type'].lower() == 'list':
-                    subparams_values, subparams_datatypes = get_subparams(params[key]['sub_params'])
-                    logger.info(f"Extracted {len(subparams_values)} sub-parameters")
-                    continue
-                data_types.append(params[key]['data_type'])
-
-        logger.info(f"Creating output models with {len(param_names)} parameters")
-        if not subparams_values and not subparams_datatypes:
-            logger.info("Creating simple GenericAgentModel without sub-parameters")
-            GenericAgentModel = create_generic_output_model(
-                "GenericAgentModel",
-                param_names,
-                data_types
-            )
+    except Exception as e:
+        logger.error(f"Unhandled exception in generic_agent: {str(e)}")
+        # Return empty response with zero token counts in case of failure
+        return {}, 0, 0
         
-        elif isinstance(subparams_values, List):
-            logger.info("Creating nested models with sub-parameters")
-            GenericSubAgentModel = create_generic_output_model(
-                "GenericSubAgentModel",
-                subparams_values,
-                subparams_datatypes,
-            )
-            data_types.append(List[GenericSubAgentModel])
-            GenericAgentModel = create_generic_output_model(
-                "GenericAgentModel",
-                param_names,
-                data_types
-            )
-
-        # Create a pipeline prompt template for the agent
-        logger.info("Creating pipeline prompt template")
-        query_prompt = PipelinePromptTemplate(
-            final_prompt=standard_template,
-            pipeline_prompts=template
-        )
+    return ai_response, combined_input_tokens_count, combined_output_tokens_count
 
-        parser = JsonOutputParser(pydantic_object=GenericAgentModel)
-        logger.info("Created JSON output parser with Pydantic model")
+async def ageneric_agent(
+    function_name: str,
+    func_params: dict,
+    user: str,
+    stream_tokens: bool = False
+) -> tuple[Any, int, int]:
+    """
+    Async variant of `generic_agent` used by the ASGI execution path.
+    
+    The LLM call is awaited with `ainvoke`, so no thread is held while the model is generating.
+    Prompt resolution, table pruning and the DB query run on the shared connection pools in a
+    worker thread (`asyncio.to_thread`) because the warehouse drivers are synchronous.
+    
+    Args:
+        function_name (str): Name of the function configuration to use.
+        func_params (dict): Parameters to pass to the prompt templates and agent pipeline.
+        user (str): User whose configuration and prompt overrides are used.
+        stream_tokens (bool): Stream the LLM output as "agent_token" workflow events when a
+            workflow event sink is listening.
+    
+    Returns:
+        tuple: The processed response and the input and output token counts.
+    """
+    logger.info(f"Starting async generic agent execution for function: {function_name}")
 
-        # Create the query chain by combining the prompt, model, and parser
-        logger.info("Building query chain")
-        query_chain = query_prompt | llm_config_loader() | parser
+    try:
+        (query_chain, agent_name, function_name, dboconfig,
+         combined_input_tokens_count, combined_output_tokens_count) = await asyncio.to_thread(
+            prepare_agent_chain, function_name, func_params, user
+        )
 
-        # -----------------------------------------------------------------------------
-        # SECTION: Execute the Chain
-        # -----------------------------------------------------------------------------
-        # Calling the LLM by passing the input parameters
         logger.info("Executing the query chain with provided parameters")
         with get_openai_callback() as cb:
             try:
-                ai_response = query_chain.invoke(func_params)
-                input_tokens_count = cb.prompt_tokens
-                output_tokens_count = cb.completion_tokens
+                if stream_tokens and is_streaming():
+                    ai_response, estimated_input_tokens, estimated_output_tokens = await astream_query_chain(
+                        query_chain, func_params, agent_name
+                    )
+                    input_tokens_count = cb.prompt_tokens or estimated_input_tokens
+                    output_tokens_count = cb.completion_tokens or estimated_output_tokens
+                else:
+                    ai_response = await query_chain.ainvoke(func_params)
+                    input_tokens_count = cb.prompt_tokens
+                    output_tokens_count = cb.completion_tokens
                 logger.info(f"Query chain execution complete. Input tokens: {input_tokens_count}, Output tokens: {output_tokens_count}")
-                
+
                 print("AI Response: ", ai_response)
-                
-                # Handle DB-specific processing if DB config is available
+
                 if dboconfig is not None:
-                    logger.info("Processing DB-specific response")
-                    db_deps = lazy_import_db_dependencies()
-                    
-                    if "db_query_exec" in db_deps and "Queries" in db_deps:
-                        # Extract query from response
-                        query = ai_response.get('ai_response', ai_response)
-                        logger.info(f"Extracted query from response")
-                        
-                        # Add query to repository
-                        try:
-                            add_query_to_repository(query, db_deps)
-                            logger.info("Successfully added query to repository")
-                        except Exception as e:
-                            logger.warning(f"Failed to add query to repository: {str(e)}")
-                        
-                        # Execute the query
-                        try:
-                            logger.info(f"Executing DB query for function: {function_name}")
-                            ai_response = execute_db_query(query, function_name, db_deps)
-                            logger.info("Query execution successful")
-                        except ImportError as e:
-                            logger.warning(f"Failed to execute DB query: {e}")
-                        except Exception as e:
-                            logger.error(f"Error during DB query execution: {str(e)}")
-                        
-                        # Parse JSON response if needed
-                        if isinstance(ai_response, str):
-                            try:
-                                ai_response = json.loads(ai_response)
-                                logger.info("Successfully parsed JSON response")
-                            except json.JSONDecodeError as e:
-                                logger.warning(f"Failed to parse response as JSON: {str(e)}")
+                    ai_response = await asyncio.to_thread(process_agent_response, ai_response, function_name, dboconfig)
                 else:
-                    # Extract AI response for non-DB cases
-                    logger.info("Processing standard (non-DB) response")
-                    if 'ai_response' in ai_response:
-                        ai_response = ai_response['ai_response']
-                        logger.info("Extracted 'ai_response' field from response")
-                    if isinstance(ai_response, str):
-                        try:
-                            ai_response = json.loads(ai_response)
-                            logger.info("Successfully parsed string response as JSON")
-                        except json.JSONDecodeError as e:
-                            logger.info(f"Response is not JSON format: {str(e)}")
-                
+                    ai_response = process_agent_response(ai_response, function_name, dboconfig)
+
                 combined_input_tokens_count += input_tokens_count
                 combined_output_tokens_count += output_tokens_count
                 logger.info(f"Final token counts - Input: {combined_input_tokens_count}, Output: {combined_output_tokens_count}")
-            
+
             except Exception as e:
                 logger.error(f"Error during query chain execution: {str(e)}")
                 raise
     except Exception as e:
-        logger.error(f"Unhandled exception in generic_agent: {str(e)}")
+        logger.error(f"Unhandled exception in ageneric_agent: {str(e)}")
         # Return empty response with zero token counts in case of failure
         return {}, 0, 0
-        
+
     return ai_response, combined_input_tokens_count, combined_output_tokens_count
 
 # -----------------------------------------------------------------------------
 # END OF MODULE
-# -----------------------------------------------------------------------------
\ No newline at end of file
+# -----------------------------------------------------------------------------
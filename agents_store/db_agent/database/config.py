@@ -34,3 +34,49 @@ class PostgresConfig:
         return connection_params
 
 
+
+class PoolConfig:
+    @staticmethod
+    def load(db_type: str):
+        """
+        Load the connection pool settings of a database type.
+
+        Every setting can be overridden per database type with the upper-cased db_type as
+        prefix, e.g. SNOWFLAKE_AGENT_POOL_MAX_SIZE overrides DB_AGENT_POOL_MAX_SIZE.
+        """
+        def setting(name, default):
+            return os.getenv(f"{db_type.upper()}_{name}", os.getenv(f"DB_AGENT_{name}", default))
+
+        pool_params = {}
+        pool_params['min_size'] = int(setting('POOL_MIN_SIZE', 0))
+        pool_params['max_size'] = int(setting('POOL_MAX_SIZE', 4))
+        pool_params['idle_timeout'] = float(setting('POOL_IDLE_TIMEOUT', 900))
+        pool_params['max_lifetime'] = float(setting('POOL_MAX_LIFETIME', 3600))
+        pool_params['health_check_after'] = float(setting('POOL_HEALTH_CHECK_AFTER', 60))
+        pool_params['acquire_timeout'] = float(setting('POOL_ACQUIRE_TIMEOUT', 60))
+        return pool_params
+
+
+class FetchConfig:
+    @staticmethod
+    def load(db_type: str):
+        """
+        Load the result fetching settings of a database type.
+
+        Results are fetched in batches of QUERY_FETCH_BATCH_SIZE rows and a query is stopped as
+        soon as it returns more than QUERY_MAX_ROWS rows or QUERY_MAX_BYTES bytes of JSON. Like
+        the pool settings, every setting can be overridden per database type, e.g.
+        POSTGRES_AGENT_QUERY_MAX_ROWS overrides DB_AGENT_QUERY_MAX_ROWS.
+
+        RESULT_FORMAT selects how results travel through the workflow: 'rows' (JSON array of
+        row objects) or 'columnar' (a ColumnarResult rendered to text only at the prompt).
+        """
+        def setting(name, default):
+            return os.getenv(f"{db_type.upper()}_{name}", os.getenv(f"DB_AGENT_{name}", default))
+
+        fetch_params = {}
+        fetch_params['batch_size'] = int(setting('QUERY_FETCH_BATCH_SIZE', 1000))
+        fetch_params['max_rows'] = int(setting('QUERY_MAX_ROWS', 10000))
+        fetch_params['max_bytes'] = int(setting('QUERY_MAX_BYTES', 4 * 1024 * 1024))
+        fetch_params['result_format'] = setting('RESULT_FORMAT', 'rows').lower()
+        return fetch_params
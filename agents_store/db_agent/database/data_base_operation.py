@@ -1,9 +1,58 @@
 import re
-from typing import Any
+import json
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence
 import logging
 
+from utils.columnar_result import ColumnarResult
+
 logger = logging.getLogger(__name__)
+
+# Fetch settings used when an operation is created without FetchConfig settings
+DEFAULT_FETCH_PARAMS = {
+    'batch_size': 1000, 'max_rows': 10000, 'max_bytes': 4 * 1024 * 1024, 'result_format': 'rows'
+}
+
+
+class ResultBudgetExceeded(Exception):
+    """
+    Raised while fetching a result that exceeds the row or byte budget of the query.
+    """
+
+
 class DatabaseOperation:
+    def __init__(
+        self,
+        connection_params: Dict[str, Any],
+        pool: Optional[Any] = None,
+        fetch_params: Optional[Dict[str, Any]] = None
+    ):
+        self.connection_params = connection_params
+        self.pool = pool
+        self.fetch_params = {**DEFAULT_FETCH_PARAMS, **(fetch_params or {})}
+
+    def connect(self):
+        """
+        Open a new connection to the database.
+        """
+        raise NotImplementedError("Subclasses should implement this method.")
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection from the pool owned by DatabaseFactory, or open a dedicated
+        connection that is closed afterwards when the operation was created without a pool.
+        """
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        else:
+            conn = self.connect()
+            try:
+                yield conn
+            finally:
+                conn.close()
+
     def clean_query(self, query: str) -> str:
         """
         Clean unwanted double quotes from a SQL query while keeping
@@ -14,7 +63,122 @@ class DatabaseOperation:
         logger.info(f"Cleaned query: {cleaned_query}")
         return cleaned_query.strip()
 
-    def execute_query(self, sql_query: str) -> str:
-        raise NotImplementedError("Subclasses should implement this method.")
+    @property
+    def columnar(self) -> bool:
+        """
+        Whether results are returned as ColumnarResult instead of a JSON string.
+        """
+        return self.fetch_params['result_format'] == 'columnar'
+
+    def check_budget(self, row_count: int, byte_count: int) -> None:
+        """
+        Raise ResultBudgetExceeded when a result exceeds the row or byte budget of the operation.
+        """
+        if row_count > self.fetch_params['max_rows']:
+            raise ResultBudgetExceeded(
+                f"The query returned more than {self.fetch_params['max_rows']} rows. "
+                f"Aggregate or filter the data to reduce the size of the result."
+            )
+        if byte_count > self.fetch_params['max_bytes']:
+            raise ResultBudgetExceeded(
+                f"The query result is larger than {self.fetch_params['max_bytes']} bytes. "
+                f"Select fewer columns or aggregate the data to reduce the size of the result."
+            )
+
+    def fetch_result(
+        self,
+        cur,
+        column_names: Callable[[], Sequence[str]],
+        encode_value: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """
+        Fetch the result of an executed query in the configured result format.
+        """
+        if self.columnar:
+            return self.fetch_columnar(cur, column_names, encode_value)
+        return self.fetch_json(cur, column_names, encode_value)
+
+    def fetch_columnar(
+        self,
+        cur,
+        column_names: Callable[[], Sequence[str]],
+        encode_value: Optional[Callable[[Any], Any]] = None
+    ) -> ColumnarResult:
+        """
+        Fetch the result of an executed query in batches into column lists, without building
+        a dict per row. Same arguments and budgets as `fetch_json`; the byte budget applies to
+        the character length of the values.
+        """
+        batch_size = self.fetch_params['batch_size']
+        row_count = 0
+        byte_count = 0
+
+        rows = cur.fetchmany(batch_size)
+        columns = list(column_names()) if rows else []
+        data: List[List[Any]] = [[] for _ in columns]
+        while rows:
+            row_count += len(rows)
+            for index, values in enumerate(zip(*rows)):
+                if encode_value is not None:
+                    values = [encode_value(value) for value in values]
+                byte_count += sum(len(str(value)) for value in values if value is not None)
+                data[index].extend(values)
+            self.check_budget(row_count, byte_count)
+            rows = cur.fetchmany(batch_size)
+
+        return ColumnarResult(columns, data)
+
+    def fetch_json(
+        self,
+        cur,
+        column_names: Callable[[], Sequence[str]],
+        encode_value: Optional[Callable[[Any], Any]] = None
+    ) -> str:
+        """
+        Fetch the result of an executed query in batches and serialize it as a compact JSON
+        array of row objects.
+
+        Rows are encoded batch by batch, so only the encoded JSON (bounded by the byte budget)
+        and a single batch of driver rows are held in memory. Fetching stops as soon as the
+        row or byte budget of the operation is exceeded.
+
+        Args:
+            cur: A cursor on which the query has been executed.
+            column_names (Callable[[], Sequence[str]]): Returns the column names; called after
+                the first batch, as server-side cursors only describe the result then.
+            encode_value (Optional[Callable[[Any], Any]]): Converts each value before
+                serialization; values JSON cannot represent are stringified.
+
+        Returns:
+            str: The result as a JSON string.
+
+        Raises:
+            ResultBudgetExceeded: If the result exceeds the row or byte budget.
+        """
+        batch_size = self.fetch_params['batch_size']
+
+        encoder = json.JSONEncoder(separators=(',', ':'), default=str)
+        parts: List[str] = []
+        row_count = 0
+        # Opening and closing brackets
+        byte_count = 2
+
+        rows = cur.fetchmany(batch_size)
+        columns = list(column_names()) if rows else []
+        while rows:
+            row_count += len(rows)
+            self.check_budget(row_count, byte_count)
+            for row in rows:
+                if encode_value is not None:
+                    row = [encode_value(value) for value in row]
+                encoded_row = encoder.encode(dict(zip(columns, row)))
+                # Separator included; rows are mostly ASCII so the length approximates bytes
+                byte_count += len(encoded_row) + 1
+                self.check_budget(row_count, byte_count)
+                parts.append(encoded_row)
+            rows = cur.fetchmany(batch_size)
 
+        return "[" + ",".join(parts) + "]"
 
+    def execute_query(self, sql_query: str) -> str:
+        raise NotImplementedError("Subclasses should implement this method.")
@@ -1,14 +1,40 @@
 # src/database/database_factory.py
+import threading
 from typing import Dict, Any
 from agents_store.db_agent.database.snowflake_operation import SnowflakeOperation
 from agents_store.db_agent.database.postgres_operation import postgresOperation  # Import PostgreSQL operation
-from agents_store.db_agent.database.config import SnowflakeConfig, PostgresConfig
+from agents_store.db_agent.database.config import SnowflakeConfig, PostgresConfig, PoolConfig, FetchConfig
+from utils.connection_pool import ConnectionPool
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _run_health_check(conn) -> None:
+    """
+    Run a trivial query to verify that a pooled connection is still usable.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT 1")
+        cur.fetchone()
+    finally:
+        cur.close()
+
+
 class DatabaseFactory:
+    # Operation classes per database type
+    operation_classes = {
+        "snowflake_agent": SnowflakeOperation,
+        "postgres_agent": postgresOperation,
+    }
+
+    # Connection parameters, fetch settings and pools are created once per database type and shared
+    _connection_params: Dict[str, Dict[str, Any]] = {}
+    _fetch_params: Dict[str, Dict[str, Any]] = {}
+    _pools: Dict[str, ConnectionPool] = {}
+    _lock = threading.Lock()
+
     @staticmethod
     def get_database_operation(db_type: str):
         """
@@ -19,22 +45,88 @@ class DatabaseFactory:
             db_type (str): The type of the database (e.g., 'snowflake_agent', 'postgres_agent').
 
         Returns:
-            An instance of the corresponding database operation class.
+            An instance of the corresponding database operation class, backed by the
+            connection pool and the fetch settings of the database type.
 
         Raises:
             ValueError: If the provided database type is unsupported.
          
         """
         logger.info(f"Getting database operation for type: {db_type}")
-        connection_params = DatabaseFactory.load_connection_params(db_type)
-        if db_type == "snowflake_agent":
-            return SnowflakeOperation(connection_params)
-        elif db_type == "postgres_agent":
-            return postgresOperation(connection_params) 
-        else:
+        if db_type not in DatabaseFactory.operation_classes:
             logger.error(f"Unsupported database type: {db_type}")
             raise ValueError("Unsupported database type")
-        
+
+        pool = DatabaseFactory.get_connection_pool(db_type)
+        connection_params = DatabaseFactory._connection_params[db_type]
+        fetch_params = DatabaseFactory._fetch_params[db_type]
+        return DatabaseFactory.operation_classes[db_type](connection_params, pool, fetch_params)
+
+    @staticmethod
+    def get_connection_pool(db_type: str) -> ConnectionPool:
+        """
+        Get the connection pool of a database type, creating it on first use.
+
+        Snowflake sessions are kept alive on the server (client_session_keep_alive) and
+        PostgreSQL connections use TCP keep-alives, so idle pooled connections stay warm.
+        Connections are health-checked after being idle and recycled after their max lifetime.
+
+        Args:
+            db_type (str): The type of the database.
+
+        Returns:
+            ConnectionPool: The shared pool of the database type.
+        """
+        with DatabaseFactory._lock:
+            pool = DatabaseFactory._pools.get(db_type)
+            if pool is not None:
+                return pool
+
+            connection_params = DatabaseFactory.load_connection_params(db_type)
+            if db_type == "snowflake_agent":
+                connection_params['client_session_keep_alive'] = True
+                is_closed = lambda conn: conn.is_closed()
+            else:
+                connection_params['keepalives'] = 1
+                connection_params['keepalives_idle'] = 60
+                is_closed = lambda conn: conn.closed != 0
+            DatabaseFactory._connection_params[db_type] = connection_params
+            DatabaseFactory._fetch_params[db_type] = FetchConfig.load(db_type)
+            operation = DatabaseFactory.operation_classes[db_type](connection_params)
+
+            pool = ConnectionPool(
+                connect=operation.connect,
+                close=lambda conn: conn.close(),
+                health_check=_run_health_check,
+                reset=lambda conn: conn.rollback(),
+                is_closed=is_closed,
+                name=db_type,
+                **PoolConfig.load(db_type)
+            )
+            DatabaseFactory._pools[db_type] = pool
+            logger.info(f"Created connection pool for database type: {db_type}")
+            return pool
+
+    @staticmethod
+    def warm_up_pools() -> None:
+        """
+        Open the minimum number of connections of every database type configured with a
+        POOL_MIN_SIZE above 0; the other pools are still created on first use.
+        """
+        for db_type in DatabaseFactory.operation_classes:
+            if PoolConfig.load(db_type)['min_size'] > 0:
+                DatabaseFactory.get_connection_pool(db_type).warm_up()
+                logger.info(f"Warmed up connection pool for database type: {db_type}")
+
+    @staticmethod
+    def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+        """
+        Get the metrics of every database connection pool.
+        """
+        with DatabaseFactory._lock:
+            pools = dict(DatabaseFactory._pools)
+        return {db_type: pool.stats() for db_type, pool in pools.items()}
+
     @staticmethod
     def load_connection_params(db_type: str) -> Dict[str, Any]:
         """
@@ -56,4 +148,4 @@ class DatabaseFactory:
             logger.error(f"Unsupported database type for connection parameters: {db_type}")
             raise ValueError("Unsupported database type")
 
-        return config_classes[db_type].load()
\ No newline at end of file
+        return config_classes[db_type].load()
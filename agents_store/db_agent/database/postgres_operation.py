@@ -1,9 +1,9 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
 import json
 import psycopg2
 
-from agents_store.db_agent.database.data_base_operation import DatabaseOperation
+from agents_store.db_agent.database.data_base_operation import DatabaseOperation, ResultBudgetExceeded
 # Third-party imports
 from dotenv import load_dotenv
 
@@ -15,42 +15,51 @@ from dotenv import load_dotenv
 logger = logging.getLogger(__name__)
 
 class postgresOperation(DatabaseOperation):
-    def __init__(self, connection_params: Dict[str, Any]):
-        self.connection_params = connection_params
+    def __init__(
+        self,
+        connection_params: Dict[str, Any],
+        pool: Optional[Any] = None,
+        fetch_params: Optional[Dict[str, Any]] = None
+    ):
+        super().__init__(connection_params, pool, fetch_params)
 
-    def execute_query(self, sql_query: str) -> str:
+    def connect(self):
         """
-        Execute a SQL query on Snowflake and return the result as a JSON string.
+        Open a new PostgreSQL connection.
         """
-        conn = None
-        cur = None
+        return psycopg2.connect(**self.connection_params)
 
+    def execute_query(self, sql_query: str) -> Any:
+        """
+        Execute a SQL query on PostgreSQL and return the result as a JSON string, or as a
+        ColumnarResult when the columnar result format is enabled.
+
+        The query runs on a server-side (named) cursor, so rows are transferred in batches
+        instead of being buffered on the client, and stops with an error once the result
+        exceeds the row or byte budget of the operation.
+        """
         try:
-            # Establish a connection to Snowflake
-            conn = psycopg2.connect(**self.connection_params)
-            # Create a cursor object
-            cur = conn.cursor()
-
-            # Execute the query and fetch the results
-            cur.execute(self.clean_query(sql_query))
-            rows = cur.fetchall()
-            columns = [desc[0] for desc in cur.description]
-            records = [dict(zip(columns, row)) for row in rows]
-           
-            # Convert the results to JSON format
-            json_data = json.dumps(records, indent=4)
-            return json_data
+            # Borrow a warm connection from the pool
+            with self.connection() as conn:
+                # Create a server-side cursor fetching batch_size rows per round trip
+                cur = conn.cursor(name="db_agent_query")
+                cur.itersize = self.fetch_params['batch_size']
+                try:
+                    # Execute the query and fetch the results batch by batch
+                    cur.execute(self.clean_query(sql_query))
+                    query_result = self.fetch_result(cur, lambda: [desc[0] for desc in cur.description])
+                finally:
+                    cur.close()
+                    # End the read transaction before the connection goes back to the pool
+                    conn.rollback()
+
+            return query_result
+
+        except ResultBudgetExceeded as be:
+            logger.warning(be)
+            return json.dumps({"error": str(be)})
 
         except psycopg2.Error as e:
             # print(f"Error: {e}")
             logger.error(e)
             return None
-
-        finally:
-            # Close the cursor and connection
-            if 'cur' in locals():
-                cur.close()
-            if 'conn' in locals():
-                conn.close()
-
-
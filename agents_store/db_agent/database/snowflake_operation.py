@@ -1,43 +1,90 @@
 import json
 import snowflake.connector
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from agents_store.db_agent.database.data_base_operation import DatabaseOperation
+from agents_store.db_agent.database.data_base_operation import DatabaseOperation, ResultBudgetExceeded
+from utils.columnar_result import ColumnarResult
 
 import logging
 
+# pyarrow is optional; without it columnar results are built from fetchmany batches
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 
 logger = logging.getLogger(__name__)
 
 class SnowflakeOperation(DatabaseOperation):
-    def __init__(self, connection_params: Dict[str, Any]):
-        self.connection_params = connection_params
+    def __init__(
+        self,
+        connection_params: Dict[str, Any],
+        pool: Optional[Any] = None,
+        fetch_params: Optional[Dict[str, Any]] = None
+    ):
+        super().__init__(connection_params, pool, fetch_params)
+
+    def connect(self):
+        """
+        Open a new Snowflake session.
+        """
+        return snowflake.connector.connect(**self.connection_params)
 
-    def execute_query(self, sql_query: str) -> str:
+    def fetch_arrow(self, cur) -> ColumnarResult:
         """
-        Execute a SQL query on Snowflake and return the result as a JSON string.
+        Fetch the result of an executed query as Arrow batches, enforcing the row budget and
+        the byte budget (Arrow buffer size) while fetching.
         """
-        conn = None
-        cur = None
+        tables = []
+        row_count = 0
+        byte_count = 0
+        for table in cur.fetch_arrow_batches():
+            row_count += table.num_rows
+            byte_count += table.nbytes
+            self.check_budget(row_count, byte_count)
+            tables.append(table)
+        if not tables:
+            return ColumnarResult([], [])
+        return ColumnarResult.from_arrow(pyarrow.concat_tables(tables))
 
+    def execute_query(self, sql_query: str) -> Any:
+        """
+        Execute a SQL query on Snowflake and return the result as a JSON string, or as a
+        ColumnarResult when the columnar result format is enabled.
+
+        The result is fetched in batches and stops with an error once it exceeds the row or
+        byte budget of the operation.
+        """
         try:
-            # Establish a connection to Snowflake
-            conn = snowflake.connector.connect(**self.connection_params)
-
-            # Create a cursor object
-            cur = conn.cursor()
-            
-            # Execute the query and fetch the results
-            cur.execute(sql_query)
-            column_names = [metadata.name for metadata in cur.description]
-            rows = cur.fetchall()
-
-            # Convert the results to JSON format
-            json_data = json.dumps([
-                {key: str(value) for key, value in zip(column_names, row)}
-                for row in rows
-            ])
-            return json_data
+            # Borrow a warm Snowflake session from the pool
+            with self.connection() as conn:
+
+                # Create a cursor object
+                cur = conn.cursor()
+                try:
+                    # Execute the query and fetch the results batch by batch
+                    cur.execute(sql_query)
+                    if self.columnar and pyarrow is not None:
+                        query_result = self.fetch_arrow(cur)
+                    else:
+                        query_result = self.fetch_result(
+                            cur,
+                            lambda: [metadata.name for metadata in cur.description],
+                            encode_value=str
+                        )
+                finally:
+                    # Ensure the cursor is closed, which also cancels an unfinished fetch
+                    try:
+                        cur.close()
+                    except Exception:
+                        pass
+
+            return query_result
+
+        except ResultBudgetExceeded as be:
+            logger.warning(be)
+            return json.dumps({"error": str(be)})
 
         except snowflake.connector.errors.ProgrammingError as pe:
             logger.error(pe)
@@ -50,18 +97,3 @@ class SnowflakeOperation(DatabaseOperation):
         except Exception as e:
             logger.error(e)
             return json.dumps({"error": f"An unexpected error occurred: {e}"})
-
-        finally:
-            # Ensure the cursor is closed
-            if cur:
-                try:
-                    cur.close()
-                except Exception:
-                    pass
-
-            # Ensure the connection is closed
-            if conn:
-                try:
-                    conn.close()
-                except Exception:
-                    pass
@@ -6,6 +6,10 @@ This module identifies appropriate Snowflake table names based on user input
 using an LLM-powered query chain. It loads prompts, defines models, and sets up
 the necessary components to generate, parse, and execute Snowflake SQL queries.
 
+Depending on TABLE_PRUNING_ENGINE the tables are ranked locally first (see
+`agents_store/db_agent/utils/table_ranker.py`) and the LLM is only called when the
+local ranking is not confident.
+
 """
 
 # -----------------------------------------------------------------------------
@@ -26,6 +30,7 @@ from langchain_core.pydantic_v1 import BaseModel, Field
 # Local application imports
 from agents_store.db_agent.models.openai.azure_openai_model import llm_config_loader
 from agents_store.db_agent.utils.helper_functions import load_prompt_yaml
+from agents_store.db_agent.utils.table_ranker import TABLE_PRUNING_ENGINE, table_ranker
 
 import logging
 
@@ -106,7 +111,7 @@ def db_table_pruning_agent(input_text: str,user) -> tuple:
 
     This function processes the user's input text, generates a SQL query using the
     Snowflake query chain, executes the query, and returns the identified table names
-    along with token counts.
+    along with token counts. Tables selected by the local ranking cost no tokens.
 
     Args:
         input_text (str): The user input text for table identification.
@@ -117,6 +122,15 @@ def db_table_pruning_agent(input_text: str,user) -> tuple:
             - int: Number of input tokens used.
             - int: Number of output tokens generated.
     """
+    if TABLE_PRUNING_ENGINE in ("bm25", "hybrid"):
+        # Rank the tables locally; hybrid mode only trusts a confident ranking
+        question = " ".join(str(value) for value in input_text.values()) if isinstance(input_text, dict) else str(input_text)
+        table_names, confident = table_ranker.select(user, question)
+        if table_names and (confident or TABLE_PRUNING_ENGINE == "bm25"):
+            table_ranker.record(used_llm=False)
+            return table_names, 0, 0
+        table_ranker.record(used_llm=True)
+
     db_table_pruning_chain = loading_prompt_files(user)
     with get_openai_callback() as cb:
         ai_response = db_table_pruning_chain.invoke({"user_input": input_text})
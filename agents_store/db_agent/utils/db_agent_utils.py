@@ -1,18 +1,22 @@
 from agents_store.db_agent.database.database_factory import DatabaseFactory
+from agents_store.db_agent.utils.query_result_cache import query_result_cache
 import logging
+from typing import Any
 
 logger = logging.getLogger(__name__)
 
-def db_query_exec(sql_query: str,db_type) -> str:
+def db_query_exec(sql_query: str,db_type) -> Any:
     """
-    Execute a SQL query on the specified database type.
+    Execute a SQL query on the specified database type. Results of read queries are served
+    from the query result cache while they are fresh.
 
     Args:
         sql_query (str): The SQL query to be executed.
         db_type (str): The type of the database (e.g., 'snowflake_agent', 'postgres_agent').
 
     Returns:
-        str: The result of the executed query.
+        Any: The result of the executed query, a JSON string or a ColumnarResult when the
+            columnar result format is enabled.
 
     Raises:
         ValueError: If the SQL query is empty or the database type is unsupported.
@@ -20,5 +24,10 @@ def db_query_exec(sql_query: str,db_type) -> str:
     db_operation = DatabaseFactory.get_database_operation(db_type)
     if sql_query:
        sql_query=db_operation.clean_query(sql_query)
+       query_result = query_result_cache.get(db_type, sql_query)
+       if query_result is not None:
+           logger.info(f"Query result cache hit for {db_type}")
+           return query_result
        query_result = db_operation.execute_query(sql_query)
+       query_result_cache.put(db_type, sql_query, query_result)
     return query_result
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Module Name: db_prompt_bundles.py
+
+Description:
+This module precompiles the per-table DB prompts of every user and memoizes the prompt
+bundles assembled from them, so building the system/schema/example texts of the query
+generation agent for a set of pruned tables costs almost nothing at request time.
+
+  - `precompile_table` flattens the system, schema and example prompts of a table once, when
+    `generate_yaml_db_query_agent` writes them. Tables that were not precompiled in this
+    process (e.g. after a restart) are compiled lazily on first use.
+  - `get_bundle` concatenates the general guidelines with the texts of the pruned tables. The
+    result is memoized per user and sorted table tuple, so the same tables in a different order
+    share a bundle and produce the same prompt.
+  - On a memo miss the table files are checked against the modification times they were
+    compiled from, so prompt files edited by hand are picked up once the bundle expires
+    (DB_PROMPT_BUNDLE_TTL).
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Third-party imports
+from dotenv import load_dotenv
+
+# Local application imports
+from agents_store.db_agent.utils.helper_functions import load_prompt_yaml, read_prompt_yaml
+from utils.chain_cache import file_signature
+from utils.lru_ttl_cache import LRUTTLCache
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+DB_PROMPT_BUNDLE_CACHE_SIZE = int(os.getenv("DB_PROMPT_BUNDLE_CACHE_SIZE", "256"))
+DB_PROMPT_BUNDLE_TTL = float(os.getenv("DB_PROMPT_BUNDLE_TTL", "300"))
+
+templates_path = Path(os.path.join(os.getcwd(), r"agents_store\db_agent\config_files\db_agent_prompts\general_guidelines"))
+
+# Prompt files of a table, in the order of the bundle returned by `get_bundle`
+PROMPT_FILES = ("system_prompt.yaml", "schema_prompt.yaml", "example_prompt.yaml")
+
+# -----------------------------------------------------------------------------
+# SECTION: Path Helpers
+# -----------------------------------------------------------------------------
+
+def table_prompt_directory(user: str, table_name: str) -> str:
+    """
+    Returns the directory holding the DB prompts of a user's table.
+    """
+    return os.path.join(os.getcwd(), 'user_config_files', user, 'db_agent_prompts', table_name)
+
+# -----------------------------------------------------------------------------
+# SECTION: DB Prompt Bundle Store
+# -----------------------------------------------------------------------------
+
+class DBPromptBundleStore:
+    """
+    Thread-safe store of precompiled per-table DB prompts and of the bundles assembled from them.
+
+    Args:
+        max_bundles (int): Maximum number of memoized bundles.
+        bundle_ttl (float): Seconds a memoized bundle is served without checking the table files.
+    """
+
+    def __init__(self, max_bundles: int, bundle_ttl: float):
+        # (user, lower-case table) -> (table directory name, {file name: (file signature, flattened text)})
+        self._tables: Dict[Tuple[str, str], Tuple[str, Dict[str, Tuple[Tuple, str]]]] = {}
+        self._bundles = LRUTTLCache(capacity=max_bundles, default_ttl=bundle_ttl)
+        self._lock = threading.Lock()
+        self.table_compilations = 0
+
+    def precompile_table(self, user: str, table_name: str) -> None:
+        """
+        Flattens the prompt files of a table and drops the user's bundles that include it.
+        """
+        directory = table_prompt_directory(user, table_name)
+        compiled = {}
+        for file_name in PROMPT_FILES:
+            file_path = os.path.join(directory, file_name)
+            compiled[file_name] = (file_signature(file_path), read_prompt_yaml(file_path))
+
+        with self._lock:
+            self._tables[(user, table_name.lower())] = (table_name, compiled)
+            self.table_compilations += 1
+        self._bundles.invalidate_where(lambda key: key[0] == user and table_name.lower() in key[1])
+        logger.info(f"Precompiled DB prompts of table {table_name} for user {user}")
+
+    def get_bundle(self, user: str, table_names: Iterable[str]) -> Tuple[str, str, str]:
+        """
+        Returns the system, schema and example texts for a set of pruned tables.
+
+        Args:
+            user (str): The user whose table prompts are used.
+            table_names (Iterable[str]): The pruned table names.
+
+        Returns:
+            tuple: (system text, schema text, example text)
+        """
+        tables = tuple(sorted({table_name.lower() for table_name in table_names}))
+        key = (user, tables)
+        bundle = self._bundles.get(key)
+        if bundle is not None:
+            return bundle
+
+        compiled_tables = [(table_name, self._compiled_table(user, table_name)) for table_name in tables]
+        texts = []
+        for file_name in PROMPT_FILES:
+            parts = [load_prompt_yaml(os.path.join(templates_path, file_name))]
+            for table_name, compiled in compiled_tables:
+                parts.append(f"\n{table_name}:\n{compiled[file_name][1]}")
+            texts.append("".join(str(part) for part in parts))
+
+        bundle = tuple(texts)
+        self._bundles.put(key, bundle)
+        return bundle
+
+    def table_texts(self, user: str, table_name: str) -> Dict[str, str]:
+        """
+        Returns the flattened prompt texts of a table keyed by prompt file name.
+        """
+        return {file_name: text for file_name, (_, text) in self._compiled_table(user, table_name).items()}
+
+    def invalidate(self, user: Optional[str] = None) -> None:
+        """
+        Drops the precompiled tables and bundles of a user, or of every user.
+        """
+        with self._lock:
+            for key in [key for key in self._tables if user is None or key[0] == user]:
+                del self._tables[key]
+        self._bundles.invalidate_where(lambda key: user is None or key[0] == user)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the bundle cache metrics and the number of precompiled tables.
+        """
+        stats = self._bundles.stats()
+        with self._lock:
+            stats["precompiled_tables"] = len(self._tables)
+            stats["table_compilations"] = self.table_compilations
+        return stats
+
+    def _compiled_table(self, user: str, table_name: str) -> Dict[str, Tuple[Tuple, str]]:
+        # Recompile the table when it was never compiled or one of its files changed since
+        with self._lock:
+            entry = self._tables.get((user, table_name.lower()))
+        if entry is not None:
+            directory = table_prompt_directory(user, entry[0])
+            compiled = entry[1]
+            if all(file_signature(os.path.join(directory, name)) == compiled[name][0] for name in PROMPT_FILES):
+                return compiled
+        self.precompile_table(user, entry[0] if entry is not None else table_name)
+        with self._lock:
+            return self._tables[(user, table_name.lower())][1]
+
+# Process-wide store shared by every DB query generation
+db_prompt_bundle_store = DBPromptBundleStore(DB_PROMPT_BUNDLE_CACHE_SIZE, DB_PROMPT_BUNDLE_TTL)
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
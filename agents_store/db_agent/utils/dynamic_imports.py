@@ -154,8 +154,8 @@ def add_query_to_repository(query: str, db_deps: Dict[str, Any]) -> None:
         db_deps (Dict[str, Any]): Dictionary of DB dependencies
     """
     Queries = db_deps.get("Queries")
-    if Queries and hasattr(Queries, "query"):
+    if Queries and hasattr(Queries, "add"):
         try:
-            Queries.query.append(query)
+            Queries.add(query)
         except Exception as e:
             logger.warning(f"Error adding query to repository: {e}")
\ No newline at end of file
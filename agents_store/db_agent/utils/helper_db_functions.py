@@ -22,3 +22,23 @@ def get_dboconfig(agent_name,user):
                 dboconfig =func[agent_name]['db_config']
                 
     return dboconfig
+
+
+def list_db_functions(user):
+    """
+    Returns the names of the user's supervisor functions that query a database.
+    """
+    functions_path = os.path.join(os.getcwd(),'user_config_files', user, 'supervisor_functions.yaml')
+    if not os.path.exists(functions_path):
+        return []
+    with open(functions_path,encoding="utf-8") as file:
+        try:
+            prompts = yaml.safe_load(file)
+        except yaml.YAMLError:
+            return []
+    db_functions = []
+    for func in (prompts or {}).get('functions') or []:
+        for agent_name, agent_config in func.items():
+            if isinstance(agent_config, dict) and agent_config.get('db_config'):
+                db_functions.append(agent_name)
+    return db_functions
@@ -19,6 +19,11 @@ from pathlib import Path
 from typing import Union, List, Dict
 from pathlib import Path
 
+# Local application imports
+from utils.columnar_result import ColumnarResult
+from utils.directory_index import get_directory_index
+from utils.prompt_store import prompt_store
+
 #----------------------------------------------------------------------------------------------------------
 # SECTION: Get output params from supervisor_functions.yaml if present, otherwise from the agent directory.
 #---------------------------------------------------------------------------------------------------------
@@ -97,9 +102,11 @@ def find_directory(
     """
     Searches for a specified directory within a given starting directory and all its subdirectories.
     
-    This function performs a recursive search starting from the provided path and looks
-    for a directory with the exact name specified in 'dir_name'. It uses os.walk to traverse
-    the directory tree and returns the full path of the first matching directory found.
+    The lookup is served from the shared directory index in `utils.directory_index`, which
+    walks the tree once and maps every directory name to the path of its first occurrence.
+    The index is rebuilt when a lookup misses, when configuration writes invalidate it, or
+    when the optional watcher detects changes. `.git`, `log_files` and `user_config_files`
+    are not searched.
     
     Parameters:
     -----------
@@ -125,17 +132,10 @@ def find_directory(
     """
 
     try:
-        start_path = Path(start_path).resolve()
-        
-        # Search through all subdirectories
-        for root, dirs, _ in os.walk(start_path):
-            if dir_name in dirs:
-                required_dir = Path(root) / dir_name
-                print(f"Found required directory: {required_dir}")
-                return required_dir
-        
-                
-        return None
+        required_dir = get_directory_index(start_path).find(dir_name)
+        if required_dir is not None:
+            print(f"Found required directory: {required_dir}")
+        return required_dir
         
     except Exception as e:
         print(f"Error searching for supervisor directory: {str(e)}")
@@ -149,13 +149,13 @@ def find_directory(
 # SECTION: Compute Total Length of Output
 # -----------------------------------------------------------------------------
  
-def compute_total_length(output: Union[str, List[Dict]]) -> int:
+def compute_total_length(output: Union[str, List[Dict], ColumnarResult]) -> int:
     """
     Compute the total character length across the task output, which can either 
-    be a string or a list of dictionaries containing string values.
+    be a string, a list of dictionaries containing string values or a columnar query result.
  
     Args:
-        output (Union[str, List[Dict]]): The task output to compute the length for. 
+        output (Union[str, List[Dict], ColumnarResult]): The task output to compute the length for. 
             It can be either a direct string or a list of dictionaries.
  
     Returns:
@@ -166,6 +166,9 @@ def compute_total_length(output: Union[str, List[Dict]]) -> int:
     if isinstance(output, str):
         # If the output is a string, return its length directly
         total_length = len(output)
+    elif isinstance(output, ColumnarResult):
+        # Columnar query results are measured without rebuilding the rows
+        total_length = output.text_length()
     elif isinstance(output, list):
         # If the output is a list of dictionaries, sum the length of all string values
         for item in output:
@@ -185,6 +188,22 @@ def load_prompt_yaml(file_path: str) -> str:
     """
     Load Start and Example prompt text from YAML file.
 
+    The flattened text is cached by the prompt store, so the file is only parsed again
+    after it was modified.
+
+    Args:
+        file_path (str): The path to the file containing the prompt text in YAML format
+
+    Returns:
+        str: The content of the file as a string.
+    """
+    return prompt_store.get_text(file_path, read_prompt_yaml)
+
+
+def read_prompt_yaml(file_path: str) -> str:
+    """
+    Parse a prompt YAML file and flatten it into the prompt text, bypassing the prompt store.
+
     Args:
         file_path (str): The path to the file containing the prompt text in YAML format
 
@@ -192,34 +211,28 @@ def load_prompt_yaml(file_path: str) -> str:
         str: The content of the file as a string.
     """
     # Open the specified file in read mode with UTF-8 encoding and return the content
-    
-    buffer_prompts = []
-    final_output = ""
+    lines = []
     with open(file_path,encoding="utf-8") as file:
         try:
             yaml.preserve_quotes = True
             prompts = yaml.safe_load(file)
         except yaml.YAMLError as exc:
             return exc
-        for key ,value in prompts.items():
-            buffer_prompts.append(flatten_json({key:value}))
-
-        for prompt in buffer_prompts:
-            for key, values in prompt.items():
-                if isinstance(values,str):
-                    final_output += values + "\n"
-                else:
-                    if values != None:
-                        if isinstance(values,dict):
-                            for key, val in values.items():
-                                final_output += val + "\n"
-                        if isinstance(values,list):
-                            for val in values:
-                                for key, value in val.items():
-                                    final_output += value + "\n"
-                        
 
-        return final_output
+    for key ,value in prompts.items():
+        prompt = flatten_json({key:value})
+        for key, values in prompt.items():
+            if isinstance(values,str):
+                lines.append(values)
+            else:
+                if values != None:
+                    if isinstance(values,dict):
+                        lines.extend(values.values())
+                    if isinstance(values,list):
+                        for val in values:
+                            lines.extend(val.values())
+
+    return "".join(line + "\n" for line in lines)
 
 #------------------------------------------------------------------------------
 # SECTION: flattens the JSON for getting data from nested JSON
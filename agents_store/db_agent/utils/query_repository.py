@@ -1,6 +1,33 @@
 """
 This file is used store the SQL, Snowflake, postgres queries while calling the generic agent
+
+The queries are kept per request in a context variable: the workflow starts an empty list with
+`Queries.start_request()`, the tasks it runs (worker threads started with a copy of its context
+and asyncio tasks) append to that same list, and concurrent requests never see each other's queries.
 """
+import contextvars
+
+# Queries generated by the request running in the current context
+_generated_queries = contextvars.ContextVar("generated_queries", default=None)
+
+
 class Queries:
 
-    query = [] #store the queries
\ No newline at end of file
+    @staticmethod
+    def start_request():
+        # Start the list of queries of the current request
+        _generated_queries.set([])
+
+    @staticmethod
+    def add(query):
+        queries = _generated_queries.get()
+        if queries is None:
+            # Outside of a workflow, e.g. an agent invoked on its own
+            queries = []
+            _generated_queries.set(queries)
+        queries.append(query)
+
+    @staticmethod
+    def generated():
+        # The queries of the current request, in the order they were generated
+        return list(_generated_queries.get() or [])
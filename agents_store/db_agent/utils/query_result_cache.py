@@ -0,0 +1,306 @@
+"""
+Module Name: query_result_cache.py
+
+Description:
+This module caches the results of the SQL queries executed by the db_agent, so identical
+queries issued for different users or conversations are answered without hitting the warehouse.
+
+  - Entries are keyed by the database type and the SQL normalized by `DatabaseOperation.clean_query`.
+  - Only read queries (SELECT / WITH) whose tables can be told are cached; error results are
+    never cached. Columnar results are immutable and shared between the requests hitting the cache.
+  - The TTL of an entry is the shortest TTL of the tables the query reads, configured in
+    `config_files/query_cache_config.yaml`, falling back to the default TTL.
+  - The cache is bounded by the total size of the cached results (DB_QUERY_CACHE_MAX_BYTES)
+    and evicts the least recently used results first.
+  - `invalidate_tables` is the invalidation hook for data loads, e.g. called by an ETL job
+    through the /db-query-cache/invalidate endpoint.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+
+# Third-party imports
+from dotenv import load_dotenv
+
+# Local application imports
+from agents_store.db_agent.utils.helper_functions import load_yaml
+from utils.chain_cache import file_signature
+from utils.columnar_result import ColumnarResult
+from utils.lru_ttl_cache import LRUTTLCache
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+DB_QUERY_CACHE_ENABLED = os.getenv("DB_QUERY_CACHE_ENABLED", "true").lower() == "true"
+DB_QUERY_CACHE_MAX_BYTES = int(os.getenv("DB_QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+QUERY_CACHE_CONFIG_PATH = os.path.join(os.getcwd(), r'agents_store\db_agent\config_files\query_cache_config.yaml')
+
+# Default TTL used when the configuration file cannot be read
+DEFAULT_TTL_SECONDS = 300
+
+# Tokens of a query: quoted identifiers, words, parentheses, commas and dots. String literals
+# and comments are dropped beforehand, other symbols are kept as single characters
+SQL_TOKEN_PATTERN = re.compile(r'"(?:[^"]|"")*"|[\w$]+|\S')
+SQL_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+# Keywords that can precede a parenthesized subquery or expression; any other word followed by
+# a parenthesis is a function call, whose FROM (e.g. EXTRACT(YEAR FROM d)) is not a table reference
+NON_FUNCTION_KEYWORDS = frozenset({
+    "ALL", "AND", "ANY", "AS", "BY", "CASE", "DISTINCT", "ELSE", "EXCEPT", "EXISTS", "FROM", "HAVING",
+    "IN", "INTERSECT", "JOIN", "LATERAL", "MINUS", "NOT", "ON", "OR", "RECURSIVE", "SELECT", "SOME",
+    "THEN", "UNION", "USING", "WHEN", "WHERE", "WITH",
+})
+
+# Keywords ending the FROM clause of a query, after which commas separate expressions again
+FROM_CLAUSE_END_KEYWORDS = frozenset({
+    "CONNECT", "EXCEPT", "FETCH", "FOR", "GROUP", "HAVING", "INTERSECT", "LIMIT", "MINUS", "OFFSET",
+    "ORDER", "QUALIFY", "SELECT", "START", "UNION", "WHERE", "WINDOW",
+})
+
+# -----------------------------------------------------------------------------
+# SECTION: SQL Helpers
+# -----------------------------------------------------------------------------
+
+def is_word(token: Optional[str]) -> bool:
+    """
+    Tells whether a query token is a word or a quoted identifier.
+    """
+    return token is not None and (token[0] == '"' or token[0].isalnum() or token[0] in "_$")
+
+
+def extract_tables(sql_query: str) -> Optional[FrozenSet[str]]:
+    """
+    Returns the unqualified, upper-case names of the tables a query reads from.
+
+    Follows FROM and JOIN, including comma-separated FROM lists, at every subquery level, and
+    ignores FROM inside function calls such as EXTRACT(YEAR FROM d) or TRIM(BOTH ' ' FROM s).
+    Returns None when the table set cannot be told reliably, e.g. for table functions or
+    unbalanced parentheses; such queries are not cached.
+    """
+    tokens = SQL_TOKEN_PATTERN.findall(SQL_LITERAL_PATTERN.sub(" ", sql_query))
+    tables = set()
+    # Whether every open parenthesis is a function call, and whether the FROM clause is being
+    # read at each level (the query itself and every parenthesis)
+    function_calls = []
+    in_from_clause = [False]
+
+    def token_at(index):
+        return tokens[index] if 0 <= index < len(tokens) else None
+
+    position = 0
+    while position < len(tokens):
+        token = tokens[position]
+        keyword = token.upper()
+        position += 1
+        if token == "(":
+            previous = token_at(position - 2)
+            function_calls.append(is_word(previous) and previous.upper() not in NON_FUNCTION_KEYWORDS)
+            in_from_clause.append(False)
+            continue
+        if token == ")":
+            if not function_calls:
+                return None
+            function_calls.pop()
+            in_from_clause.pop()
+            continue
+        if function_calls and function_calls[-1]:
+            continue
+        if keyword == "FROM":
+            in_from_clause[-1] = True
+        elif keyword in FROM_CLAUSE_END_KEYWORDS:
+            in_from_clause[-1] = False
+            continue
+        elif keyword != "JOIN" and not (token == "," and in_from_clause[-1]):
+            continue
+
+        # A table reference follows FROM, JOIN and the commas of the FROM clause
+        if (token_at(position) or "").upper() == "LATERAL":
+            position += 1
+        if not is_word(token_at(position)):
+            # Subquery, scanned by this loop, or a syntax this parser does not follow
+            continue
+        name = token_at(position)
+        position += 1
+        while token_at(position) == "." and is_word(token_at(position + 1)):
+            name = token_at(position + 1)
+            position += 2
+        if token_at(position) == "(":
+            # Table function, e.g. TABLE(FLATTEN(...)); the tables it reads are unknown
+            return None
+        tables.add(name.strip('"').replace('""', '"').upper())
+
+    if function_calls:
+        return None
+    return frozenset(tables)
+
+
+def is_read_query(sql_query: str) -> bool:
+    """
+    Tells whether a query only reads data.
+    """
+    return re.match(r'^\s*\(*\s*(select|with)\b', sql_query, re.IGNORECASE) is not None
+
+
+def is_error_result(query_result: Any) -> bool:
+    """
+    Tells whether a query result is empty or an error message of the database operation.
+    """
+    if query_result is None:
+        return True
+    if isinstance(query_result, str):
+        return query_result.lstrip().startswith('{"error"')
+    if isinstance(query_result, dict):
+        return "error" in query_result
+    return False
+
+
+def result_size(query_result: Any) -> int:
+    """
+    Approximates the memory used by a cached result in bytes.
+    """
+    if isinstance(query_result, str):
+        return len(query_result.encode("utf-8"))
+    if isinstance(query_result, ColumnarResult):
+        return query_result.nbytes
+    return len(json.dumps(query_result, default=str).encode("utf-8"))
+
+# -----------------------------------------------------------------------------
+# SECTION: Query Result Cache
+# -----------------------------------------------------------------------------
+
+class QueryResultCache:
+    """
+    Size-bounded cache of query results with per-table TTLs.
+
+    Args:
+        max_bytes (int): Maximum total size of the cached results.
+        config_path (str): Path of the YAML file with the default and per-table TTLs.
+    """
+
+    def __init__(self, max_bytes: int, config_path: str):
+        self.config_path = config_path
+        self._cache = LRUTTLCache(capacity=max_bytes)
+        self._config_signature = None
+        self._default_ttl = DEFAULT_TTL_SECONDS
+        self._table_ttls: Dict[str, float] = {}
+
+    @staticmethod
+    def make_key(db_type: str, cleaned_query: str) -> Optional[tuple]:
+        """
+        Builds the cache key of a query normalized by `DatabaseOperation.clean_query`, or
+        returns None when the tables it reads cannot be told, as it could not be invalidated.
+        """
+        tables = extract_tables(cleaned_query)
+        if tables is None:
+            return None
+        return (db_type, cleaned_query.rstrip(";").strip(), tables)
+
+    def ttl_for(self, tables: Iterable[str]) -> float:
+        """
+        Returns the TTL of a result reading the given tables.
+        """
+        self._reload_config()
+        ttls = [self._table_ttls[table] for table in tables if table in self._table_ttls]
+        return min(ttls) if ttls else self._default_ttl
+
+    def get(self, db_type: str, cleaned_query: str) -> Optional[Any]:
+        """
+        Returns the cached result of a query, or None on a miss.
+        """
+        if not DB_QUERY_CACHE_ENABLED or not is_read_query(cleaned_query):
+            return None
+        key = self.make_key(db_type, cleaned_query)
+        return self._cache.get(key) if key is not None else None
+
+    def put(self, db_type: str, cleaned_query: str, query_result: Any) -> bool:
+        """
+        Caches the result of a read query unless it is an error, a queried table disables caching
+        or the queried tables cannot be told.
+
+        Returns:
+            bool: Whether the result was cached.
+        """
+        if not DB_QUERY_CACHE_ENABLED or not is_read_query(cleaned_query) or is_error_result(query_result):
+            return False
+        key = self.make_key(db_type, cleaned_query)
+        if key is None:
+            return False
+        ttl = self.ttl_for(key[2])
+        if ttl <= 0:
+            return False
+        return self._cache.put(key, query_result, ttl=ttl, weight=result_size(query_result))
+
+    def invalidate_tables(self, tables: Iterable[str], db_type: Optional[str] = None) -> int:
+        """
+        Drops every cached result reading one of the tables, e.g. after a data load.
+
+        Args:
+            tables (Iterable[str]): Table names, qualified or not.
+            db_type (Optional[str]): Restrict the invalidation to a database type.
+
+        Returns:
+            int: The number of removed results.
+        """
+        table_names = {str(table).split(".")[-1].strip('"').upper() for table in tables}
+        removed = self._cache.invalidate_where(
+            lambda key: (db_type is None or key[0] == db_type) and bool(key[2] & table_names)
+        )
+        logger.info(f"Invalidated {removed} cached query results for tables: {sorted(table_names)}")
+        return removed
+
+    def invalidate(self, db_type: Optional[str] = None) -> int:
+        """
+        Drops every cached result, or those of a database type.
+        """
+        return self._cache.invalidate_where(lambda key: db_type is None or key[0] == db_type)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the metrics of the cache.
+        """
+        stats = self._cache.stats()
+        stats["enabled"] = DB_QUERY_CACHE_ENABLED
+        return stats
+
+    def _reload_config(self) -> None:
+        # Re-read the TTL configuration only when the file changed
+        signature = file_signature(self.config_path)
+        if signature == self._config_signature:
+            return
+        self._config_signature = signature
+        config = load_yaml(self.config_path) if signature[1] is not None else None
+        cache_config = (config or {}).get("query_result_cache") or {}
+        self._default_ttl = float(cache_config.get("default_ttl_seconds", DEFAULT_TTL_SECONDS))
+        self._table_ttls = {
+            str(table).upper(): float(ttl)
+            for table, ttl in (cache_config.get("table_ttl_seconds") or {}).items()
+        }
+        logger.info(f"Loaded query result cache TTLs: default {self._default_ttl}s, {len(self._table_ttls)} tables")
+
+# Process-wide cache shared by every db_agent query
+query_result_cache = QueryResultCache(DB_QUERY_CACHE_MAX_BYTES, QUERY_CACHE_CONFIG_PATH)
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
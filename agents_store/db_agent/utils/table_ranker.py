@@ -0,0 +1,259 @@
+"""
+Module Name: table_ranker.py
+
+Description:
+This module ranks a user's tables for a question locally with BM25, as an alternative to the
+LLM call of `db_table_pruning_agent`.
+
+Every table is indexed as one document made of its name and its system, schema and example
+prompts (the prompts written by `/configure-agent`). Identifiers are split on underscores
+(`order_date` -> `order_date`, `order`, `date`) and plurals are folded, so questions match
+column names and example questions. The index of a user is built when `/configure-agent`
+writes the DB prompts, or lazily on first use, and is rebuilt when tables are added or removed.
+
+The pruning engine is selected with TABLE_PRUNING_ENGINE:
+  - llm:    always ask the LLM (default, previous behavior).
+  - bm25:   always use the local ranking.
+  - hybrid: use the local ranking and fall back to the LLM when it is not confident.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third-party imports
+import numpy as np
+from dotenv import load_dotenv
+
+# Local application imports
+from agents_store.db_agent.utils.db_prompt_bundles import db_prompt_bundle_store
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+TABLE_PRUNING_ENGINE = os.getenv("TABLE_PRUNING_ENGINE", "llm").lower()
+# Maximum number of tables selected by the local ranking
+TABLE_PRUNING_BM25_MAX_TABLES = int(os.getenv("TABLE_PRUNING_BM25_MAX_TABLES", "3"))
+# Tables scoring at least this fraction of the best score are selected with it
+TABLE_PRUNING_BM25_RELATIVE_CUTOFF = float(os.getenv("TABLE_PRUNING_BM25_RELATIVE_CUTOFF", "0.6"))
+# Minimum best score for the local ranking to be trusted in hybrid mode
+TABLE_PRUNING_BM25_MIN_SCORE = float(os.getenv("TABLE_PRUNING_BM25_MIN_SCORE", "1.5"))
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Words carrying no information about the table a question is about
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "of", "for", "to", "in", "on", "at", "by",
+    "with", "and", "or", "not", "me", "my", "i", "you", "your", "we", "our", "it", "its", "this",
+    "that", "these", "those", "what", "which", "who", "how", "many", "much", "show", "give",
+    "tell", "list", "get", "find", "all", "from", "as", "do", "does", "did", "can", "could",
+    "please", "there", "their", "has", "have", "had"
+}
+
+# -----------------------------------------------------------------------------
+# SECTION: Tokenization
+# -----------------------------------------------------------------------------
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits a text into lower-case terms, adding the parts of snake_case identifiers and folding
+    plurals.
+    """
+    terms = []
+    for word in re.findall(r"[a-z0-9_]+", str(text).lower()):
+        parts = [word] + ([part for part in word.split("_") if part] if "_" in word else [])
+        for part in parts:
+            if part in STOP_WORDS or len(part) < 2:
+                continue
+            if len(part) > 3 and part.endswith("s") and not part.endswith("ss"):
+                part = part[:-1]
+            terms.append(part)
+    return terms
+
+# -----------------------------------------------------------------------------
+# SECTION: BM25 Index
+# -----------------------------------------------------------------------------
+
+class BM25Index:
+    """
+    BM25 index over a small set of documents. The per-document weight of every term is
+    precomputed, so scoring a query is a column sum over the query terms.
+
+    Args:
+        documents (Dict[str, List[str]]): Terms of every document keyed by document name.
+    """
+
+    def __init__(self, documents: Dict[str, List[str]]):
+        self.names = list(documents)
+        self.vocabulary: Dict[str, int] = {}
+        for terms in documents.values():
+            for term in terms:
+                self.vocabulary.setdefault(term, len(self.vocabulary))
+
+        term_frequencies = np.zeros((len(self.names), len(self.vocabulary)), dtype=np.float32)
+        for index, terms in enumerate(documents.values()):
+            for term in terms:
+                term_frequencies[index, self.vocabulary[term]] += 1
+
+        document_lengths = term_frequencies.sum(axis=1)
+        average_length = float(document_lengths.mean()) if len(self.names) else 0.0
+        document_frequencies = (term_frequencies > 0).sum(axis=0)
+        idf = np.log(1.0 + (len(self.names) - document_frequencies + 0.5) / (document_frequencies + 0.5))
+        norms = BM25_K1 * (1.0 - BM25_B + BM25_B * document_lengths / (average_length or 1.0))
+        self.weights = idf * term_frequencies * (BM25_K1 + 1.0) / (term_frequencies + norms[:, None])
+
+    def rank(self, query: str) -> List[Tuple[str, float]]:
+        """
+        Returns the documents sorted by decreasing BM25 score for a query.
+        """
+        term_ids = sorted({self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary})
+        if not term_ids or not self.names:
+            return [(name, 0.0) for name in self.names]
+        scores = self.weights[:, term_ids].sum(axis=1)
+        order = np.argsort(-scores, kind="stable")
+        return [(self.names[index], float(scores[index])) for index in order]
+
+# -----------------------------------------------------------------------------
+# SECTION: Table Ranker
+# -----------------------------------------------------------------------------
+
+def user_tables_directory(user: str) -> str:
+    """
+    Returns the directory holding the per-table DB prompts of a user.
+    """
+    return os.path.join(os.getcwd(), 'user_config_files', user, 'db_agent_prompts')
+
+
+class TableRanker:
+    """
+    Per-user BM25 indexes over the table prompts and the table selection built on them.
+    """
+
+    def __init__(self):
+        # user -> (modification time of the user's table directory, index)
+        self._indexes: Dict[str, Tuple[Optional[int], BM25Index]] = {}
+        self._lock = threading.Lock()
+        self._metrics = {"index_builds": 0, "local_selections": 0, "llm_fallbacks": 0}
+
+    def build(self, user: str) -> BM25Index:
+        """
+        Builds the index of a user's tables from their precompiled prompts.
+        """
+        directory = user_tables_directory(user)
+        directory_mtime = self._directory_mtime(directory)
+        documents = {}
+        if directory_mtime is not None:
+            for table_name in sorted(os.listdir(directory)):
+                if not os.path.isdir(os.path.join(directory, table_name)):
+                    continue
+                texts = db_prompt_bundle_store.table_texts(user, table_name)
+                # The table name is repeated to weigh it like a heading
+                document = " ".join([table_name] * 3 + [str(text) for text in texts.values()])
+                documents[table_name] = tokenize(document)
+
+        index = BM25Index(documents)
+        with self._lock:
+            self._indexes[user] = (directory_mtime, index)
+            self._metrics["index_builds"] += 1
+        logger.info(f"Built table ranking index for user {user} with {len(documents)} tables")
+        return index
+
+    def get_index(self, user: str) -> BM25Index:
+        """
+        Returns the index of a user, rebuilding it when tables were added or removed.
+        """
+        with self._lock:
+            entry = self._indexes.get(user)
+        if entry is not None and entry[0] == self._directory_mtime(user_tables_directory(user)):
+            return entry[1]
+        return self.build(user)
+
+    def select(self, user: str, user_input: str) -> Tuple[List[str], bool]:
+        """
+        Selects the tables relevant to a question.
+
+        Args:
+            user (str): The user whose tables are ranked.
+            user_input (str): The question.
+
+        Returns:
+            tuple: The selected table names and whether the ranking is confident, i.e. the best
+                table scores at least TABLE_PRUNING_BM25_MIN_SCORE and the selection
+                discriminates between the tables.
+        """
+        ranking = self.get_index(user).rank(user_input)
+        if not ranking:
+            return [], False
+        if len(ranking) == 1:
+            return [ranking[0][0]], True
+
+        best_score = ranking[0][1]
+        selected = [
+            name for name, score in ranking[:TABLE_PRUNING_BM25_MAX_TABLES]
+            if score > 0 and score >= TABLE_PRUNING_BM25_RELATIVE_CUTOFF * best_score
+        ]
+        confident = best_score >= TABLE_PRUNING_BM25_MIN_SCORE and 0 < len(selected) < len(ranking)
+        logger.info(f"Local table ranking for user {user}: {ranking[:TABLE_PRUNING_BM25_MAX_TABLES]}, confident: {confident}")
+        return selected, confident
+
+    def record(self, used_llm: bool) -> None:
+        """
+        Counts a pruning decision for the runtime statistics.
+        """
+        with self._lock:
+            self._metrics["llm_fallbacks" if used_llm else "local_selections"] += 1
+
+    def invalidate(self, user: Optional[str] = None) -> None:
+        """
+        Drops the index of a user, or every index.
+        """
+        with self._lock:
+            if user is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(user, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the pruning engine, the decision counters and the indexed users.
+        """
+        with self._lock:
+            stats = dict(self._metrics)
+            stats["engine"] = TABLE_PRUNING_ENGINE
+            stats["indexed_users"] = len(self._indexes)
+        return stats
+
+    @staticmethod
+    def _directory_mtime(directory: str) -> Optional[int]:
+        try:
+            return os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+
+# Process-wide table ranker shared by every DB query generation
+table_ranker = TableRanker()
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -1,9 +1,11 @@
 import yaml
-import os
 from pathlib import Path
 from typing import Union, List, Dict
 from pathlib import Path
 
+# Local application imports
+from utils.directory_index import get_directory_index
+
 #----------------------------------------------------------------------------------------------------------
 # SECTION: Get output params from supervisor_functions.yaml if present, otherwise from the agent directory.
 #---------------------------------------------------------------------------------------------------------
@@ -78,9 +80,11 @@ def find_directory(
     """
     Searches for a specified directory within a given starting directory and all its subdirectories.
     
-    This function performs a recursive search starting from the provided path and looks
-    for a directory with the exact name specified in 'dir_name'. It uses os.walk to traverse
-    the directory tree and returns the full path of the first matching directory found.
+    The lookup is served from the shared directory index in `utils.directory_index`, which
+    walks the tree once and maps every directory name to the path of its first occurrence.
+    The index is rebuilt when a lookup misses, when configuration writes invalidate it, or
+    when the optional watcher detects changes. `.git`, `log_files` and `user_config_files`
+    are not searched.
     
     Parameters:
     -----------
@@ -106,17 +110,10 @@ def find_directory(
     """
 
     try:
-        start_path = Path(start_path).resolve()
-        
-        # Search through all subdirectories
-        for root, dirs, _ in os.walk(start_path):
-            if dir_name in dirs:
-                required_dir = Path(root) / dir_name
-                print(f"Found required directory: {required_dir}")
-                return required_dir
-        
-                
-        return None
+        required_dir = get_directory_index(start_path).find(dir_name)
+        if required_dir is not None:
+            print(f"Found required directory: {required_dir}")
+        return required_dir
         
     except Exception as e:
         print(f"Error searching for supervisor directory: {str(e)}")
@@ -1,9 +1,10 @@
 # from agents_store.graph_summary_agent.generic_agent import generic_agent
-from agents.generic_agent import generic_agent
+from agents.generic_agent import ageneric_agent
+from utils.workflow_events import emit_event
 #----------------------------------------------------------------------------
 # This function executes the explicit agent logic and calls the generic agent
 #----------------------------------------------------------------------------
-def execute(user_input,task_outputs,total_input_tokens_count,total_output_tokens_count,conversation,user):
+async def aexecute(user_input,task_outputs,total_input_tokens_count,total_output_tokens_count,conversation,user):
     """
     Aggregates summaries from task outputs and generates a consolidated summary through a summary agent.
     
@@ -40,8 +41,9 @@ def execute(user_input,task_outputs,total_input_tokens_count,total_output_tokens
                     "other_agents_response": summaries
                 }
         
-        task_output,input_tokens_count,output_tokens_count = generic_agent("summary_agent",summary_input,user)
+        task_output,input_tokens_count,output_tokens_count = await ageneric_agent("summary_agent",summary_input,user,stream_tokens=True)
         conversation["present_conversation"].append({"summary_agent": task_output['summary']}) 
+        emit_event("summary", {"agent": "summary_agent", "summary": task_output['summary']})
         total_input_tokens_count += input_tokens_count
         total_output_tokens_count += output_tokens_count
 
@@ -49,4 +51,3 @@ def execute(user_input,task_outputs,total_input_tokens_count,total_output_tokens
     except Exception as e:
         print(f"Error in executing the summary agent: {str(e)}")
         return {},total_input_tokens_count,total_output_tokens_count,conversation
-
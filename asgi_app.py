@@ -0,0 +1,220 @@
+"""
+Module Name: asgi_app.py
+
+Description: This module exposes the Ask Ellis workflow on an async execution path served by
+an ASGI server. Every LLM call of the workflow is awaited (`aask_ellis_workflow_graph`), so a
+request does not pin a thread while the models are generating and one worker process can hold
+hundreds of concurrent conversations. The configuration endpoints stay on the Flask app.
+
+The warehouse and persistence drivers (snowflake-connector-python, psycopg2) are synchronous;
+their calls run in worker threads (`asyncio.to_thread`) on the shared connection pools.
+
+Run with:
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+
+Available Endpoints:
+
+1. /ask-ellis [POST]
+   - Handles the Ask Ellis workflow, processing user input and generating responses.
+
+2. /ask-ellis/stream [POST]
+   - Streams the progress of the Ask Ellis workflow as Server-Sent Events.
+
+3. /runtime-stats [GET]
+   - Returns the hit/miss counters of the in-process caches and the connection pool metrics.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+# Third-party imports
+from dotenv import load_dotenv
+from quart import Quart, Response, jsonify, request
+from quart_cors import cors
+
+# Local application imports
+from agents_store.db_agent.database.database_factory import DatabaseFactory
+from utils.flask_api_validations import get_ask_ellis_api_request_error
+from workflows.core_engine_workflow_graph import aask_ellis_workflow_graph
+import utils.logger_config
+from persistence.database import get_pool_stats, warm_up_connection_pool
+from utils.connection_pool import warm_up_in_background
+from persistence.conversation_handler import BusinessLogic
+from persistence.utils.utility_functions import preload_name_generator
+from persistence.conversation_memory import conversation_memory
+from persistence.migrations import run_startup_migrations
+from utils.chain_cache import compiled_chain_cache
+from utils.prompt_store import prompt_store
+from utils.speculation import speculation_stats
+from workflow_execution.observer_agent.pre_validation import pre_validator
+from workflow_execution.supervisor_agent.plan_cache import supervisor_plan_cache
+from agents_store.db_agent.utils.query_result_cache import query_result_cache
+from agents_store.db_agent.utils.db_prompt_bundles import db_prompt_bundle_store
+from agents_store.db_agent.utils.table_ranker import table_ranker
+from models.openai.azure_openai_model import llm_client_registry
+from utils.directory_index import initialize_directory_index
+from utils.workflow_events import astream_workflow_events
+
+# -----------------------------------------------------------------------------
+# SECTION: Application Initialization and Configuration
+# -----------------------------------------------------------------------------
+
+# Initialize Quart app and load environment variables
+app = cors(Quart(__name__))
+load_dotenv()
+
+# Build the prompt/agent directory index once instead of walking the tree per agent call
+initialize_directory_index(Path.cwd())
+preload_name_generator()
+run_startup_migrations()
+# Open the minimum number of pooled connections so the first requests do not pay the connection setup
+warm_up_in_background(warm_up_connection_pool, DatabaseFactory.warm_up_pools)
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Ask Ellis Workflow Endpoints
+# -----------------------------------------------------------------------------
+
+async def start_conversation(data):
+    """
+    Validates the request and loads or creates the conversation thread.
+
+    Returns:
+        tuple: The validation error response or None, the BusinessLogic instance, the thread ID
+            and the conversation history.
+    """
+    validation_error = get_ask_ellis_api_request_error(data)
+    if validation_error:
+        return (jsonify({"error": validation_error}), 400), None, None, None
+
+    business_logic = await asyncio.to_thread(BusinessLogic)
+    resp = await asyncio.to_thread(business_logic.chat_conversation_handler, data)
+    return None, business_logic, resp["thread_id"], resp["conversation_history"]
+
+
+@app.route('/ask-ellis', methods=['POST'])
+async def ask_ellis():
+    """
+    Async API endpoint for the Ask Ellis workflow.
+    """
+    try:
+        # Parse request body
+        data = await request.get_json()
+
+        error_response, business_logic, thread_id, conversation_history = await start_conversation(data)
+        if error_response:
+            return error_response
+
+        user_input = data.get("user_input")
+        user_details = data.get("user_details")
+        user = user_details.get("user_name")
+        logger.info(f"rca_user_input: {user_input}")
+
+        # Call the async Ask Ellis workflow
+        ellis_response = await aask_ellis_workflow_graph(user_input, conversation_history, user_details, user)
+        await asyncio.to_thread(business_logic.chat_conversation, thread_id, ellis_response)
+        return jsonify(ellis_response), 200
+
+    except Exception as error:
+        logger.error(error)
+        return jsonify({
+            "error": "An error occurred while processing the request.",
+            "details": str(error)
+        }), 500
+
+
+@app.route('/ask-ellis/stream', methods=['POST'])
+async def ask_ellis_stream():
+    """
+    Async streaming variant of the Ask Ellis workflow endpoint. Emits the same Server-Sent
+    Events as the Flask /ask-ellis/stream endpoint.
+    """
+    try:
+        # Parse request body
+        data = await request.get_json()
+
+        error_response, business_logic, thread_id, conversation_history = await start_conversation(data)
+        if error_response:
+            return error_response
+
+        user_input = data.get("user_input")
+        user_details = data.get("user_details")
+        user = user_details.get("user_name")
+        logger.info(f"rca_user_input (stream): {user_input}")
+
+        # Persist the response once the workflow has finished, before the result event is sent
+        async def save_response(ellis_response):
+            await asyncio.to_thread(business_logic.chat_conversation, thread_id, ellis_response)
+
+        events = astream_workflow_events(
+            aask_ellis_workflow_graph,
+            user_input, conversation_history, user_details, user,
+            on_result=save_response
+        )
+        response = Response(events, mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.timeout = None
+        return response
+
+    except Exception as error:
+        logger.error(error)
+        return jsonify({
+            "error": "An error occurred while processing the request.",
+            "details": str(error)
+        }), 500
+
+
+@app.route('/runtime-stats', methods=['GET'])
+async def runtime_stats():
+    """
+    Returns the runtime statistics of the in-process caches and connection pools.
+    """
+    try:
+        return jsonify({
+            "compiled_chain_cache": compiled_chain_cache.stats(),
+            "prompt_store": prompt_store.stats(),
+            "supervisor_plan_cache": supervisor_plan_cache.stats(),
+            "db_query_result_cache": query_result_cache.stats(),
+            "db_prompt_bundles": db_prompt_bundle_store.stats(),
+            "table_ranker": table_ranker.stats(),
+            "speculation": speculation_stats(),
+            "observer_pre_validation": pre_validator.stats(),
+            "llm_client_registry": llm_client_registry.stats(),
+            "conversation_memory": conversation_memory.stats(),
+            "persistence_connection_pools": get_pool_stats(),
+            "db_agent_connection_pools": DatabaseFactory.get_pool_stats()
+        }), 200
+    except Exception as error:
+        logger.error(error)
+        return jsonify({"error": "An error occurred while fetching runtime statistics."}), 500
+
+# -----------------------------------------------------------------------------
+# SECTION: Application Entry Point
+# -----------------------------------------------------------------------------
+
+if __name__ == '__main__':
+    import hypercorn.asyncio
+    from hypercorn.config import Config
+
+    config = Config()
+    config.bind = [f"0.0.0.0:{os.getenv('ASGI_PORT', '5000')}"]
+    asyncio.run(hypercorn.asyncio.serve(app, config))
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
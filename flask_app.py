@@ -10,6 +10,16 @@ Available Endpoints:
  
 2. /ask-ellis [POST]
    - Handles the Ask Ellis workflow, processing user input and generating responses.
+
+3. /ask-ellis/stream [POST]
+   - Streams the progress of the Ask Ellis workflow as Server-Sent Events: supervisor plan,
+     task outputs, observer verdict, summary tokens and the final response.
+
+4. /runtime-stats [GET]
+   - Returns the hit/miss counters of the in-process caches and the connection pool metrics.
+
+5. /db-query-cache/invalidate [POST]
+   - Drops the cached db_agent query results reading the given tables, e.g. after a data load.
  
 """
 
@@ -23,23 +33,38 @@ import os
 import yaml
 import uuid
 import json
+from pathlib import Path
 
 # Third-party imports
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
 
 # Local application imports
 # from static.static_user_queries_handler import get_static_user_questions_list, is_user_input_in_static_queries, execute_static_query_for_user_input 
 from agent_config_utils.agent_app_config import agent_config, agents_list, enable_disable_agent_handler, generate_yaml_db_query_agent, get_user_config_agent, load_config, save_config, summary_agent_handler, supervisor_agent_handler, supervisor_functions_config_v1, table_pruning_prompt_handler
-from agents_store.db_agent.utils.query_repository import Queries
+from agents_store.db_agent.database.database_factory import DatabaseFactory
 from utils.flask_api_validations import validate_ask_ellis_api_request_data
 from workflows.core_engine_workflow_graph import ask_ellis_workflow_graph
 import utils.logger_config
-from persistence.database import DatabaseConnection
-from persistence.utils.utility_functions import generate_name
+from persistence.database import DatabaseConnection, get_pool_stats, warm_up_connection_pool
+from utils.connection_pool import warm_up_in_background
+from persistence.utils.utility_functions import generate_name, preload_name_generator
 from persistence.conversation_handler import BusinessLogic
+from persistence.conversation_memory import conversation_memory
+from persistence.migrations import run_startup_migrations
 from access_controller.access_handler import AccessHandler
+from utils.chain_cache import compiled_chain_cache
+from utils.prompt_store import prompt_store
+from utils.speculation import speculation_stats
+from workflow_execution.observer_agent.pre_validation import pre_validator
+from workflow_execution.supervisor_agent.plan_cache import supervisor_plan_cache
+from agents_store.db_agent.utils.query_result_cache import query_result_cache
+from agents_store.db_agent.utils.db_prompt_bundles import db_prompt_bundle_store
+from agents_store.db_agent.utils.table_ranker import table_ranker
+from models.openai.azure_openai_model import llm_client_registry
+from utils.directory_index import initialize_directory_index, invalidate_directory_index
+from utils.workflow_events import stream_workflow_events
 
 # -----------------------------------------------------------------------------
 # SECTION: Application Initialization and Configuration
@@ -57,6 +82,13 @@ EXP_TIME = int(os.getenv("TOKEN_EXPIRY_SECONDS", "3600"))
 app.config['SECRET_KEY'] = SECRET_KEY
 app.config['TOKEN_EXPIRY_SECONDS'] = EXP_TIME
 
+# Build the prompt/agent directory index once instead of walking the tree per agent call
+initialize_directory_index(Path.cwd())
+preload_name_generator()
+run_startup_migrations()
+# Open the minimum number of pooled connections so the first requests do not pay the connection setup
+warm_up_in_background(warm_up_connection_pool, DatabaseFactory.warm_up_pools)
+
 # -----------------------------------------------------------------------------
 # SECTION: Logger Setup
 # -----------------------------------------------------------------------------
@@ -74,7 +106,6 @@ def ask_ellis():
     API endpoint for the Ask Ellis workflow.
     """
     try:
-        Queries.query = []
         # Parse request body
         data = request.get_json()   
         business_logic = BusinessLogic()
@@ -110,6 +141,64 @@ def ask_ellis():
         }), 500
 
 
+@app.route('/ask-ellis/stream', methods=['POST'])
+def ask_ellis_stream():
+    """
+    Streaming variant of the Ask Ellis workflow endpoint.
+
+    Accepts the same request body as /ask-ellis and responds with Server-Sent Events emitted as
+    each stage of the workflow completes:
+        - supervisor_plan: the tasks generated by the supervisor agent
+        - task_output: the output of each task as soon as it finishes
+        - observer_verdict: the validation result of the observer agent
+        - agent_token: the summary text as it is generated by the LLM
+        - summary: the complete summary
+        - result: the same JSON response as /ask-ellis, or error if the workflow failed
+        - done: end of the stream
+    """
+    try:
+        # Parse request body
+        data = request.get_json()
+        business_logic = BusinessLogic()
+
+        # Validate request data
+        validation_error = validate_ask_ellis_api_request_data(data)
+        if validation_error:
+            return validation_error
+
+        # Extract required fields from API request body
+        user_input = data.get("user_input")
+        user_details = data.get("user_details")
+        user = user_details.get("user_name")
+        logger.info(f"rca_user_input (stream): {user_input}")
+
+        resp = business_logic.chat_conversation_handler(data)
+        thread_id = resp["thread_id"]
+        conversation_history = resp["conversation_history"]
+
+        # Persist the response once the workflow has finished, before the result event is sent
+        def save_response(ellis_response):
+            business_logic.chat_conversation(thread_id, ellis_response)
+
+        events = stream_workflow_events(
+            ask_ellis_workflow_graph,
+            user_input, conversation_history, user_details, user,
+            on_result=save_response
+        )
+        return Response(
+            stream_with_context(events),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    except Exception as error:
+        logger.error(error)
+        return jsonify({
+            "error": "An error occurred while processing the request.",
+            "details": str(error)
+        }), 500
+
+
 @app.route('/conv-history', methods=['POST'])
 def conv_history():
     """
@@ -249,6 +338,12 @@ def configure_agent():
         elif agent_name=='supervisor_agent':
             save_config(config_data,agent_name,user)
             supervisor_agent_handler(config_data,user)
+
+        # Drop the user's compiled chains and plans so the rewritten prompts are picked up
+        compiled_chain_cache.invalidate(user)
+        supervisor_plan_cache.invalidate(user)
+        prompt_store.invalidate()
+        invalidate_directory_index()
         return jsonify({"message": "Agent configured successfully"})
     except Exception as error:
         print(error)
@@ -279,6 +374,64 @@ def fetch_agent_config():
         logger.error(error)
         return jsonify({"error": "An error occurred while fetching agent configuration."}), 500
 
+@app.route('/runtime-stats', methods=['GET'])
+def runtime_stats():
+    """
+    Returns the runtime statistics of the in-process caches and connection pools.
+
+    Returns:
+        tuple: A JSON response with the cache counters and pool metrics (200 OK)
+            - Or a JSON error message (500 Internal Server Error) if an exception occurs
+    """
+    try:
+        return jsonify({
+            "compiled_chain_cache": compiled_chain_cache.stats(),
+            "prompt_store": prompt_store.stats(),
+            "supervisor_plan_cache": supervisor_plan_cache.stats(),
+            "db_query_result_cache": query_result_cache.stats(),
+            "db_prompt_bundles": db_prompt_bundle_store.stats(),
+            "table_ranker": table_ranker.stats(),
+            "speculation": speculation_stats(),
+            "observer_pre_validation": pre_validator.stats(),
+            "llm_client_registry": llm_client_registry.stats(),
+            "conversation_memory": conversation_memory.stats(),
+            "persistence_connection_pools": get_pool_stats(),
+            "db_agent_connection_pools": DatabaseFactory.get_pool_stats()
+        }), 200
+    except Exception as error:
+        logger.error(error)
+        return jsonify({"error": "An error occurred while fetching runtime statistics."}), 500
+
+
+@app.route('/db-query-cache/invalidate', methods=['POST'])
+def invalidate_db_query_cache():
+    """
+    Drops cached db_agent query results. Meant to be called by the data loading jobs.
+
+    Request body:
+        tables (list, optional): Tables that were reloaded; every result is dropped when omitted.
+        db_type (str, optional): Restrict the invalidation to a database type (e.g. 'snowflake_agent').
+
+    Returns:
+        tuple: A JSON response with the number of removed results (200 OK)
+            - Or a JSON error message (400 Bad Request / 500 Internal Server Error)
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        tables = data.get('tables')
+        db_type = data.get('db_type')
+        if tables is not None and not isinstance(tables, list):
+            return jsonify({"error": "tables must be a list of table names."}), 400
+
+        if tables:
+            removed = query_result_cache.invalidate_tables(tables, db_type)
+        else:
+            removed = query_result_cache.invalidate(db_type)
+        return jsonify({"message": "Query result cache invalidated", "removed": removed}), 200
+    except Exception as error:
+        logger.error(error)
+        return jsonify({"error": "An error occurred while invalidating the query result cache."}), 500
+
 # -----------------------------------------------------------------------------
 # SECTION: Application Entry Point
 # -----------------------------------------------------------------------------
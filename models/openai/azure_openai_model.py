@@ -7,6 +7,10 @@ It sets up the necessary API credentials, deployment parameters, and model confi
 such as temperature for output generation. The module leverages the `AzureChatOpenAI` class 
 from the `langchain_openai` library to interact with the Azure OpenAI service.
 
+Clients are shared through `llm_client_registry`: one `AzureChatOpenAI` instance (and HTTP
+connection pool) per (deployment, version, temperature), reloaded only when the configuration
+file changes. The loaders under `agents_store/*/models/openai/` use the same registry.
+
 """
 
 # -----------------------------------------------------------------------------
@@ -21,6 +25,7 @@ from dotenv import load_dotenv
 from langchain_openai import AzureChatOpenAI
 import yaml
 from utils.helper_functions import load_yaml
+from models.openai.llm_client_registry import LLMClientRegistry
 # -----------------------------------------------------------------------------
 # SECTION: Environment Setup
 # -----------------------------------------------------------------------------
@@ -55,14 +60,31 @@ def llm_model(deployment_name,version,temperature):
     return model
 
 
-def llm_config_loader():
-    file_path = os.path.join(os.getcwd(),r'models\openai\openai_config.yaml')
+def load_model_config(file_path):
+    """
+    Read the deployment name, version and temperature from a model configuration file.
+    """
     yaml_data = load_yaml(file_path)
 
     # Get the deployment name and version
-    deployment_name, version ,temperature= get_deployment_name_and_version(yaml_data)
-    model = llm_model(deployment_name,version,temperature)
-    return model
+    return get_deployment_name_and_version(yaml_data)
+
+
+# Process-wide registry of the Azure OpenAI clients
+llm_client_registry = LLMClientRegistry(llm_model, load_model_config)
+
+
+def llm_config_loader(file_path=None):
+    """
+    Return the shared Azure OpenAI client of the model configured in openai_config.yaml.
+
+    Args:
+        file_path (str, optional): Path of the model configuration file; defaults to
+            models/openai/openai_config.yaml.
+    """
+    if file_path is None:
+        file_path = os.path.join(os.getcwd(),r'models\openai\openai_config.yaml')
+    return llm_client_registry.get_client(file_path)
 
 
 
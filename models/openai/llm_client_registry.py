@@ -0,0 +1,130 @@
+"""
+Module Name: llm_client_registry.py
+
+Description:
+This module provides a process-wide registry of LLM clients. A client (and the HTTP connection
+pool it owns) is created once per (deployment, version, temperature) and reused by every chain,
+so TLS handshakes and connection setup are amortised across requests.
+
+Model configuration files are parsed once and re-read only when their modification time
+changes; a changed configuration maps to a new key and therefore to a new client, while clients
+of unchanged configurations keep their warm connections.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: LLM Client Registry
+# -----------------------------------------------------------------------------
+
+class LLMClientRegistry:
+    """
+    Thread-safe registry of LLM clients keyed by (deployment, version, temperature).
+
+    Args:
+        client_factory (Callable[[str, str, float], Any]): Creates a client from the deployment
+            name, API version and temperature.
+        config_loader (Callable[[str], Tuple[str, str, float]]): Reads the deployment name,
+            API version and temperature from a model configuration file.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[str, str, float], Any],
+        config_loader: Callable[[str], Tuple[str, str, float]]
+    ):
+        self._client_factory = client_factory
+        self._config_loader = config_loader
+        self._clients: Dict[Tuple[str, str, float], Any] = {}
+        self._configs: Dict[str, Tuple[Optional[int], Tuple[str, str, float]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.config_reloads = 0
+
+    def get_config(self, config_path: str) -> Tuple[str, str, float]:
+        """
+        Returns the (deployment, version, temperature) of a configuration file, re-reading the
+        file only when its modification time changed.
+        """
+        config_path = os.path.normpath(config_path)
+        try:
+            mtime = os.stat(config_path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        with self._lock:
+            cached = self._configs.get(config_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        model_config = self._config_loader(config_path)
+        with self._lock:
+            if cached is not None:
+                self.config_reloads += 1
+            self._configs[config_path] = (mtime, model_config)
+        logger.info(f"Loaded LLM configuration from {config_path}: {model_config}")
+        return model_config
+
+    def get_client(self, config_path: str) -> Any:
+        """
+        Returns the shared client of the model configured in a configuration file.
+        """
+        return self.get_client_for(*self.get_config(config_path))
+
+    def get_client_for(self, deployment_name: str, version: str, temperature: float) -> Any:
+        """
+        Returns the shared client of a (deployment, version, temperature), creating it on first use.
+        """
+        key = (deployment_name, version, temperature)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+            self.misses += 1
+            # Created under the lock so concurrent first requests share a single client
+            client = self._client_factory(deployment_name, version, temperature)
+            self._clients[key] = client
+        logger.info(f"Created LLM client for deployment {deployment_name}, version {version}, temperature {temperature}")
+        return client
+
+    def clear(self) -> None:
+        """
+        Drops every client and cached configuration.
+        """
+        with self._lock:
+            self._clients.clear()
+            self._configs.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the hit/miss counters and the keys of the registered clients.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "config_reloads": self.config_reloads,
+                "clients": [list(key) for key in self._clients]
+            }
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -2,15 +2,28 @@ import uuid
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from persistence.conversation_memory import conversation_memory
 from persistence.dao import DataAccessObject
 from persistence.schema import DatabaseSchema
 from models.azure_openai_model import model
 from persistence.database import DatabaseConnection
-from persistence.utils.utility_functions import generate_name
+from persistence.utils.utility_functions import generate_name, provisional_name
  
  
 # Get a logger instance for this module
 logger = logging.getLogger(__name__)
+
+# Create new threads with a provisional name and backfill the generated name in the background
+ASYNC_THREAD_NAMING = os.getenv("ASYNC_THREAD_NAMING", "false").lower() == "true"
+
+# Latest messages of a thread passed to the workflow as conversation history (0 for all)
+CONVERSATION_HISTORY_MAX_MESSAGES = int(os.getenv("CONVERSATION_HISTORY_MAX_MESSAGES", "20"))
+# Largest page of messages returned by retrieveconversation
+CONVERSATION_PAGE_MAX_SIZE = int(os.getenv("CONVERSATION_PAGE_MAX_SIZE", "500"))
+
+# Worker backfilling the generated thread names
+_naming_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thread-naming")
  
  
 class BusinessLogic:
@@ -28,43 +41,30 @@ class BusinessLogic:
  
     
     def chat_history(self, thread_id, query, summary, input_tokens_count, output_tokens_count):
-        data = self.dao.retrieve_data(thread_id)
-        data_list = json.loads(data)
- 
-        # Extract the content as a list
-        content_list = [item['content'] for item in data_list]
-        max_step = 0
-        if len(data_list)!=0:
-            max_step = max(item['step'] for item in data_list)+1
-        # print("list === > ", content_list)
         query = "HumanMessage="+query
-        content_list.append(query)
         uuid2 = uuid.uuid4()
         message_id = str(uuid2)
  
-        data = {
-            'thread_id': thread_id,
+        human_message = {
             'message_id': message_id,
             'content': query,
-            'step': max_step,
             'input_tokens': 0,
             'output_tokens': 0,
             'total_tokens': 0,
             'feedback':" "
         }
-        self.dao.insert_data(data)
         AIMessage = "AIMessage="+summary
-        data = {
-            'thread_id': thread_id,
+        ai_message = {
             'message_id': message_id,
             'content': AIMessage,
-            'step': max_step+1,
             'input_tokens': input_tokens_count,
             'output_tokens': output_tokens_count,
             'total_tokens': input_tokens_count + output_tokens_count,
             'feedback': ""
         }
-        self.dao.insert_data(data)
+        # Both messages are appended in one statement, the steps are computed by the database
+        self.dao.append_messages(thread_id, [human_message, ai_message])
+        conversation_memory.schedule_refresh(self.dao, thread_id, CONVERSATION_HISTORY_MAX_MESSAGES)
         # return output.content
         json_object = {"thread_id": thread_id, "content": summary}
         return json.dumps(json_object)
@@ -80,31 +80,53 @@ class BusinessLogic:
             logger.error(f"Failed to update chat history: {e}")
             raise e
  
-    # Retrieve chat history from Messages table
-    def retrieve_chat_conversation(self, thread_id):
+    # Retrieve chat history from Messages table, a page of `limit` messages before `before_step`
+    # when a limit is given
+    def retrieve_chat_conversation(self, thread_id, before_step=None, limit=None):
         try:
-            return json.loads(self.dao.retrieve_data(thread_id))
+            limit = self.page_limit(limit)
+            if before_step is not None:
+                before_step = int(before_step)
+            return self.dao.retrieve_messages(thread_id, before_step, limit)
         except Exception as e:
             logger.error(f"Failed to retrieve chat history: {e}")
             raise e
  
+    # page size of retrieveconversation, capped at CONVERSATION_PAGE_MAX_SIZE
+    @staticmethod
+    def page_limit(limit):
+        if limit is None:
+            return None
+        return max(1, min(int(limit), CONVERSATION_PAGE_MAX_SIZE))
+
     # insert new chat id and email id to user table
     def insert_user_chat_history(self, email_id, user_input):
         try:
             uuid1 = uuid.uuid4()
             thread_id = str(uuid1)
-            short_name = generate_name(user_input)
-            data = self.dao.insert_user_chat_history(email_id, thread_id, short_name)
+            if ASYNC_THREAD_NAMING:
+                short_name = provisional_name(user_input)
+                data = self.dao.insert_user_chat_history(email_id, thread_id, short_name)
+                _naming_executor.submit(self.backfill_short_name, thread_id, user_input)
+            else:
+                short_name = generate_name(user_input)
+                data = self.dao.insert_user_chat_history(email_id, thread_id, short_name)
             return thread_id, short_name
         except Exception as e:
             logger.error(f"Failed to insert user details: {e}")
             raise e
+
+    # replace the provisional name of a new thread with the generated one
+    def backfill_short_name(self, thread_id, user_input):
+        try:
+            self.dao.update_short_name(thread_id, generate_name(user_input))
+        except Exception as e:
+            logger.error(f"Failed to backfill the thread name: {e}")
  
     # retrieve the user chat session based on user email ID
     def retrieve_user_chat_history(self, email_id):
         try:
-            data = self.dao.retrieve_user_chat_history(email_id)
-            return json.loads(data)
+            return self.dao.retrieve_user_chat_history(email_id)
         except Exception as e:
             logger.error(f"Failed to retrieve user details: {e}")
             raise e
@@ -116,14 +138,12 @@ class BusinessLogic:
         except Exception as e:
             logger.error(f"Failed to update user feedback: {e}")
             raise e
-    # retrieve the user conversation history based on user thread ID
+    # retrieve the user conversation history based on user thread ID: the latest
+    # CONVERSATION_HISTORY_MAX_MESSAGES messages, preceded by the rolling summary of the older ones
     def retrieve_conversation_history(self, thread_id):
         try:
-            data = self.dao.retrieve_data(thread_id)
-            data_list = json.loads(data)
-            # Extract the content as a list
-            content_list = [item['content'] for item in data_list]
-            return json.loads(json.dumps(content_list))
+            data_list = self.dao.retrieve_messages(thread_id, limit=CONVERSATION_HISTORY_MAX_MESSAGES or None)
+            return conversation_memory.conversation_history(self.dao, thread_id, data_list)
         except Exception as e:
             logger.error(f"Failed to retrieve user details: {e}")
             raise e
@@ -153,6 +173,7 @@ class BusinessLogic:
         thread_id = None
         short_name = ""
         chat_conversation = None
+        next_before_step = None
         user_chat_history = None
         feedback = None
 
@@ -165,7 +186,11 @@ class BusinessLogic:
             conversation_history = self.retrieve_conversation_history(thread_id)
         elif func_name == "retrieveconversation":
             thread_id = data["thread_id"]
-            chat_conversation = self.retrieve_chat_conversation(thread_id)
+            limit = self.page_limit(data.get("limit"))
+            chat_conversation = self.retrieve_chat_conversation(thread_id, data.get("before_step"), limit)
+            # Cursor of the next (older) page when the page is full
+            if limit is not None and len(chat_conversation) == limit:
+                next_before_step = chat_conversation[0]["step"]
         elif func_name == "chathistory":
             email_id = data["user_details"]["user_mail"]
             user_chat_history = self.retrieve_user_chat_history(email_id)
@@ -179,7 +204,8 @@ class BusinessLogic:
             "thread_id": thread_id,
             "short_name": short_name,
             "chat_conversation": chat_conversation,
+            "next_before_step": next_before_step,
             "user_chat_history": user_chat_history,
             "feedback": feedback            
         }
-        return json.loads(json.dumps(response))
\ No newline at end of file
+        return response
\ No newline at end of file
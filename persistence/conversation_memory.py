@@ -0,0 +1,160 @@
+"""
+Rolling conversation-summary memory of the threads.
+
+The conversation history passed to the workflow is the stored summary of a thread followed by
+its latest CONVERSATION_HISTORY_MAX_MESSAGES messages. The messages in between, older than the
+recent window and newer than the summary checkpoint, are passed verbatim until the history
+exceeds MAXIMUM_CONVERSATION_HISTORY_LENGTH tokens; they are then folded into the summary by
+the conversation summary agent, which only sees the previous summary and these new messages.
+Summaries are refreshed in the background once the messages of a turn are saved, so the summary
+agent never runs on the request path and its tokens are only reported on /runtime-stats.
+The summary and the step of the last message it covers are stored in CONVERSATION_SUMMARIES
+(migration 5 of persistence/migrations.py), so the prompt size stays bounded however long the
+thread gets.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from agents.core_engine_agents.conversation_summary_agent import conversation_summary_agent
+from utils.token_budget import count_tokens
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+CONVERSATION_MEMORY_ENABLED = os.getenv("CONVERSATION_MEMORY_ENABLED", "true").lower() == "true"
+# Tokens of conversation history above which the older messages are summarized
+MAXIMUM_CONVERSATION_HISTORY_LENGTH = int(os.getenv("MAXIMUM_CONVERSATION_HISTORY_LENGTH", "4000"))
+# Messages folded into the summary per summary agent call
+CONVERSATION_SUMMARY_BATCH_MESSAGES = int(os.getenv("CONVERSATION_SUMMARY_BATCH_MESSAGES", "100"))
+# Threads summarized concurrently in the background
+CONVERSATION_SUMMARY_WORKERS = int(os.getenv("CONVERSATION_SUMMARY_WORKERS", "2"))
+
+# Prefix of the summary entry of the conversation history, like HumanMessage= and AIMessage=
+SUMMARY_PREFIX = "ConversationSummary="
+
+
+class ConversationMemory:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Summaries are refreshed after the response of a turn is saved, off the request path
+        self._executor = ThreadPoolExecutor(max_workers=CONVERSATION_SUMMARY_WORKERS, thread_name_prefix="conversation-memory")
+        self._metrics = {
+            "histories": 0,
+            "summarizations": 0,
+            "summarized_messages": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "errors": 0
+        }
+
+    def conversation_history(self, dao, thread_id, recent_messages):
+        """
+        Returns the conversation history of a thread as a list of message contents: the rolling
+        summary, the messages not covered by it yet and the recent messages. The summary agent
+        is not called here; the summary is refreshed by `schedule_refresh`.
+
+        Args:
+            dao (DataAccessObject): Access to the thread messages and summaries.
+            thread_id (str): The thread.
+            recent_messages (list): The latest messages of the thread, in step order, which are
+                always passed verbatim.
+        """
+        if not CONVERSATION_MEMORY_ENABLED or not recent_messages:
+            return [item['content'] for item in recent_messages]
+        self._count("histories")
+
+        try:
+            summary, pending, recent = self._load(dao, thread_id, recent_messages)
+        except Exception as e:
+            # e.g. CONVERSATION_SUMMARIES does not exist until the migrations are applied
+            logger.warning(f"Conversation memory unavailable, using the recent messages only: {e}")
+            self._count("errors")
+            return [item['content'] for item in recent_messages]
+
+        history = [SUMMARY_PREFIX + summary] if summary else []
+        return history + [item['content'] for item in pending] + [item['content'] for item in recent]
+
+    def schedule_refresh(self, dao, thread_id, recent_window):
+        """
+        Refreshes the summary of a thread in the background, typically once the messages of a
+        turn are saved, so its tokens and latency are not added to any request.
+        """
+        if CONVERSATION_MEMORY_ENABLED and recent_window:
+            self._executor.submit(self.refresh, dao, thread_id, recent_window)
+
+    def refresh(self, dao, thread_id, recent_window):
+        """
+        Folds the messages added since the last checkpoint into the summary of a thread when its
+        conversation history exceeds MAXIMUM_CONVERSATION_HISTORY_LENGTH tokens.
+
+        Args:
+            dao (DataAccessObject): Access to the thread messages and summaries.
+            thread_id (str): The thread.
+            recent_window (int): Number of latest messages always passed verbatim.
+        """
+        try:
+            recent_messages = dao.retrieve_messages(thread_id, limit=recent_window)
+            if not recent_messages:
+                return
+            summary, pending, recent = self._load(dao, thread_id, recent_messages)
+            history_tokens = (
+                count_tokens(summary or "")
+                + sum(count_tokens(item['content']) for item in pending)
+                + sum(count_tokens(item['content']) for item in recent)
+            )
+            if pending and history_tokens > MAXIMUM_CONVERSATION_HISTORY_LENGTH:
+                self.summarize(dao, thread_id, summary, pending)
+        except Exception as e:
+            logger.error(f"Failed to summarize the conversation of thread {thread_id}: {e}")
+            self._count("errors")
+
+    @staticmethod
+    def _load(dao, thread_id, recent_messages):
+        # (summary, messages between the checkpoint and the recent window, recent messages not
+        # covered by the summary, e.g. after the recent window was enlarged)
+        summary, last_step = dao.retrieve_conversation_summary(thread_id)
+        pending = dao.retrieve_messages(thread_id, before_step=recent_messages[0]['step'], after_step=last_step)
+        recent = [item for item in recent_messages if last_step is None or item['step'] > last_step]
+        return summary, pending, recent
+
+    def summarize(self, dao, thread_id, summary, messages):
+        """
+        Folds messages into the rolling summary of a thread, in batches of
+        CONVERSATION_SUMMARY_BATCH_MESSAGES, saving a checkpoint after each batch.
+
+        Returns:
+            str: The updated summary.
+        """
+        for start in range(0, len(messages), CONVERSATION_SUMMARY_BATCH_MESSAGES):
+            batch = messages[start:start + CONVERSATION_SUMMARY_BATCH_MESSAGES]
+            conversation = [[{"conversation_summary": summary}]] if summary else []
+            conversation.append([{"step": item['step'], "content": item['content']} for item in batch])
+            summary, input_tokens_count, output_tokens_count = conversation_summary_agent(conversation)
+            dao.save_conversation_summary(thread_id, summary, batch[-1]['step'])
+            with self._lock:
+                self._metrics["summarizations"] += 1
+                self._metrics["summarized_messages"] += len(batch)
+                self._metrics["input_tokens"] += input_tokens_count
+                self._metrics["output_tokens"] += output_tokens_count
+            logger.info(f"Summarized {len(batch)} messages of thread {thread_id} up to step {batch[-1]['step']}")
+        return summary
+
+    def _count(self, metric):
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._metrics)
+        stats["enabled"] = CONVERSATION_MEMORY_ENABLED
+        return stats
+
+
+# Process-wide conversation memory shared by every BusinessLogic
+conversation_memory = ConversationMemory()
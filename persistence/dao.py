@@ -25,13 +25,75 @@ class DataAccessObject:
         )
         self.db_conn.execute_query(query, params)
 
+    def append_messages(self, thread_id, messages):
+        # Inserts the messages of a turn in a single statement. The steps continue after the
+        # last step of the thread and are computed by the database, so appending does not
+        # read the history of the thread. A transaction-scoped advisory lock per thread
+        # serializes concurrent appends, so they cannot compute the same steps: the INSERT
+        # runs after the lock is granted and sees the rows of the append it waited for.
+        values = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(messages))
+        query = f"""
+            INSERT INTO MESSAGES (THREAD_ID, MESSAGE_ID, CONTENT, STEP, INPUT_TOKENS, OUTPUT_TOKENS, TOTAL_TOKENS, FEEDBACK)
+            SELECT %s, v.message_id, v.content, base.step + v.step_offset, v.input_tokens, v.output_tokens, v.total_tokens, v.feedback
+            FROM (SELECT COALESCE(MAX(STEP) + 1, 0) AS step FROM MESSAGES WHERE THREAD_ID = %s) AS base
+            CROSS JOIN (VALUES {values}) AS v(message_id, content, step_offset, input_tokens, output_tokens, total_tokens, feedback);
+        """
+        params = [thread_id, thread_id]
+        for step_offset, message in enumerate(messages):
+            params.extend((
+                message['message_id'],
+                message['content'],
+                step_offset,
+                message['input_tokens'],
+                message['output_tokens'],
+                message['total_tokens'],
+                message['feedback']
+            ))
+        self.db_conn.execute_transaction([
+            ("SELECT pg_advisory_xact_lock(hashtext(%s));", (thread_id,)),
+            (query, tuple(params))
+        ])
+
     def retrieve_data(self, thread_id):
-        query = "SELECT message_id, content, step FROM MESSAGES WHERE messages.thread_id =%s;"
-        params = (thread_id,)
-        rows = self.db_conn.fetch_data(query, params)
-        content_list = [{"message_id": row[0], "content": row[1], "step": row[2]} for row in rows]
-        return json.dumps(content_list, indent=4)
+        return self.retrieve_messages(thread_id)
 
+    def retrieve_messages(self, thread_id, before_step=None, limit=None, after_step=None):
+        # Keyset pagination on the (THREAD_ID, STEP) index: the `limit` messages preceding
+        # `before_step` (the latest ones without it) and following `after_step`, in step order
+        query = "SELECT message_id, content, step FROM MESSAGES WHERE messages.thread_id = %s"
+        params = [thread_id]
+        if after_step is not None:
+            query += " AND step > %s"
+            params.append(after_step)
+        if before_step is not None:
+            query += " AND step < %s"
+            params.append(before_step)
+        if limit is not None:
+            query += " ORDER BY step DESC LIMIT %s;"
+            params.append(limit)
+            rows = self.db_conn.fetch_data(query, tuple(params))[::-1]
+        else:
+            query += " ORDER BY step;"
+            rows = self.db_conn.fetch_data(query, tuple(params))
+        return [{"message_id": row[0], "content": row[1], "step": row[2]} for row in rows]
+
+
+    def retrieve_conversation_summary(self, thread_id):
+        query = "SELECT SUMMARY, LAST_STEP FROM CONVERSATION_SUMMARIES WHERE THREAD_ID = %s;"
+        rows = self.db_conn.fetch_data(query, (thread_id,))
+        return (rows[0][0], rows[0][1]) if rows else (None, None)
+
+    def save_conversation_summary(self, thread_id, summary, last_step):
+        # A checkpoint only replaces an older one, so concurrent summarizations cannot move it back
+        query = """
+            INSERT INTO CONVERSATION_SUMMARIES (THREAD_ID, SUMMARY, LAST_STEP)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (THREAD_ID) DO UPDATE
+            SET SUMMARY = EXCLUDED.SUMMARY, LAST_STEP = EXCLUDED.LAST_STEP, UPDATED_AT = CURRENT_TIMESTAMP
+            WHERE CONVERSATION_SUMMARIES.LAST_STEP < EXCLUDED.LAST_STEP
+        """
+        params = (thread_id, summary, last_step)
+        self.db_conn.execute_query(query, params)
 
     def insert_user_chat_history(self, email_id, thread_id, short_name):
         query = """
@@ -41,12 +103,20 @@ class DataAccessObject:
         params = (email_id, thread_id, short_name)
         self.db_conn.execute_query(query, params)
 
+    def update_short_name(self, thread_id, short_name):
+        query = """
+            UPDATE USER_CHAT_HISTORY
+            SET short_name = %s
+            WHERE thread_id = %s
+        """
+        params = (short_name, thread_id)
+        self.db_conn.execute_query(query, params)
+
     def retrieve_user_chat_history(self, email_id):
-        query = "SELECT THREAD_ID, SHORT_NAME FROM USER_CHAT_HISTORY WHERE USER_CHAT_HISTORY.EMAIL_ID=%s;"
+        query = "SELECT THREAD_ID, SHORT_NAME FROM USER_CHAT_HISTORY WHERE USER_CHAT_HISTORY.EMAIL_ID=%s ORDER BY SENT_AT DESC;"
         params = (email_id,)
         rows = self.db_conn.fetch_data(query, params)
-        content_list = [{"thread_id": row[0], "short_name": row[1]} for row in rows]
-        return json.dumps(content_list, indent=4)
+        return [{"thread_id": row[0], "short_name": row[1]} for row in rows]
 
     def update_feedback(self, message_id, feedback):
         
@@ -1,72 +1,160 @@
 import psycopg2
 import os
 import logging
- 
+import threading
+
 from dotenv import load_dotenv
- 
+
+from utils.connection_pool import ConnectionPool
+
 # Get a logger instance for this module
 logger = logging.getLogger(__name__)
- 
+
 load_dotenv()
- 
+
 # Retrieve environment variables
 POSTGRES_HOST = os.getenv("POSTGRES_HOST")
 POSTGRES_DATABASE = os.getenv("POSTGRES_DATABASE")
 POSTGRES_USERNAME = os.getenv("POSTGRES_USERNAME")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
- 
- 
+
+# Connection pool configuration
+POSTGRES_POOL_MIN_SIZE = int(os.getenv("POSTGRES_POOL_MIN_SIZE", "1"))
+POSTGRES_POOL_MAX_SIZE = int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10"))
+POSTGRES_POOL_IDLE_TIMEOUT = float(os.getenv("POSTGRES_POOL_IDLE_TIMEOUT", "300"))
+POSTGRES_POOL_ACQUIRE_TIMEOUT = float(os.getenv("POSTGRES_POOL_ACQUIRE_TIMEOUT", "30"))
+POSTGRES_POOL_HEALTH_CHECK_AFTER = float(os.getenv("POSTGRES_POOL_HEALTH_CHECK_AFTER", "30"))
+
+
+# Pools shared by every DatabaseConnection, keyed by connection parameters
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _health_check(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT 1")
+        cur.fetchone()
+    finally:
+        cur.close()
+    # Do not leave the health check's implicit transaction open
+    conn.rollback()
+
+
+def get_connection_pool(host, database, user, password, connect=None):
+    """
+    Returns the shared connection pool for the given connection parameters.
+
+    Args:
+        host, database, user, password: PostgreSQL connection parameters.
+        connect (callable, optional): Factory opening a connection; defaults to psycopg2.connect.
+            Allows running the pool against a stand-in connection.
+    """
+    key = (host, database, user)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            connect = connect or psycopg2.connect
+            pool = ConnectionPool(
+                connect=lambda: connect(host=host, database=database, user=user, password=password),
+                close=lambda conn: conn.close(),
+                health_check=_health_check,
+                reset=lambda conn: conn.rollback(),
+                is_closed=lambda conn: conn.closed != 0,
+                min_size=POSTGRES_POOL_MIN_SIZE,
+                max_size=POSTGRES_POOL_MAX_SIZE,
+                idle_timeout=POSTGRES_POOL_IDLE_TIMEOUT,
+                health_check_after=POSTGRES_POOL_HEALTH_CHECK_AFTER,
+                acquire_timeout=POSTGRES_POOL_ACQUIRE_TIMEOUT,
+                name=f"postgres:{host}/{database}"
+            )
+            _pools[key] = pool
+    return pool
+
+
+def warm_up_connection_pool():
+    """
+    Opens the POSTGRES_POOL_MIN_SIZE connections of the persistence pool.
+    """
+    get_connection_pool(POSTGRES_HOST, POSTGRES_DATABASE, POSTGRES_USERNAME, POSTGRES_PASSWORD).warm_up()
+
+
+def get_pool_stats():
+    """
+    Returns the metrics of every persistence connection pool.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
 class DatabaseConnection:
-    def __init__(self, host, database, user, password):
+    def __init__(self, host, database, user, password, connect=None):
         self.host = host
         self.database = database
         self.user = user
         self.password = password
-        self.conn = None
- 
+        self.connect = connect
+        self.pool = None
+
     def establish_connection(self):
-        try:
-            self.conn = psycopg2.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password
-            )
-            logger.info("Connection established successfully")
-        except psycopg2.Error as e:
-            logger.error(f"Failed to establish connection: {e}")
-            raise e
- 
+        # Connections are borrowed from the shared pool per query and returned right after
+        self.pool = get_connection_pool(self.host, self.database, self.user, self.password, self.connect)
+        logger.info("Connection pool ready")
+
     def close_connection(self):
-        try:
-            self.conn.close()
-            logger.info("Connection closed successfully")
-        except psycopg2.Error as e:
-            logger.error(f"Failed to close connection: {e}")
-            raise e
- 
+        # Nothing is held between queries; the pooled connections stay open for reuse
+        self.pool = None
+        logger.info("Connection released successfully")
+
     def execute_query(self, query, params=None):
         try:
-            cur = self.conn.cursor()
-            if params:
-                cur.execute(query, params)
-            else:
-                cur.execute(query)
-            self.conn.commit()
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                if params:
+                    cur.execute(query, params)
+                else:
+                    cur.execute(query)
+                conn.commit()
+                cur.close()
             logger.info("Query executed successfully")
         except psycopg2.Error as e:
             logger.error(f"Failed to execute query: {e}")
             raise e
- 
+
+    def execute_transaction(self, statements):
+        # Runs (query, params) statements on one connection and commits them together
+        try:
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                try:
+                    for query, params in statements:
+                        cur.execute(query, params)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    cur.close()
+            logger.info("Transaction executed successfully")
+        except psycopg2.Error as e:
+            logger.error(f"Failed to execute transaction: {e}")
+            raise e
+
     def fetch_data(self, query, params=None):
         try:
-            cur = self.conn.cursor()
-            if params:
-                cur.execute(query, params)
-            else:
-                cur.execute(query)
-            rows = cur.fetchall()
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                if params:
+                    cur.execute(query, params)
+                else:
+                    cur.execute(query)
+                rows = cur.fetchall()
+                cur.close()
+                # End the read transaction so the connection goes back to the pool idle
+                conn.rollback()
             return rows
         except psycopg2.Error as e:
             logger.error(f"Failed to fetch data: {e}")
-            raise e
\ No newline at end of file
+            raise e
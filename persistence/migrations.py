@@ -0,0 +1,285 @@
+"""
+Versioned schema migrations of the conversation tables (MESSAGES, USER_CHAT_HISTORY).
+
+Each migration has a version, a name and the statements applying it. The applied versions are
+recorded in SCHEMA_MIGRATIONS; pending migrations are applied in version order, each in its own
+transaction, under an advisory lock so that concurrent runners do not apply them twice.
+
+Optional migrations only run when their condition holds, e.g. the monthly partitioning of
+MESSAGES with MESSAGES_PARTITIONING=monthly. Partitions for the coming months are created on
+every run, so the runner should be executed at deploy time or on a schedule:
+
+    python -m persistence.migrations upgrade
+    python -m persistence.migrations status
+"""
+import argparse
+import logging
+import os
+from datetime import date
+
+from dotenv import load_dotenv
+
+from persistence.database import DatabaseConnection
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# "none" (default) or "monthly" to partition MESSAGES by created_at
+MESSAGES_PARTITIONING = os.getenv("MESSAGES_PARTITIONING", "none").lower()
+# Number of future monthly partitions kept ahead of the current month
+MESSAGES_PARTITION_MONTHS_AHEAD = int(os.getenv("MESSAGES_PARTITION_MONTHS_AHEAD", "3"))
+# Apply the pending migrations when the application starts
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "false").lower() == "true"
+
+# Key of the advisory lock serializing migration runners
+MIGRATION_LOCK_KEY = 7201453
+# Version of the migration partitioning MESSAGES
+PARTITION_MIGRATION_VERSION = 4
+
+
+class Migration:
+    def __init__(self, version, name, statements, condition=None):
+        self.version = version
+        self.name = name
+        # A list of statements, or a function returning it when they depend on the run date
+        self.statements = statements
+        # Optional migrations are skipped, and stay pending, while their condition is false
+        self.condition = condition
+
+    def enabled(self):
+        return self.condition is None or self.condition()
+
+    def resolve_statements(self):
+        return self.statements() if callable(self.statements) else self.statements
+
+
+def month_start(day, months):
+    # First day of the month `months` after the month of `day`
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_statements(today=None, months_ahead=MESSAGES_PARTITION_MONTHS_AHEAD):
+    """
+    Returns the statements creating the monthly MESSAGES partitions of the current month and of
+    the next `months_ahead` months.
+    """
+    today = today or date.today()
+    statements = []
+    for months in range(months_ahead + 1):
+        start = month_start(today, months)
+        end = month_start(today, months + 1)
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS MESSAGES_{start:%Y_%m} PARTITION OF MESSAGES "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    return statements
+
+
+def partition_messages_statements():
+    # The partitions of the current and coming months exist before the rows are copied, so that
+    # only older rows go to the default partition and later months can still be attached
+    return [
+        "ALTER TABLE MESSAGES RENAME TO MESSAGES_UNPARTITIONED",
+        # The partition key has to be part of the primary key of a partitioned table
+        """
+        CREATE TABLE MESSAGES (
+            THREAD_ID VARCHAR(255) NOT NULL,
+            MESSAGE_ID VARCHAR(255) NOT NULL,
+            CONTENT TEXT,
+            STEP int4 NOT NULL,
+            INPUT_TOKENS int4,
+            OUTPUT_TOKENS int4,
+            TOTAL_TOKENS int4,
+            FEEDBACK VARCHAR(255),
+            CREATED_AT TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT MESSAGES_PARTITIONED_PKEY PRIMARY KEY (MESSAGE_ID, STEP, CREATED_AT)
+        ) PARTITION BY RANGE (CREATED_AT)
+        """,
+        # Rows older than the monthly partitions land in the default partition
+        "CREATE TABLE MESSAGES_DEFAULT PARTITION OF MESSAGES DEFAULT",
+    ] + partition_statements() + [
+        "INSERT INTO MESSAGES SELECT THREAD_ID, MESSAGE_ID, CONTENT, STEP, INPUT_TOKENS, OUTPUT_TOKENS, "
+        "TOTAL_TOKENS, FEEDBACK, CREATED_AT FROM MESSAGES_UNPARTITIONED",
+        "DROP TABLE MESSAGES_UNPARTITIONED",
+        "CREATE INDEX IF NOT EXISTS IDX_MESSAGES_THREAD_ID_STEP ON MESSAGES (THREAD_ID, STEP)",
+    ]
+
+
+MIGRATIONS = [
+    Migration(1, "create conversation tables", [
+        """
+        CREATE TABLE IF NOT EXISTS MESSAGES (
+            THREAD_ID VARCHAR(255) NOT NULL,
+            MESSAGE_ID VARCHAR(255) NOT NULL,
+            CONTENT TEXT,
+            STEP int4,
+            INPUT_TOKENS int4,
+            OUTPUT_TOKENS int4,
+            TOTAL_TOKENS int4,
+            FEEDBACK VARCHAR(255)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS USER_CHAT_HISTORY (
+            EMAIL_ID VARCHAR(255),
+            THREAD_ID VARCHAR(255) NOT NULL UNIQUE,
+            SHORT_NAME VARCHAR(255),
+            SENT_AT TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    Migration(2, "add created_at to messages", [
+        "ALTER TABLE MESSAGES ADD COLUMN IF NOT EXISTS CREATED_AT TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP",
+    ]),
+    Migration(3, "add message primary key and lookup indexes", [
+        # The Human and AI messages of a turn share their message id and differ by step
+        "UPDATE MESSAGES SET STEP = 0 WHERE STEP IS NULL",
+        "ALTER TABLE MESSAGES ADD CONSTRAINT MESSAGES_PKEY PRIMARY KEY (MESSAGE_ID, STEP)",
+        # Thread reads, the MAX(STEP) of appends and keyset pagination
+        "CREATE INDEX IF NOT EXISTS IDX_MESSAGES_THREAD_ID_STEP ON MESSAGES (THREAD_ID, STEP)",
+        # Chat history of a user, newest first
+        "CREATE INDEX IF NOT EXISTS IDX_USER_CHAT_HISTORY_EMAIL_ID_SENT_AT ON USER_CHAT_HISTORY (EMAIL_ID, SENT_AT)",
+    ]),
+    Migration(PARTITION_MIGRATION_VERSION, "partition messages by month", partition_messages_statements,
+              condition=lambda: MESSAGES_PARTITIONING == "monthly"),
+    Migration(5, "create conversation summaries", [
+        # Rolling summary of a thread, covering its messages up to LAST_STEP
+        """
+        CREATE TABLE IF NOT EXISTS CONVERSATION_SUMMARIES (
+            THREAD_ID VARCHAR(255) PRIMARY KEY,
+            SUMMARY TEXT NOT NULL,
+            LAST_STEP int4 NOT NULL,
+            UPDATED_AT TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+]
+
+
+class MigrationRunner:
+    def __init__(self, db_conn, migrations=MIGRATIONS):
+        self.db_conn = db_conn
+        self.migrations = sorted(migrations, key=lambda migration: migration.version)
+
+    def ensure_version_table(self):
+        self.db_conn.execute_query("""
+            CREATE TABLE IF NOT EXISTS SCHEMA_MIGRATIONS (
+                VERSION int4 PRIMARY KEY,
+                NAME VARCHAR(255) NOT NULL,
+                APPLIED_AT TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    def applied_versions(self):
+        self.ensure_version_table()
+        rows = self.db_conn.fetch_data("SELECT VERSION FROM SCHEMA_MIGRATIONS;")
+        return {row[0] for row in rows}
+
+    def status(self):
+        """
+        Returns (version, name, state) per migration, state being applied, pending or skipped.
+        """
+        applied = self.applied_versions()
+        return [
+            (migration.version, migration.name,
+             "applied" if migration.version in applied else "pending" if migration.enabled() else "skipped")
+            for migration in self.migrations
+        ]
+
+    def upgrade(self, target=None):
+        """
+        Applies the pending migrations up to the target version (all by default) and creates the
+        upcoming monthly partitions when MESSAGES is partitioned.
+
+        Returns:
+            list: The versions applied by this run.
+        """
+        applied_now = []
+        for migration in self.migrations:
+            if target is not None and migration.version > target:
+                break
+            if not migration.enabled():
+                continue
+            if self.apply(migration):
+                applied_now.append(migration.version)
+
+        if MESSAGES_PARTITIONING == "monthly" and PARTITION_MIGRATION_VERSION in self.applied_versions():
+            for statement in partition_statements():
+                self.db_conn.execute_query(statement)
+        return applied_now
+
+    def apply(self, migration):
+        # The statements and the version row are committed together; the advisory lock makes
+        # a concurrent runner wait and then see the migration as applied
+        with self.db_conn.pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+                cur.execute("SELECT 1 FROM SCHEMA_MIGRATIONS WHERE VERSION = %s", (migration.version,))
+                if cur.fetchone():
+                    conn.rollback()
+                    return False
+                for statement in migration.resolve_statements():
+                    cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO SCHEMA_MIGRATIONS (VERSION, NAME) VALUES (%s, %s)",
+                    (migration.version, migration.name)
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Failed to apply migration {migration.version} ({migration.name}): {e}")
+                raise e
+            finally:
+                cur.close()
+        logger.info(f"Applied migration {migration.version} ({migration.name})")
+        return True
+
+
+def connect_from_env():
+    db_conn = DatabaseConnection(
+        host=os.getenv("POSTGRES_HOST"),
+        database=os.getenv("POSTGRES_DATABASE"),
+        user=os.getenv("POSTGRES_USERNAME"),
+        password=os.getenv("POSTGRES_PASSWORD")
+    )
+    db_conn.establish_connection()
+    return db_conn
+
+
+def run_startup_migrations():
+    """
+    Applies the pending migrations when RUN_MIGRATIONS_ON_STARTUP is enabled.
+    """
+    if not RUN_MIGRATIONS_ON_STARTUP:
+        return
+    runner = MigrationRunner(connect_from_env())
+    runner.ensure_version_table()
+    applied = runner.upgrade()
+    logger.info(f"Schema migrations applied on startup: {applied or 'none'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the conversation schema migrations.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade", help="Apply the pending migrations.")
+    upgrade_parser.add_argument("--target", type=int, default=None, help="Last version to apply.")
+    subparsers.add_parser("status", help="List the migrations and their state.")
+    args = parser.parse_args(argv)
+
+    runner = MigrationRunner(connect_from_env())
+    runner.ensure_version_table()
+    if args.command == "upgrade":
+        applied = runner.upgrade(args.target)
+        print(f"Applied migrations: {applied or 'none'}")
+    else:
+        for version, name, state in runner.status():
+            print(f"{version:>4}  {state:<8}  {name}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,6 +1,8 @@
 from persistence.database import DatabaseConnection
 
 class DatabaseSchema:
+    # The conversation tables are managed by the versioned migrations of persistence/migrations.py;
+    # these statements create the original, unindexed schema (migration 1)
     def __init__(self, db_conn):
         self.db_conn = db_conn
 
@@ -0,0 +1,129 @@
+"""
+Benchmark of the conversation lookups before and after the schema migrations.
+
+Loads MESSAGES and USER_CHAT_HISTORY with synthetic rows in a scratch schema, times the
+lookups of DataAccessObject (thread messages, chat history of a user, feedback update, append
+of a turn) on the original schema, applies the migrations adding the primary key, created_at
+and the indexes, and times them again. The scratch schema is dropped afterwards.
+
+    python -m persistence.schema_benchmark --rows 10000000
+"""
+import argparse
+import logging
+import random
+import statistics
+import time
+
+from persistence.migrations import MIGRATIONS, connect_from_env
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+BENCHMARK_SCHEMA = "schema_benchmark"
+# Messages per thread and threads per user of the synthetic data
+MESSAGES_PER_THREAD = 20
+THREADS_PER_USER = 10
+
+# The queries of DataAccessObject, as issued by the DAO
+LOOKUPS = {
+    "retrieve_data": (
+        "SELECT message_id, content, step FROM MESSAGES WHERE messages.thread_id = %s ORDER BY step;",
+        lambda thread, user: (f"thread-{thread}",)
+    ),
+    "retrieve_user_chat_history": (
+        "SELECT THREAD_ID, SHORT_NAME FROM USER_CHAT_HISTORY WHERE USER_CHAT_HISTORY.EMAIL_ID=%s ORDER BY SENT_AT DESC;",
+        lambda thread, user: (f"user-{user}@example.com",)
+    ),
+    "retrieve_recent_messages": (
+        "SELECT message_id, content, step FROM MESSAGES WHERE messages.thread_id = %s ORDER BY step DESC LIMIT %s;",
+        lambda thread, user: (f"thread-{thread}", MESSAGES_PER_THREAD // 2)
+    ),
+    "update_feedback": (
+        "UPDATE messages SET feedback = %s WHERE message_id = %s",
+        lambda thread, user: ("benchmark", f"message-{thread}-0")
+    ),
+    "append_step": (
+        "SELECT COALESCE(MAX(STEP) + 1, 0) FROM MESSAGES WHERE THREAD_ID = %s",
+        lambda thread, user: (f"thread-{thread}",)
+    ),
+}
+
+
+def load_data(cur, rows):
+    threads = max(rows // MESSAGES_PER_THREAD, 1)
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {BENCHMARK_SCHEMA}")
+    cur.execute(f"SET search_path TO {BENCHMARK_SCHEMA}")
+    for statement in MIGRATIONS[0].resolve_statements():
+        cur.execute(statement)
+    cur.execute("""
+        INSERT INTO MESSAGES (THREAD_ID, MESSAGE_ID, CONTENT, STEP, INPUT_TOKENS, OUTPUT_TOKENS, TOTAL_TOKENS, FEEDBACK)
+        SELECT 'thread-' || (n / %s), 'message-' || (n / %s) || '-' || (n %% %s / 2), repeat('x', 200),
+               n %% %s, 100, 100, 200, ''
+        FROM generate_series(0, %s - 1) AS n
+    """, (MESSAGES_PER_THREAD, MESSAGES_PER_THREAD, MESSAGES_PER_THREAD, MESSAGES_PER_THREAD, rows))
+    cur.execute("""
+        INSERT INTO USER_CHAT_HISTORY (EMAIL_ID, THREAD_ID, SHORT_NAME, SENT_AT)
+        SELECT 'user-' || (n / %s) || '@example.com', 'thread-' || n, 'Benchmark Thread',
+               CURRENT_TIMESTAMP - (n || ' minutes')::interval
+        FROM generate_series(0, %s - 1) AS n
+    """, (THREADS_PER_USER, threads))
+    cur.execute("ANALYZE")
+    return threads
+
+
+def time_lookups(cur, threads, samples):
+    timings = {}
+    for name, (query, params) in LOOKUPS.items():
+        durations = []
+        for _ in range(samples):
+            thread = random.randrange(threads)
+            started = time.perf_counter()
+            cur.execute(query, params(thread, thread // THREADS_PER_USER))
+            if cur.description is not None:
+                cur.fetchall()
+            durations.append((time.perf_counter() - started) * 1000)
+        durations.sort()
+        timings[name] = (statistics.median(durations), durations[int(len(durations) * 0.95) - 1])
+    return timings
+
+
+def run_benchmark(rows, samples):
+    db_conn = connect_from_env()
+    with db_conn.pool.connection() as conn:
+        conn.autocommit = True
+        cur = conn.cursor()
+        try:
+            logger.info(f"Loading {rows} messages into {BENCHMARK_SCHEMA}")
+            threads = load_data(cur, rows)
+            before = time_lookups(cur, threads, samples)
+            # Only the unconditional migrations; partitioning does not change the lookups
+            for migration in MIGRATIONS[1:]:
+                if migration.condition is None:
+                    for statement in migration.resolve_statements():
+                        cur.execute(statement)
+            cur.execute("ANALYZE")
+            after = time_lookups(cur, threads, samples)
+        finally:
+            cur.execute(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE")
+            cur.execute("RESET search_path")
+            cur.close()
+            conn.autocommit = False
+    return before, after
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the conversation lookups before and after the migrations.")
+    parser.add_argument("--rows", type=int, default=10_000_000, help="Number of messages to load.")
+    parser.add_argument("--samples", type=int, default=200, help="Lookups timed per query.")
+    args = parser.parse_args(argv)
+
+    before, after = run_benchmark(args.rows, args.samples)
+    print(f"{'lookup':<28}{'p50 before':>12}{'p95 before':>12}{'p50 after':>12}{'p95 after':>12}  (ms, {args.rows} rows)")
+    for name in LOOKUPS:
+        print(f"{name:<28}{before[name][0]:>12.2f}{before[name][1]:>12.2f}{after[name][0]:>12.2f}{after[name][1]:>12.2f}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,19 +1,87 @@
-import spacy
+import logging
+import os
+import re
+import threading
+
+from dotenv import load_dotenv
+
+try:
+    import spacy
+    from spacy.lang.en.stop_words import STOP_WORDS as SPACY_STOP_WORDS
+except ImportError:  # spaCy is optional, the pure-Python tokenizer is used without it
+    spacy = None
+    SPACY_STOP_WORDS = None
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# "spacy" (default) or "python" to name threads without spaCy
+THREAD_NAME_ENGINE = os.getenv("THREAD_NAME_ENGINE", "spacy").lower()
+
+# Stop words of the pure-Python fallback, a compact subset of spaCy's English list
+FALLBACK_STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each either else ever every few
+for from further get give go had has have having he her here hers herself him himself his how i
+if in into is it its itself just me more most much my myself neither no nor not now of off on once
+only or other our ours ourselves out over own please same say says she should show so some such
+tell than that the their theirs them themselves then there these they this those through to too
+under until up upon us very was we were what when where whether which while who whom whose why
+will with within without would yet you your yours yourself yourselves
+""".split())
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """
+    Returns the shared spaCy pipeline used to name threads, created on first use.
+
+    Naming only needs the tokenizer and the lexical stop-word and punctuation flags, which are
+    language defaults, so a blank English pipeline is used instead of loading the weights of
+    en_core_web_sm on every request.
+    """
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                _nlp = spacy.blank("en")
+                logger.info("Loaded the spaCy tokenizer for thread names")
+    return _nlp
+
+
+def preload_name_generator():
+    """
+    Creates the shared spaCy pipeline ahead of the first new chat.
+    """
+    if spacy is not None and THREAD_NAME_ENGINE == "spacy":
+        get_nlp()
+
+
+def tokenize_question(question):
+    """
+    Splits a question into (token, is meaningful) pairs: meaningful tokens are neither stop
+    words nor punctuation.
+    """
+    if spacy is not None and THREAD_NAME_ENGINE == "spacy":
+        return [(token.text, not token.is_stop and not token.is_punct) for token in get_nlp()(question)]
+
+    stop_words = SPACY_STOP_WORDS or FALLBACK_STOP_WORDS
+    tokens = re.findall(r"\w+(?:['’]\w+)*|[^\w\s]", question)
+    return [(token, token.lower() not in stop_words and bool(re.match(r"\w", token))) for token in tokens]
+
 
 # utility funciton to generate a shart name for given user question.
 def generate_name(question):
-    # Process the question using Spacy
-    nlp = spacy.load("en_core_web_sm")
-    doc = nlp(question)
-
-    # Remove stopwords and punctuation
-    tokens = [token.text for token in doc if not token.is_stop and not token.is_punct]
+    tokens = tokenize_question(question)
 
-    # Remove words with length less than 3
-    tokens = [token for token in tokens if len(token) > 2]
+    # Remove stopwords, punctuation and words with length less than 3
+    meaningful_tokens = [token.capitalize() for token, meaningful in tokens if meaningful and len(token) > 2]
 
     # Generate a name based on the meaningful words
-    meaningful_tokens = [token.capitalize() for token in tokens]
     if len(meaningful_tokens) > 3:
         name =' '.join(meaningful_tokens[:3])
     elif len(meaningful_tokens) > 1:
@@ -22,7 +90,14 @@ def generate_name(question):
         name = meaningful_tokens[0]
     else:
         # If no meaningful words are found, return the first 3 words of the question
-        question_tokens = [token.text for token in doc]
-        name =' '.join(question_tokens[:3])
+        name =' '.join(token for token, _ in tokens[:3])
+
+    return name
+
 
-    return name
\ No newline at end of file
+def provisional_name(question):
+    """
+    Returns the first words of a question, used as the thread name until the generated name
+    is backfilled.
+    """
+    return ' '.join(question.split()[:3])
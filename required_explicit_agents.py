@@ -1,7 +1,7 @@
 from agents_store.graph_summary_agent.execution import execute as graph_summary_execute
-from agents_store.summary_agent.execution import execute as summary_execute
+from agents_store.summary_agent.execution import aexecute as summary_aexecute
 
-def explicit_agents(
+async def aexplicit_agents(
     user_input,
     task_outputs,
     total_input_tokens_count,
@@ -16,7 +16,7 @@ def explicit_agents(
     #     total_output_tokens_count,
     #     conversation,user
     # )
-    summary_task_outputs,total_input_tokens_count,total_output_tokens_count,conversation = summary_execute(
+    summary_task_outputs,total_input_tokens_count,total_output_tokens_count,conversation = await summary_aexecute(
         user_input,
         task_outputs,
         total_input_tokens_count,
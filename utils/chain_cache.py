@@ -0,0 +1,158 @@
+"""
+Module Name: chain_cache.py
+
+Description:
+This module provides a process-wide cache for compiled LangChain query chains used by the
+generic agent. A compiled chain bundles the prompt pipeline, the dynamically created Pydantic
+output model, the JSON output parser and the LLM client. Entries are keyed by the user, the
+function name and the modification times of the files the chain was built from, so a chain is
+rebuilt automatically whenever one of its prompt files is rewritten (for example by the
+`/configure-agent` endpoint).
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: File Signature Helper
+# -----------------------------------------------------------------------------
+
+def file_signature(file_path: str) -> Tuple[str, Optional[int]]:
+    """
+    Build the cache signature of a single file.
+
+    Args:
+        file_path (str): Path of the file to fingerprint.
+
+    Returns:
+        tuple: The normalised path and its modification time in nanoseconds, or None
+            when the file does not exist.
+    """
+    file_path = os.path.normpath(str(file_path))
+    try:
+        return file_path, os.stat(file_path).st_mtime_ns
+    except OSError:
+        return file_path, None
+
+# -----------------------------------------------------------------------------
+# SECTION: Compiled Chain Cache
+# -----------------------------------------------------------------------------
+
+class CompiledChainCache:
+    """
+    Thread-safe cache of compiled query chains.
+
+    Keys are tuples of (user, function_name, file signatures, extra) where the file
+    signatures are the (path, mtime) pairs of every file the chain was built from. Because
+    the mtimes are part of the key, a rewritten prompt file produces a new key and the stale
+    entry is never returned again. Stale entries of the same (user, function_name) are
+    dropped when the new chain is stored.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(user: str, function_name: str, file_paths: Iterable[str], extra: Any = None) -> tuple:
+        """
+        Build the cache key of a chain.
+
+        Args:
+            user (str): User the chain belongs to.
+            function_name (str): Name of the agent function.
+            file_paths (Iterable[str]): Files the chain is built from.
+            extra (Any): Any additional hashable value the chain depends on.
+
+        Returns:
+            tuple: The cache key.
+        """
+        signatures = tuple(file_signature(path) for path in file_paths)
+        return (user, function_name, signatures, extra)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        """
+        Return the cached chain for a key, or None on a miss.
+        """
+        with self._lock:
+            chain = self._entries.get(key)
+            if chain is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return chain
+
+    def put(self, key: tuple, chain: Any) -> None:
+        """
+        Store a compiled chain, evicting outdated entries of the same user and function.
+        """
+        user, function_name = key[0], key[1]
+        with self._lock:
+            stale_keys = [
+                existing for existing in self._entries
+                if existing[0] == user and existing[1] == function_name and existing[3] == key[3]
+            ]
+            for existing in stale_keys:
+                del self._entries[existing]
+            if len(self._entries) >= self.max_entries:
+                # Drop the oldest entry; dicts preserve insertion order
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = chain
+
+    def invalidate(self, user: Optional[str] = None) -> int:
+        """
+        Remove cached chains of a user, or every chain when no user is given.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        with self._lock:
+            if user is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                stale_keys = [key for key in self._entries if key[0] == user]
+                for key in stale_keys:
+                    del self._entries[key]
+                removed = len(stale_keys)
+            self.invalidations += removed
+        logger.info(f"Invalidated {removed} compiled chains for user: {user if user else 'all'}")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the hit/miss counters and the current size of the cache.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries)
+            }
+
+# Process-wide cache shared by every generic agent invocation
+compiled_chain_cache = CompiledChainCache(int(os.getenv("COMPILED_CHAIN_CACHE_SIZE", "256")))
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
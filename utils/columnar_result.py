@@ -0,0 +1,146 @@
+"""
+Module Name: columnar_result.py
+
+Description:
+This module stores tabular query results column by column (one list per column). When the db_agent
+runs with DB_AGENT_RESULT_FORMAT=columnar, query results travel through the workflow as
+`ColumnarResult` objects (backed by Python column lists or, for Snowflake with pyarrow
+installed, by an Arrow table) instead of row-oriented JSON strings that are re-parsed into a
+dict per row.
+
+A result is rendered only at the boundaries:
+  - `str()` produces compact JSON for LLM prompts, a columns header plus row arrays
+    ({"columns": [...], "rows": [[...], ...]}); `repr()` returns the same text so results
+    nested in lists or dicts are rendered the same way when a prompt template formats them.
+  - `render_output` produces the historical list of row dicts for the conversation stored in
+    the database and returned by the API.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+# -----------------------------------------------------------------------------
+# SECTION: Value Helpers
+# -----------------------------------------------------------------------------
+
+def json_safe(value: Any) -> Any:
+    """
+    Returns a value JSON can represent as is, stringifying anything else (decimals, dates, ...).
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+# -----------------------------------------------------------------------------
+# SECTION: Columnar Result
+# -----------------------------------------------------------------------------
+
+class ColumnarResult:
+    """
+    Immutable query result stored column by column, rendered as a columns header plus row arrays.
+
+    Args:
+        columns (Sequence[str]): The column names.
+        data (Optional[List[List[Any]]]): One list of values per column.
+        arrow_table (Optional[Any]): A pyarrow Table holding the data instead of `data`.
+    """
+
+    def __init__(self, columns: Sequence[str], data: Optional[List[List[Any]]] = None, arrow_table: Optional[Any] = None):
+        self.columns = list(columns)
+        self._data = data
+        self._arrow_table = arrow_table
+        self._text: Optional[str] = None
+        self._text_length: Optional[int] = None
+
+    @classmethod
+    def from_arrow(cls, arrow_table: Any) -> "ColumnarResult":
+        """
+        Wraps a pyarrow Table without converting its values.
+        """
+        return cls(arrow_table.column_names, arrow_table=arrow_table)
+
+    @property
+    def num_rows(self) -> int:
+        if self._arrow_table is not None:
+            return self._arrow_table.num_rows
+        return len(self._data[0]) if self._data else 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Approximate memory used by the result, used to weigh cached results.
+        """
+        if self._arrow_table is not None:
+            return self._arrow_table.nbytes
+        return self.text_length() + sum(len(column) for column in self.columns)
+
+    def column_data(self) -> List[List[Any]]:
+        """
+        Returns the values of every column as Python lists.
+        """
+        if self._data is None:
+            # Converted once; the Arrow table stays the source of the memory estimate
+            self._data = [column.to_pylist() for column in self._arrow_table.columns]
+        return self._data
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Returns the result as a list of row dicts with JSON-safe values.
+        """
+        data = self.column_data()
+        return [
+            {column: json_safe(values[row]) for column, values in zip(self.columns, data)}
+            for row in range(self.num_rows)
+        ]
+
+    def to_text(self) -> str:
+        """
+        Returns the result as compact JSON, a columns header plus row arrays:
+        {"columns": [...], "rows": [[...], ...]}.
+        """
+        if self._text is None:
+            rows = [[json_safe(value) for value in row] for row in zip(*self.column_data())]
+            self._text = json.dumps({"columns": self.columns, "rows": rows}, separators=(',', ':'))
+        return self._text
+
+    def text_length(self) -> int:
+        """
+        Total character length of the values, the measure `compute_total_length` applies to
+        row-oriented results.
+        """
+        if self._text_length is None:
+            self._text_length = sum(
+                len(str(value)) for values in self.column_data() for value in values if value is not None
+            )
+        return self._text_length
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __str__(self) -> str:
+        return self.to_text()
+
+    __repr__ = __str__
+
+# -----------------------------------------------------------------------------
+# SECTION: Rendering Helpers
+# -----------------------------------------------------------------------------
+
+def render_output(output: Any) -> Any:
+    """
+    Converts a task output into plain JSON-serializable data for the stored conversation and
+    the API response; outputs that are not columnar results are returned unchanged.
+    """
+    if isinstance(output, ColumnarResult):
+        return output.to_records()
+    return output
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -0,0 +1,368 @@
+"""
+Module Name: connection_pool.py
+
+Description:
+This module implements a small, driver-agnostic, thread-safe connection pool. The pool is
+configured with callables to open, health-check, reset and close a connection, so the same
+implementation serves psycopg2 and Snowflake connections and can be exercised with a stand-in
+connection object in tests.
+
+Features:
+  - Configurable minimum and maximum size; borrowers block (up to a timeout) when the pool is full.
+  - Health check of connections that have been idle for a while before they are handed out.
+  - Eviction of connections idle longer than `idle_timeout` (never below `min_size`).
+  - Recycling of connections older than `max_lifetime`.
+  - Metrics: acquisitions, wait time, in-use and idle counts, created/closed connections.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Exceptions
+# -----------------------------------------------------------------------------
+
+class PoolTimeoutError(Exception):
+    """
+    Raised when no connection becomes available within the acquire timeout.
+    """
+
+# -----------------------------------------------------------------------------
+# SECTION: Pooled Connection
+# -----------------------------------------------------------------------------
+
+class PooledConnection:
+    """
+    A connection together with the bookkeeping the pool needs.
+
+    Attributes:
+        connection (Any): The underlying driver connection.
+        created_at (float): Monotonic time the connection was opened.
+        last_used_at (float): Monotonic time the connection was last returned to the pool.
+    """
+
+    def __init__(self, connection: Any):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+# -----------------------------------------------------------------------------
+# SECTION: Connection Pool
+# -----------------------------------------------------------------------------
+
+class ConnectionPool:
+    """
+    Thread-safe pool of reusable connections.
+
+    Args:
+        connect (Callable[[], Any]): Opens a new connection.
+        close (Callable[[Any], None]): Closes a connection.
+        health_check (Optional[Callable[[Any], None]]): Raises if a connection is no longer usable.
+        reset (Optional[Callable[[Any], None]]): Brings a connection back to a clean state after a
+            borrower failed, e.g. rolls back an open transaction. Raising discards the connection.
+        is_closed (Optional[Callable[[Any], bool]]): Tells whether a connection was closed by the driver.
+        min_size (int): Number of idle connections kept open by the idle eviction.
+        max_size (int): Maximum number of open connections; also the concurrency limit.
+        idle_timeout (float): Seconds after which idle connections above `min_size` are closed.
+        max_lifetime (Optional[float]): Seconds after which a connection is recycled.
+        health_check_after (float): Idle seconds after which a connection is health-checked on borrow.
+        acquire_timeout (float): Seconds a borrower waits for a free connection.
+        name (str): Name of the pool used in logs and metrics.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        close: Callable[[Any], None],
+        health_check: Optional[Callable[[Any], None]] = None,
+        reset: Optional[Callable[[Any], None]] = None,
+        is_closed: Optional[Callable[[Any], bool]] = None,
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300,
+        max_lifetime: Optional[float] = None,
+        health_check_after: float = 30,
+        acquire_timeout: float = 30,
+        name: str = "pool"
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+        self._connect = connect
+        self._close = close
+        self._health_check = health_check
+        self._reset = reset
+        self._is_closed = is_closed
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.acquire_timeout = acquire_timeout
+        self.name = name
+
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+        self._metrics = {
+            "acquisitions": 0,
+            "timeouts": 0,
+            "created": 0,
+            "closed": 0,
+            "health_check_failures": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0
+        }
+
+    # -------------------------------------------------------------------------
+    # Borrowing and returning
+    # -------------------------------------------------------------------------
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """
+        Borrows a connection for the duration of a `with` block.
+
+        If the block raises, the connection is reset before it is returned to the pool and
+        discarded if the reset fails or the driver reports it closed.
+        """
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled.connection
+        except Exception:
+            self.release(pooled, failed=True)
+            raise
+        else:
+            self.release(pooled)
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """
+        Borrows a connection, opening a new one if the pool is below its maximum size.
+
+        Raises:
+            PoolTimeoutError: If no connection becomes available within the timeout.
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started_at = time.monotonic()
+        deadline = started_at + timeout
+
+        while True:
+            pooled = None
+            with self._condition:
+                self._evict_idle_locked()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._metrics["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout}s waiting for a connection from pool '{self.name}'"
+                        )
+                    self._condition.wait(remaining)
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+
+            if pooled is None:
+                try:
+                    pooled = PooledConnection(self._connect())
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                with self._condition:
+                    self._metrics["created"] += 1
+            elif not self._is_usable(pooled):
+                self._discard(pooled)
+                continue
+
+            waited = time.monotonic() - started_at
+            with self._condition:
+                self._metrics["acquisitions"] += 1
+                self._metrics["total_wait_seconds"] += waited
+                self._metrics["max_wait_seconds"] = max(self._metrics["max_wait_seconds"], waited)
+            return pooled
+
+    def release(self, pooled: PooledConnection, failed: bool = False) -> None:
+        """
+        Returns a borrowed connection to the pool.
+
+        Args:
+            pooled (PooledConnection): The connection returned by `acquire`.
+            failed (bool): Whether the borrower raised while using the connection.
+        """
+        if failed and self._reset is not None:
+            try:
+                self._reset(pooled.connection)
+            except Exception as e:
+                logger.warning(f"Discarding connection of pool '{self.name}' after failed reset: {str(e)}")
+                self._discard(pooled)
+                return
+
+        if self._closed_by_driver(pooled) or self._expired(pooled):
+            self._discard(pooled)
+            return
+
+        pooled.last_used_at = time.monotonic()
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    # -------------------------------------------------------------------------
+    # Maintenance
+    # -------------------------------------------------------------------------
+
+    def warm_up(self) -> None:
+        """
+        Opens connections until `min_size` connections are available.
+        """
+        pooled_connections = []
+        try:
+            while True:
+                with self._condition:
+                    if self._size >= self.min_size:
+                        break
+                pooled_connections.append(self.acquire())
+        finally:
+            for pooled in pooled_connections:
+                self.release(pooled)
+
+    def evict_idle(self) -> None:
+        """
+        Closes idle connections above `min_size` that exceeded the idle timeout or lifetime.
+        """
+        with self._condition:
+            self._evict_idle_locked()
+
+    def close_all(self) -> None:
+        """
+        Closes every idle connection. Borrowed connections are closed when they are returned.
+        """
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._metrics["closed"] += len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._safe_close(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the pool metrics.
+        """
+        with self._condition:
+            stats = dict(self._metrics)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._size - len(self._idle)
+            stats["min_size"] = self.min_size
+            stats["max_size"] = self.max_size
+            stats["average_wait_seconds"] = (
+                stats["total_wait_seconds"] / stats["acquisitions"] if stats["acquisitions"] else 0.0
+            )
+        return stats
+
+    # -------------------------------------------------------------------------
+    # Internal helpers
+    # -------------------------------------------------------------------------
+
+    def _evict_idle_locked(self) -> None:
+        now = time.monotonic()
+        evicted = []
+        # The oldest idle connections sit on the left of the deque
+        while self._idle and self._size - len(evicted) > self.min_size:
+            pooled = self._idle[0]
+            if now - pooled.last_used_at < self.idle_timeout and not self._expired(pooled, now):
+                break
+            evicted.append(self._idle.popleft())
+        if evicted:
+            self._size -= len(evicted)
+            self._metrics["closed"] += len(evicted)
+            self._condition.notify_all()
+            logger.info(f"Evicted {len(evicted)} idle connections from pool '{self.name}'")
+        for pooled in evicted:
+            self._safe_close(pooled)
+
+    def _is_usable(self, pooled: PooledConnection) -> bool:
+        if self._closed_by_driver(pooled) or self._expired(pooled):
+            return False
+        if self._health_check is not None and time.monotonic() - pooled.last_used_at >= self.health_check_after:
+            try:
+                self._health_check(pooled.connection)
+            except Exception as e:
+                logger.warning(f"Health check failed for a connection of pool '{self.name}': {str(e)}")
+                with self._condition:
+                    self._metrics["health_check_failures"] += 1
+                return False
+        return True
+
+    def _expired(self, pooled: PooledConnection, now: Optional[float] = None) -> bool:
+        if self.max_lifetime is None:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - pooled.created_at >= self.max_lifetime
+
+    def _closed_by_driver(self, pooled: PooledConnection) -> bool:
+        if self._is_closed is None:
+            return False
+        try:
+            return bool(self._is_closed(pooled.connection))
+        except Exception:
+            return True
+
+    def _discard(self, pooled: PooledConnection) -> None:
+        with self._condition:
+            self._size -= 1
+            self._metrics["closed"] += 1
+            self._condition.notify()
+        self._safe_close(pooled)
+
+    def _safe_close(self, pooled: PooledConnection) -> None:
+        try:
+            self._close(pooled.connection)
+        except Exception as e:
+            logger.warning(f"Failed to close a connection of pool '{self.name}': {str(e)}")
+
+# -----------------------------------------------------------------------------
+# SECTION: Warm-up
+# -----------------------------------------------------------------------------
+
+def warm_up_in_background(*warm_ups: Callable[[], None]) -> threading.Thread:
+    """
+    Runs pool warm-up functions on a daemon thread, so the `min_size` connections are opened
+    at startup without delaying it. Failures are logged; the pools then open connections on
+    first use as before.
+    """
+    def run() -> None:
+        for warm_up in warm_ups:
+            try:
+                warm_up()
+            except Exception as e:
+                logger.warning(f"Connection pool warm-up failed: {str(e)}")
+
+    thread = threading.Thread(target=run, name="pool-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -0,0 +1,209 @@
+"""
+Module Name: directory_index.py
+
+Description:
+This module maintains an in-memory index of the directories below the project root, mapping
+each directory name to the path of its first occurrence in `os.walk` order. It replaces the
+full tree walk that `find_directory` used to perform on every agent call.
+
+The index is built once (at application startup or lazily on first use) and is refreshed:
+  - when a lookup misses or returns a directory that no longer exists (throttled),
+  - when a configuration write marks it stale through `invalidate_directory_index`,
+  - optionally by a polling watcher thread that detects added or removed directories.
+
+Runtime-only directories such as `.git`, `log_files` and `user_config_files` are not indexed;
+user overrides are resolved explicitly by the callers.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Constants and Configuration
+# -----------------------------------------------------------------------------
+
+# Directories that are never searched for prompt or agent directories
+SKIPPED_DIRECTORIES = {
+    ".git", "log_files", "user_config_files", "__pycache__",
+    ".venv", "venv", ".pytest_cache", ".mypy_cache", "node_modules"
+}
+
+# Minimum number of seconds between two rebuilds triggered by lookup misses
+DIRECTORY_INDEX_MIN_REFRESH_SECONDS = float(os.getenv("DIRECTORY_INDEX_MIN_REFRESH_SECONDS", "5"))
+
+# Polling interval of the watcher thread in seconds, 0 disables the watcher
+DIRECTORY_INDEX_WATCH_INTERVAL = float(os.getenv("DIRECTORY_INDEX_WATCH_INTERVAL", "0"))
+
+# -----------------------------------------------------------------------------
+# SECTION: Directory Index
+# -----------------------------------------------------------------------------
+
+class DirectoryIndex:
+    """
+    Name -> path index of the directories below a root directory.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root).resolve()
+        self._paths: Dict[str, Path] = {}
+        self._directory_mtimes: Dict[str, int] = {}
+        self._built_at: Optional[float] = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+
+    def build(self) -> None:
+        """
+        Walks the tree below the root once and records the first path of every directory name.
+        """
+        paths = {}
+        directory_mtimes = {}
+        for root, dirs, _ in os.walk(self.root):
+            # Prune skipped directories in place so os.walk does not descend into them
+            dirs[:] = [name for name in dirs if name not in SKIPPED_DIRECTORIES]
+            try:
+                directory_mtimes[root] = os.stat(root).st_mtime_ns
+            except OSError:
+                continue
+            for name in dirs:
+                paths.setdefault(name, Path(root) / name)
+
+        with self._lock:
+            self._paths = paths
+            self._directory_mtimes = directory_mtimes
+            self._built_at = time.monotonic()
+            self._stale = False
+        logger.info(f"Built directory index for {self.root} with {len(paths)} entries")
+
+    def invalidate(self) -> None:
+        """
+        Marks the index stale so it is rebuilt on the next lookup.
+        """
+        with self._lock:
+            self._stale = True
+
+    def has_changed(self) -> bool:
+        """
+        Checks whether a directory was added or removed anywhere in the indexed tree.
+        """
+        with self._lock:
+            directory_mtimes = dict(self._directory_mtimes)
+        for directory, mtime in directory_mtimes.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def find(self, dir_name: str) -> Optional[Path]:
+        """
+        Returns the path of a directory by name, rebuilding the index when needed.
+
+        Args:
+            dir_name (str): The exact name of the directory to look up.
+
+        Returns:
+            Path or None: The path of the directory, or None if it does not exist.
+        """
+        with self._lock:
+            needs_build = self._stale or self._built_at is None
+            path = self._paths.get(dir_name)
+            built_at = self._built_at
+
+        if needs_build:
+            self.build()
+            with self._lock:
+                return self._paths.get(dir_name)
+
+        if path is not None and path.is_dir():
+            return path
+
+        # Miss or stale entry: rebuild, but not more often than the configured interval
+        if time.monotonic() - built_at >= DIRECTORY_INDEX_MIN_REFRESH_SECONDS:
+            logger.info(f"Directory index lookup for {dir_name} failed, rebuilding the index")
+            self.build()
+            with self._lock:
+                return self._paths.get(dir_name)
+        return None
+
+    def start_watcher(self, interval: float) -> None:
+        """
+        Starts a daemon thread that rebuilds the index whenever the tree changes.
+
+        Args:
+            interval (float): Polling interval in seconds.
+        """
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.has_changed():
+                        logger.info(f"Detected directory changes below {self.root}, rebuilding the index")
+                        self.build()
+                except Exception as e:
+                    logger.error(f"Directory index watcher failed: {str(e)}")
+
+        self._watcher = threading.Thread(target=watch, name="directory-index-watcher", daemon=True)
+        self._watcher.start()
+
+# -----------------------------------------------------------------------------
+# SECTION: Index Registry
+# -----------------------------------------------------------------------------
+
+_indexes: Dict[Path, DirectoryIndex] = {}
+_indexes_lock = threading.Lock()
+
+def get_directory_index(start_path) -> DirectoryIndex:
+    """
+    Returns the shared index of a root directory, creating it on first use.
+    """
+    root = Path(start_path).resolve()
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = DirectoryIndex(root)
+            _indexes[root] = index
+    return index
+
+def initialize_directory_index(start_path) -> DirectoryIndex:
+    """
+    Builds the index of a root directory eagerly and starts the watcher if configured.
+    """
+    index = get_directory_index(start_path)
+    index.build()
+    index.start_watcher(DIRECTORY_INDEX_WATCH_INTERVAL)
+    return index
+
+def invalidate_directory_index() -> None:
+    """
+    Marks every index stale, e.g. after configuration files have been written.
+    """
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        index.invalidate()
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
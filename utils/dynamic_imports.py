@@ -54,6 +54,10 @@ def lazy_import_db_dependencies() -> Dict[str, Any]:
     get_dboconfig_func = get_function_from_module("agents_store.db_agent.utils.helper_db_functions", "get_dboconfig")
     if get_dboconfig_func:
         db_deps["get_dboconfig"] = get_dboconfig_func
+
+    list_db_functions_func = get_function_from_module("agents_store.db_agent.utils.helper_db_functions", "list_db_functions")
+    if list_db_functions_func:
+        db_deps["list_db_functions"] = list_db_functions_func
     
     # Try to import Queries
     queries_module = dynamic_import("agents_store.db_agent.utils.query_repository")
@@ -66,6 +70,13 @@ def lazy_import_db_dependencies() -> Dict[str, Any]:
     )
     if db_query_prompt_loader_func:
         db_deps["db_query_prompt_loader"] = db_query_prompt_loader_func
+
+    # Try to import db_table_pruning_agent
+    db_table_pruning_agent_func = get_function_from_module(
+        "agents_store.db_agent.func_executable.db_table_pruning_agent", "db_table_pruning_agent"
+    )
+    if db_table_pruning_agent_func:
+        db_deps["db_table_pruning_agent"] = db_table_pruning_agent_func
     
     # Try to import db_query_exec
     db_query_exec_func = get_function_from_module("agents_store.db_agent.utils.db_agent_utils", "db_query_exec")
@@ -155,9 +166,9 @@ def add_query_to_repository(query: str, db_deps: Dict[str, Any]) -> None:
         db_deps (Dict[str, Any]): Dictionary of DB dependencies
     """
     Queries = db_deps.get("Queries")
-    if Queries and hasattr(Queries, "query"):
+    if Queries and hasattr(Queries, "add"):
         try:
-            Queries.query.append(query)
+            Queries.add(query)
         except Exception as e:
             logger.warning(f"Error adding query to repository: {e}")
 
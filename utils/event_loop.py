@@ -0,0 +1,111 @@
+"""
+Module Name: event_loop.py
+
+Description:
+This module runs the async Ask Ellis workflow from synchronous code such as the Flask endpoints,
+so the sync and async entry points share a single implementation of the workflow.
+
+Coroutines are executed on one event loop running in a daemon thread for the whole process,
+rather than on a new loop per call with `asyncio.run`: the async LLM clients keep their
+connections bound to the loop that opened them and are shared between requests. Each coroutine
+runs in a copy of the caller's context, so context variables such as the workflow event sink
+and the generated queries stay private to the request. Blocking calls of the workflow (database
+drivers, the dependency resolver) run on the default executor of the loop, bounded by
+WORKFLOW_LOOP_WORKERS threads.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import os
+import threading
+from typing import Any, Coroutine, Optional
+
+# Third-party imports
+from dotenv import load_dotenv
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Worker threads of the blocking calls made by the workflows run from synchronous code
+WORKFLOW_LOOP_WORKERS = int(os.getenv("WORKFLOW_LOOP_WORKERS", "32"))
+
+# -----------------------------------------------------------------------------
+# SECTION: Background Event Loop
+# -----------------------------------------------------------------------------
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the process-wide event loop of the synchronous callers, starting it on first use.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(
+                max_workers=WORKFLOW_LOOP_WORKERS, thread_name_prefix="workflow-loop-worker"
+            ))
+            threading.Thread(target=loop.run_forever, name="workflow-event-loop", daemon=True).start()
+            logger.info(f"Started the workflow event loop with {WORKFLOW_LOOP_WORKERS} worker threads")
+            _loop = loop
+    return _loop
+
+
+def run_sync(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Runs a coroutine on the background event loop and waits for its result.
+
+    The coroutine runs in a copy of the caller's context. Must not be called from a coroutine
+    running on the background loop itself, which would deadlock.
+
+    Args:
+        coroutine (Coroutine): The coroutine to run, e.g. `aask_ellis_workflow_graph(...)`.
+
+    Returns:
+        Any: The return value of the coroutine; its exception is raised in the caller.
+    """
+    loop = get_background_loop()
+    result = concurrent.futures.Future()
+
+    def start():
+        # Runs in the caller's context, which the task copies when it is created
+        task = loop.create_task(coroutine)
+
+        def done(task):
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+
+        task.add_done_callback(done)
+
+    loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+    return result.result()
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -21,28 +21,45 @@ from flask import jsonify
 # SECTION: ask-ellis api validations
 # -----------------------------------------------------------------------------
 
-def validate_ask_ellis_api_request_data(data):
+def get_ask_ellis_api_request_error(data):
     """
-    Validate the request data for the ask-ellis API.
+    Check the request data for the ask-ellis API without depending on a web framework.
 
     Args:
         data (dict): The request data to validate.
 
     Returns:
-        Response: JSON response with an error message and HTTP status code if validation fails.
+        str: The validation error message if validation fails.
         None: If validation passes.
     """
     if not data:
-        return jsonify({"error": "Missing request body"}), 400
+        return "Missing request body"
 
     # if 'request_id' not in data:
-    #     return jsonify({"error": "Missing required parameter: request_id"}), 400
+    #     return "Missing required parameter: request_id"
 
     if 'user_input' not in data:
-        return jsonify({"error": "Missing required parameter: user_input"}), 400
+        return "Missing required parameter: user_input"
 
     if 'user_details' not in data:
-        return jsonify({"error": "Missing required parameter: user_details"}), 400
+        return "Missing required parameter: user_details"
+
+    return None  # No errors
+
+def validate_ask_ellis_api_request_data(data):
+    """
+    Validate the request data for the ask-ellis API.
+
+    Args:
+        data (dict): The request data to validate.
+
+    Returns:
+        Response: JSON response with an error message and HTTP status code if validation fails.
+        None: If validation passes.
+    """
+    error = get_ask_ellis_api_request_error(data)
+    if error:
+        return jsonify({"error": error}), 400
 
     return None  # No errors
 
@@ -0,0 +1,175 @@
+"""
+Module Name: lru_ttl_cache.py
+
+Description:
+This module implements a small thread-safe cache combining LRU eviction with a time-to-live per
+entry. Every entry carries a weight (1 by default, or e.g. its size in bytes) and the cache
+evicts the least recently used entries once the total weight exceeds its capacity.
+
+Features:
+  - Per-entry TTL overriding the default TTL of the cache.
+  - Weight-bounded capacity (entry count or bytes).
+  - Invalidation of single keys or of every key matching a predicate.
+  - Metrics: hits, misses, evictions, expirations, hit rate, size and total weight.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# -----------------------------------------------------------------------------
+# SECTION: LRU Cache with TTL
+# -----------------------------------------------------------------------------
+
+class LRUTTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a time-to-live.
+
+    Args:
+        capacity (float): Maximum total weight of the cached entries.
+        default_ttl (Optional[float]): Seconds an entry stays valid; None never expires.
+    """
+
+    def __init__(self, capacity: float, default_ttl: Optional[float] = None):
+        self.capacity = capacity
+        self.default_ttl = default_ttl
+        # key -> (value, expires_at, weight), ordered from least to most recently used
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float], float]]" = OrderedDict()
+        self._weight = 0.0
+        self._lock = threading.Lock()
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0
+        }
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the value of a key and marks it as recently used, or `default` on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry):
+                self._remove_locked(key)
+                self._metrics["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._metrics["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._metrics["hits"] += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None, weight: float = 1) -> bool:
+        """
+        Stores a value, evicting the least recently used entries when the capacity is exceeded.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to store.
+            ttl (Optional[float]): Seconds the entry stays valid; defaults to the cache TTL.
+            weight (float): Weight of the entry counted against the capacity.
+
+        Returns:
+            bool: False if the entry is heavier than the whole cache and was not stored.
+        """
+        if weight > self.capacity:
+            return False
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = (value, expires_at, weight)
+            self._weight += weight
+            while self._weight > self.capacity and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._remove_locked(oldest_key)
+                self._metrics["evictions"] += 1
+        return True
+
+    def peek_items(self) -> List[Tuple[Hashable, Any]]:
+        """
+        Returns the unexpired (key, value) pairs from most to least recently used, without
+        counting a hit or changing the LRU order.
+        """
+        with self._lock:
+            return [
+                (key, entry[0]) for key, entry in reversed(self._entries.items())
+                if not self._is_expired(entry)
+            ]
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Removes a key from the cache.
+
+        Returns:
+            bool: Whether the key was cached.
+        """
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove_locked(key)
+            self._metrics["invalidations"] += 1
+            return True
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Removes every key matching a predicate.
+
+        Returns:
+            int: The number of removed entries.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove_locked(key)
+            self._metrics["invalidations"] += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+        with self._lock:
+            self._metrics["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._weight = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the cache metrics.
+        """
+        with self._lock:
+            stats = dict(self._metrics)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["entries"] = len(self._entries)
+            stats["weight"] = self._weight
+            stats["capacity"] = self.capacity
+        return stats
+
+    # -------------------------------------------------------------------------
+    # Internal helpers
+    # -------------------------------------------------------------------------
+
+    @staticmethod
+    def _is_expired(entry: Tuple[Any, Optional[float], float]) -> bool:
+        return entry[1] is not None and time.monotonic() >= entry[1]
+
+    def _remove_locked(self, key: Hashable) -> None:
+        _, _, weight = self._entries.pop(key)
+        self._weight -= weight
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -0,0 +1,164 @@
+"""
+Module Name: prompt_store.py
+
+Description:
+This module keeps the flattened text of the prompt YAML files in memory. A prompt file is
+parsed and flattened once; afterwards its text is served from memory and the file is only
+stat'ed again (to pick up edits through its modification time) after
+PROMPT_STORE_REVALIDATE_SECONDS.
+
+The store also resolves which file a (user, agent, prompt kind) uses, preferring the user's
+override under `user_config_files` over the default template. The resolution is cached with
+the same revalidation interval, so the hot path of an agent call does not touch the
+filesystem. Configuration writes drop everything at once through `invalidate`.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+# Third-party imports
+from dotenv import load_dotenv
+
+# Local application imports
+from utils.chain_cache import file_signature
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Seconds during which cached prompt texts and resolutions are served without checking the files
+PROMPT_STORE_REVALIDATE_SECONDS = float(os.getenv("PROMPT_STORE_REVALIDATE_SECONDS", "5"))
+
+# -----------------------------------------------------------------------------
+# SECTION: Prompt Store
+# -----------------------------------------------------------------------------
+
+class PromptStore:
+    """
+    Thread-safe in-memory store of flattened prompt texts and prompt file resolutions.
+
+    Args:
+        revalidate_seconds (float): Seconds before a cached entry is checked against the files.
+    """
+
+    def __init__(self, revalidate_seconds: float):
+        self.revalidate_seconds = revalidate_seconds
+        # (path, loader) -> (file signature, checked_at, text)
+        self._texts: Dict[Tuple[str, Callable], Tuple[Tuple, float, Any]] = {}
+        # (user, agent, prompt kind) -> (user path, default path, resolved path, checked_at)
+        self._resolutions: Dict[Hashable, Tuple[str, str, str, float]] = {}
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "loads": 0, "revalidations": 0, "resolution_hits": 0, "resolution_misses": 0}
+
+    def get_text(self, file_path: str, loader: Callable[[str], Any]) -> Any:
+        """
+        Returns the text a loader produces for a prompt file, loading the file only when it is
+        not cached yet or was modified since.
+
+        Args:
+            file_path (str): Path of the prompt YAML file.
+            loader (Callable[[str], Any]): Parses and flattens the file into the prompt text.
+
+        Returns:
+            Any: The prompt text.
+        """
+        key = (os.path.normpath(str(file_path)), loader)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._texts.get(key)
+            if entry is not None and now - entry[1] < self.revalidate_seconds:
+                self._metrics["hits"] += 1
+                return entry[2]
+
+        signature = file_signature(key[0])
+        if entry is not None and entry[0] == signature:
+            with self._lock:
+                self._texts[key] = (signature, now, entry[2])
+                self._metrics["revalidations"] += 1
+            return entry[2]
+
+        text = loader(file_path)
+        # Parse errors are returned (not raised) by the loaders and are not cached
+        if isinstance(text, str):
+            with self._lock:
+                self._texts[key] = (signature, now, text)
+                self._metrics["loads"] += 1
+        return text
+
+    def resolve(self, user: str, agent_name: str, prompt_kind: str, user_path: str, default_path: str) -> str:
+        """
+        Returns the prompt file of a (user, agent, prompt kind): the user's override when it
+        exists, otherwise the default template.
+
+        Args:
+            user (str): The user whose override is looked up.
+            agent_name (str): The agent the prompt belongs to.
+            prompt_kind (str): The prompt kind, e.g. "system" or "example".
+            user_path (str): Path of the user's override file.
+            default_path (str): Path of the default template.
+
+        Returns:
+            str: The resolved prompt file path.
+        """
+        key = (user, agent_name, prompt_kind)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._resolutions.get(key)
+            if (
+                entry is not None
+                and entry[0] == user_path
+                and entry[1] == default_path
+                and now - entry[3] < self.revalidate_seconds
+            ):
+                self._metrics["resolution_hits"] += 1
+                return entry[2]
+
+        resolved_path = user_path if os.path.exists(user_path) else default_path
+        with self._lock:
+            self._resolutions[key] = (user_path, default_path, resolved_path, now)
+            self._metrics["resolution_misses"] += 1
+        return resolved_path
+
+    def invalidate(self) -> None:
+        """
+        Drops every cached text and resolution, e.g. after the prompt files were rewritten.
+        """
+        with self._lock:
+            self._texts.clear()
+            self._resolutions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the hit/load counters and the number of cached entries.
+        """
+        with self._lock:
+            stats = dict(self._metrics)
+            stats["texts"] = len(self._texts)
+            stats["resolutions"] = len(self._resolutions)
+        return stats
+
+# Process-wide prompt store shared by every agent
+prompt_store = PromptStore(PROMPT_STORE_REVALIDATE_SECONDS)
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -0,0 +1,188 @@
+"""
+Module Name: speculation.py
+
+Description:
+This module runs work speculatively: a function is started in the background before it is
+known whether its result will be needed, and a later step of the same request picks the result
+up instead of computing it again.
+
+A speculation is registered under a name in a context variable for the duration of a
+`speculate` block, so it is visible to every thread and asyncio task the request spawns from
+that context (the supervisor executes its tasks in copies of the caller's context). The
+starter `accept`s or `discard`s the speculation once it knows whether the result is useful;
+`take_speculative_result` returns the result of an accepted speculation exactly once.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional
+
+# Third-party imports
+from dotenv import load_dotenv
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Maximum number of speculative calls running at the same time across all requests
+SPECULATION_WORKERS = int(os.getenv("SPECULATION_WORKERS", "4"))
+
+_executor = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix="speculation")
+
+# Speculations of the current request keyed by name
+_speculations: contextvars.ContextVar[Optional[Dict[str, "Speculation"]]] = contextvars.ContextVar(
+    "speculations", default=None
+)
+
+_metrics_lock = threading.Lock()
+_metrics = {"started": 0, "consumed": 0, "discarded": 0, "failed": 0}
+
+
+def _count(metric: str) -> None:
+    with _metrics_lock:
+        _metrics[metric] += 1
+
+# -----------------------------------------------------------------------------
+# SECTION: Speculation
+# -----------------------------------------------------------------------------
+
+class Speculation:
+    """
+    A background computation whose result may be taken once by a later step of the request.
+
+    Args:
+        name (str): Name under which consumers look the speculation up.
+        key (Hashable): Identifies the input of the computation, e.g. the user.
+        future (Future): The running computation.
+    """
+
+    def __init__(self, name: str, key: Hashable, future: Future):
+        self.name = name
+        self.key = key
+        self.future = future
+        self.state = "pending"
+        self._lock = threading.Lock()
+
+    def accept(self) -> None:
+        """
+        Marks the result as usable by consumers.
+        """
+        with self._lock:
+            if self.state == "pending":
+                self.state = "accepted"
+
+    def discard(self) -> None:
+        """
+        Marks the result as unusable; it is never handed out.
+        """
+        with self._lock:
+            if self.state not in ("pending", "accepted"):
+                return
+            self.state = "discarded"
+        self.future.cancel()
+        _count("discarded")
+
+    def take(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the result of an accepted speculation for the same key, waiting for it if it
+        is still running, or None when the caller has to compute the result itself.
+        """
+        with self._lock:
+            if self.state != "accepted" or key != self.key:
+                return None
+            self.state = "consumed"
+        try:
+            result = self.future.result()
+        except Exception as error:
+            logger.warning(f"Speculative {self.name} failed, computing it again: {error}")
+            _count("failed")
+            return None
+        _count("consumed")
+        return result
+
+    def unused_result(self) -> Optional[Any]:
+        """
+        Returns the result of a finished speculation that was not consumed, e.g. to account
+        for the tokens it spent, or None.
+        """
+        with self._lock:
+            if self.state == "consumed":
+                return None
+        if not self.future.done() or self.future.cancelled() or self.future.exception() is not None:
+            return None
+        return self.future.result()
+
+# -----------------------------------------------------------------------------
+# SECTION: Speculation Helpers
+# -----------------------------------------------------------------------------
+
+@contextmanager
+def speculate(name: str, key: Hashable, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Iterator[Speculation]:
+    """
+    Starts a function in the background and registers it under a name for the duration of the
+    block. The speculation is discarded when the block exits without it being consumed.
+
+    Args:
+        name (str): Name under which consumers look the speculation up.
+        key (Hashable): Identifies the input of the computation.
+        function (Callable[..., Any]): The function to run speculatively.
+        *args, **kwargs: Arguments of the function.
+
+    Yields:
+        Speculation: The running speculation.
+    """
+    future = _executor.submit(contextvars.copy_context().run, function, *args, **kwargs)
+    speculation = Speculation(name, key, future)
+    _count("started")
+
+    speculations = dict(_speculations.get() or {})
+    speculations[name] = speculation
+    token = _speculations.set(speculations)
+    try:
+        yield speculation
+    finally:
+        _speculations.reset(token)
+        speculation.discard()
+
+
+def take_speculative_result(name: str, key: Hashable) -> Optional[Any]:
+    """
+    Returns the result of the accepted speculation registered under a name in the current
+    context, or None when there is none and the caller has to compute the result itself.
+    """
+    speculation = (_speculations.get() or {}).get(name)
+    if speculation is None:
+        return None
+    return speculation.take(key)
+
+
+def speculation_stats() -> Dict[str, int]:
+    """
+    Returns the counters of the speculations started by the process.
+    """
+    with _metrics_lock:
+        return dict(_metrics)
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -0,0 +1,313 @@
+"""
+Module Name: token_budget.py
+
+Description:
+This module measures agent outputs in tokens with tiktoken and fits them into a token budget,
+so the prompts built from them (observer, summary agent, stored conversation) stay bounded.
+
+  - Tabular outputs (lists of row dicts or ColumnarResult) are reduced by column projection
+    first - the widest columns are dropped when a single row does not leave room for enough
+    rows - and then by row sampling: the first rows are kept and the rest is sampled evenly.
+  - Text outputs are summarized hierarchically: the text is split into chunks that are
+    summarized separately, and the joined summaries are summarized again until they fit.
+    The summarization itself is passed in by the caller; without it the text is truncated.
+
+Tokens are counted with the TOKEN_BUDGET_ENCODING encoding (o200k_base by default, falling back
+to cl100k_base). When no encoding can be loaded, e.g. without network access to download it,
+tokens are estimated from the text length.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import json
+import logging
+import os
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# Third-party imports
+import tiktoken
+from dotenv import load_dotenv
+
+# Local application imports
+from utils.columnar_result import ColumnarResult, json_safe
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+TOKEN_BUDGET_ENCODING = os.getenv("TOKEN_BUDGET_ENCODING", "o200k_base")
+FALLBACK_ENCODING = "cl100k_base"
+# Average characters per token used when no encoding is available
+CHARACTERS_PER_TOKEN = 4
+
+# Minimum number of rows a tabular output keeps before columns are projected away
+TOKEN_BUDGET_MIN_ROWS = int(os.getenv("TOKEN_BUDGET_MIN_ROWS", "20"))
+# Leading rows always kept by row sampling, the remaining ones are sampled evenly
+TOKEN_BUDGET_HEAD_ROWS = int(os.getenv("TOKEN_BUDGET_HEAD_ROWS", "5"))
+# Size of the chunks summarized separately by hierarchical summarization
+TOKEN_BUDGET_CHUNK_TOKENS = int(os.getenv("TOKEN_BUDGET_CHUNK_TOKENS", "3000"))
+# Maximum number of summarization rounds before the text is truncated
+TOKEN_BUDGET_MAX_SUMMARY_ROUNDS = 3
+
+# (text, target tokens) -> (summary, input tokens, output tokens)
+Summarizer = Callable[[str, int], Tuple[str, int, int]]
+
+# -----------------------------------------------------------------------------
+# SECTION: Token Counting
+# -----------------------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def get_encoding() -> Optional[Any]:
+    """
+    Returns the tiktoken encoding used for budgeting, or None when none can be loaded.
+    """
+    for encoding_name in dict.fromkeys((TOKEN_BUDGET_ENCODING, FALLBACK_ENCODING)):
+        try:
+            return tiktoken.get_encoding(encoding_name)
+        except Exception as e:
+            logger.warning(f"Could not load the {encoding_name} encoding: {e}")
+    logger.warning("Estimating token counts from the text length")
+    return None
+
+
+def output_text(output: Any) -> str:
+    """
+    Returns the text an output takes in a prompt.
+    """
+    if isinstance(output, str):
+        return output
+    if isinstance(output, ColumnarResult):
+        return output.to_text()
+    return json.dumps(output, default=str)
+
+
+def count_tokens(output: Any) -> int:
+    """
+    Returns the number of tokens an output takes in a prompt.
+    """
+    text = output_text(output)
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARACTERS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Returns the leading part of a text that fits into a number of tokens.
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARACTERS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def split_tokens(text: str, chunk_tokens: int) -> List[str]:
+    """
+    Splits a text into chunks of at most a number of tokens, preferring line boundaries.
+    """
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    for line in text.splitlines(keepends=True):
+        line_tokens = count_tokens(line)
+        if line_tokens > chunk_tokens:
+            # A single oversized line is cut into pieces
+            while line:
+                piece = truncate_tokens(line, chunk_tokens)
+                chunks.append(piece)
+                line = line[len(piece):]
+            continue
+        if current and current_tokens + line_tokens > chunk_tokens:
+            chunks.append("".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+# -----------------------------------------------------------------------------
+# SECTION: Budget Allocation
+# -----------------------------------------------------------------------------
+
+def allocate_budget(sizes: Sequence[int], budget: int) -> List[int]:
+    """
+    Splits a token budget between outputs: outputs smaller than their share keep their size
+    and the rest of the budget is shared equally by the larger ones.
+    """
+    allocations = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=lambda index: sizes[index])
+    for position, index in enumerate(order):
+        share = remaining // (len(sizes) - position)
+        allocations[index] = min(sizes[index], share)
+        remaining -= allocations[index]
+    return allocations
+
+# -----------------------------------------------------------------------------
+# SECTION: Tabular Outputs
+# -----------------------------------------------------------------------------
+
+def is_tabular(output: Any) -> bool:
+    """
+    Whether an output is a result set: a ColumnarResult or a non-empty list of row dicts.
+    """
+    if isinstance(output, ColumnarResult):
+        return True
+    return isinstance(output, list) and bool(output) and all(isinstance(row, dict) for row in output)
+
+
+def sample_indices(row_count: int, keep: int) -> List[int]:
+    """
+    Returns the indices of the rows kept by row sampling: the first rows and an even sample
+    of the remaining ones, in their original order.
+    """
+    if keep >= row_count:
+        return list(range(row_count))
+    head = min(TOKEN_BUDGET_HEAD_ROWS, keep)
+    sampled = keep - head
+    if sampled <= 0:
+        return list(range(head))
+    step = (row_count - head) / sampled
+    return list(range(head)) + [head + int(position * step) for position in range(sampled)]
+
+
+def fit_tabular(output: Any, budget: int) -> Tuple[Any, Optional[str]]:
+    """
+    Fits a result set into a token budget with column projection and row sampling.
+
+    Args:
+        output (Any): A ColumnarResult or a list of row dicts.
+        budget (int): The token budget.
+
+    Returns:
+        tuple: The reduced result, of the same type, and a note describing the reduction, or
+            the output unchanged and None when it fits.
+    """
+    if isinstance(output, ColumnarResult):
+        columns = output.columns
+        data = [[json_safe(value) for value in values] for values in output.column_data()]
+    else:
+        columns = list(dict.fromkeys(column for row in output for column in row))
+        data = [[row.get(column) for row in output] for column in columns]
+    row_count = len(data[0]) if data else 0
+    if row_count == 0 or count_tokens(output) <= budget:
+        return output, None
+
+    def build(kept_columns, indices):
+        if isinstance(output, ColumnarResult):
+            return ColumnarResult(
+                [columns[column] for column in kept_columns],
+                [[data[column][index] for index in indices] for column in kept_columns]
+            )
+        return [{columns[column]: data[column][index] for column in kept_columns} for index in indices]
+
+    # Column projection: drop the widest columns until enough rows fit
+    probe = sample_indices(row_count, min(row_count, 50))
+    column_tokens = {
+        column: count_tokens([data[column][index] for index in probe]) / len(probe)
+        for column in range(len(columns))
+    }
+    kept_columns = list(range(len(columns)))
+    min_rows = min(TOKEN_BUDGET_MIN_ROWS, row_count)
+    while len(kept_columns) > 1 and sum(column_tokens[column] for column in kept_columns) * min_rows > budget:
+        kept_columns.remove(max(kept_columns, key=lambda column: column_tokens[column]))
+
+    # Row sampling: start from the estimated number of rows and shrink until the result fits
+    row_tokens = max(sum(column_tokens[column] for column in kept_columns), 1.0)
+    keep = max(1, min(row_count, int(budget / row_tokens)))
+    reduced = build(kept_columns, sample_indices(row_count, keep))
+    while keep > 1 and count_tokens(reduced) > budget:
+        keep = max(1, int(keep * 0.8))
+        reduced = build(kept_columns, sample_indices(row_count, keep))
+
+    dropped = [columns[column] for column in range(len(columns)) if column not in kept_columns]
+    note = f"Showing {keep} of {row_count} rows (first {min(TOKEN_BUDGET_HEAD_ROWS, keep)} rows and an even sample of the rest)"
+    if dropped:
+        note += f"; columns omitted to fit the token budget: {', '.join(dropped)}"
+    return reduced, note
+
+# -----------------------------------------------------------------------------
+# SECTION: Text Outputs
+# -----------------------------------------------------------------------------
+
+def summarize_text(text: str, budget: int, summarize: Optional[Summarizer] = None,
+                   map_chunks: Callable = map) -> Tuple[str, int, int]:
+    """
+    Fits a text into a token budget by hierarchical summarization.
+
+    Args:
+        text (str): The text to reduce.
+        budget (int): The token budget.
+        summarize (Optional[Summarizer]): Summarizes a chunk into about a number of tokens;
+            without it the text is truncated.
+        map_chunks (Callable): Applies a function to the chunks of a round, e.g. the `map` of
+            a thread pool to summarize them concurrently.
+
+    Returns:
+        tuple: (the reduced text, input tokens, output tokens)
+    """
+    input_tokens = 0
+    output_tokens = 0
+    rounds = 0
+    while summarize is not None and rounds < TOKEN_BUDGET_MAX_SUMMARY_ROUNDS and count_tokens(text) > budget:
+        chunks = split_tokens(text, TOKEN_BUDGET_CHUNK_TOKENS)
+        target_tokens = max(budget // len(chunks), 64)
+        summaries = list(map_chunks(lambda chunk: summarize(chunk, target_tokens), chunks))
+        input_tokens += sum(summary[1] for summary in summaries)
+        output_tokens += sum(summary[2] for summary in summaries)
+        text = "\n".join(summary[0] for summary in summaries)
+        rounds += 1
+
+    if count_tokens(text) > budget:
+        text = truncate_tokens(text, budget)
+    return text, input_tokens, output_tokens
+
+# -----------------------------------------------------------------------------
+# SECTION: Output Fitting
+# -----------------------------------------------------------------------------
+
+def fit_output(output: Any, budget: int, summarize: Optional[Summarizer] = None,
+               map_chunks: Callable = map) -> Tuple[Any, Optional[str], int, int]:
+    """
+    Fits an agent output into a token budget.
+
+    Result sets keep their type and are reduced by column projection and row sampling; any
+    other output is rendered as text and summarized.
+
+    Returns:
+        tuple: (the fitted output, a note describing the reduction or None, input tokens,
+            output tokens spent on summarization)
+    """
+    tokens = count_tokens(output)
+    if tokens <= budget:
+        return output, None, 0, 0
+    if is_tabular(output):
+        reduced, note = fit_tabular(output, budget)
+        return reduced, note, 0, 0
+    text, input_tokens, output_tokens = summarize_text(output_text(output), budget, summarize, map_chunks)
+    action = "summarized" if summarize is not None else "truncated"
+    return text, f"Output {action} from {tokens} tokens to fit a budget of {budget} tokens", input_tokens, output_tokens
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -0,0 +1,224 @@
+"""
+Module Name: workflow_events.py
+
+Description:
+This module lets the Ask Ellis workflow report its progress while it is running. Workflow stages
+call `emit_event` when they complete (supervisor plan, task outputs, observer verdict, summary
+tokens). Events are delivered to the sink bound to the current context, so concurrent requests
+never see each other's events; without a sink `emit_event` is a no-op and the regular
+`/ask-ellis` endpoint behaves exactly as before.
+
+`stream_workflow_events` runs a workflow function in a background thread with a queue-backed
+sink and yields the events formatted as Server-Sent Events for the `/ask-ellis/stream` endpoint.
+`astream_workflow_events` does the same for async workflows on the event loop of the ASGI app.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import asyncio
+import contextvars
+import json
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+# Local application imports
+from utils.columnar_result import ColumnarResult
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Event Sink
+# -----------------------------------------------------------------------------
+
+# Sink of the workflow running in the current context, None when nobody is listening
+_event_sink: contextvars.ContextVar[Optional[Callable[[str, Dict[str, Any]], None]]] = contextvars.ContextVar(
+    "workflow_event_sink", default=None
+)
+
+# Marks the end of the event stream on the queue
+_END_OF_STREAM = object()
+
+
+@contextmanager
+def workflow_event_sink(sink: Callable[[str, Dict[str, Any]], None]):
+    """
+    Binds an event sink to the current context for the duration of a `with` block.
+
+    Args:
+        sink (Callable[[str, Dict[str, Any]], None]): Receives the event name and its payload.
+    """
+    token = _event_sink.set(sink)
+    try:
+        yield
+    finally:
+        _event_sink.reset(token)
+
+
+def is_streaming() -> bool:
+    """
+    Tells whether an event sink is listening in the current context.
+    """
+    return _event_sink.get() is not None
+
+
+def emit_event(event: str, data: Dict[str, Any]) -> None:
+    """
+    Sends a workflow event to the sink of the current context, if any.
+
+    A failing sink never breaks the workflow; the error is only logged.
+
+    Args:
+        event (str): Name of the event, e.g. "supervisor_plan".
+        data (Dict[str, Any]): JSON-serialisable payload of the event.
+    """
+    sink = _event_sink.get()
+    if sink is None:
+        return
+    try:
+        sink(event, data)
+    except Exception as e:
+        logger.warning(f"Failed to emit workflow event {event}: {str(e)}")
+
+# -----------------------------------------------------------------------------
+# SECTION: Server-Sent Events
+# -----------------------------------------------------------------------------
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Formats an event as a Server-Sent Events message. Columnar query results are sent as
+    row objects, like the stored conversation.
+    """
+    def encode(value):
+        return value.to_records() if isinstance(value, ColumnarResult) else str(value)
+    return f"event: {event}\ndata: {json.dumps(data, default=encode)}\n\n"
+
+
+def stream_workflow_events(
+    workflow: Callable[..., Any],
+    *args: Any,
+    on_result: Optional[Callable[[Any], None]] = None,
+    **kwargs: Any
+) -> Iterator[str]:
+    """
+    Runs a workflow in a background thread and yields its events as Server-Sent Events.
+
+    The stream ends with a "result" event carrying the return value of the workflow, or an
+    "error" event if it raised, followed by a "done" event.
+
+    Args:
+        workflow (Callable[..., Any]): The workflow function, e.g. `ask_ellis_workflow_graph`.
+        *args, **kwargs: Arguments of the workflow function.
+        on_result (Optional[Callable[[Any], None]]): Called with the workflow result in the
+            streaming thread before the "result" event is sent, e.g. to persist the response.
+
+    Yields:
+        str: SSE formatted messages.
+    """
+    events = queue.Queue()
+
+    def run():
+        try:
+            with workflow_event_sink(lambda event, data: events.put((event, data))):
+                result = workflow(*args, **kwargs)
+            events.put(("result", result))
+        except Exception as e:
+            logger.error(f"Streaming workflow failed: {str(e)}")
+            events.put(("error", {"error": "An error occurred while processing the request.", "details": str(e)}))
+        finally:
+            events.put(_END_OF_STREAM)
+
+    # Run in a copy of the current context so the sink stays private to this workflow
+    worker = threading.Thread(
+        target=contextvars.copy_context().run, args=(run,), name="ask-ellis-stream", daemon=True
+    )
+    worker.start()
+
+    while True:
+        item = events.get()
+        if item is _END_OF_STREAM:
+            break
+        event, data = item
+        if event == "result" and on_result is not None:
+            try:
+                on_result(data)
+            except Exception as e:
+                logger.error(f"Failed to handle the streamed workflow result: {str(e)}")
+        yield format_sse(event, data)
+
+    yield format_sse("done", {})
+
+
+async def astream_workflow_events(
+    workflow: Callable[..., Awaitable[Any]],
+    *args: Any,
+    on_result: Optional[Callable[[Any], Awaitable[None]]] = None,
+    **kwargs: Any
+) -> AsyncIterator[str]:
+    """
+    Async variant of `stream_workflow_events`: runs an async workflow as a task on the running
+    event loop and yields its events as Server-Sent Events.
+
+    Args:
+        workflow (Callable[..., Awaitable[Any]]): The async workflow, e.g. `aask_ellis_workflow_graph`.
+        *args, **kwargs: Arguments of the workflow function.
+        on_result (Optional[Callable[[Any], Awaitable[None]]]): Awaited with the workflow result
+            before the "result" event is sent.
+
+    Yields:
+        str: SSE formatted messages.
+    """
+    events = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+
+    def sink(event, data):
+        # Events may also be emitted from worker threads started with asyncio.to_thread
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    async def run():
+        try:
+            with workflow_event_sink(sink):
+                result = await workflow(*args, **kwargs)
+            sink("result", result)
+        except Exception as e:
+            logger.error(f"Streaming workflow failed: {str(e)}")
+            sink("error", {"error": "An error occurred while processing the request.", "details": str(e)})
+        finally:
+            # Scheduled like the events so it is queued after all of them
+            loop.call_soon_threadsafe(events.put_nowait, _END_OF_STREAM)
+
+    # The task runs in a copy of the current context, so the sink stays private to this workflow
+    task = asyncio.ensure_future(run())
+    try:
+        while True:
+            item = await events.get()
+            if item is _END_OF_STREAM:
+                break
+            event, data = item
+            if event == "result" and on_result is not None:
+                try:
+                    await on_result(data)
+                except Exception as e:
+                    logger.error(f"Failed to handle the streamed workflow result: {str(e)}")
+            yield format_sse(event, data)
+    finally:
+        # Stop the workflow if the client disconnected before it finished
+        if not task.done():
+            task.cancel()
+
+    yield format_sse("done", {})
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -7,7 +7,7 @@ The observer agent is responsible for validating the outputs of various agents a
 It checks the correctness, relevance, and completeness of the outputs, identifies errors, and suggests improvements for further iterations.
 
 The module defines the following functions:
-- observer_agent: Validates the outputs of various agents and provides feedback for adjustments.
+- aobserver_agent: Validates the outputs of various agents and provides feedback for adjustments.
 
 """
 
@@ -80,7 +80,7 @@ observer_agent_chain = observer_agent_prompt | llm_config_loader() | parser
 # SECTION: Observer Agent Function
 # -----------------------------------------------------------------------------
  
-def observer_agent(task_outputs: Dict[str, str], retry_count: int, context: Dict[str, Any]) -> Tuple[bool, List[Dict[str, Any]]]:
+async def aobserver_agent(task_outputs: Dict[str, str], retry_count: int, context: Dict[str, Any]) -> Tuple[bool, List[Dict[str, Any]]]:
     """
     Validate the outputs of various agents and provide feedback for adjustments.
  
@@ -107,7 +107,7 @@ def observer_agent(task_outputs: Dict[str, str], retry_count: int, context: Dict
     # Use OpenAI callback to capture token counts
     with get_openai_callback() as cb:
         # Invoke the observer agent chain to validate the outputs
-        ai_response = observer_agent_chain.invoke(validation_input)
+        ai_response = await observer_agent_chain.ainvoke(validation_input)
         input_tokens_count = cb.prompt_tokens
         output_tokens_count = cb.completion_tokens
  
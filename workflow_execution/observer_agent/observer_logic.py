@@ -2,14 +2,24 @@
 # -----------------------------------------------------------------------------
 # SECTION: Imports
 # -----------------------------------------------------------------------------
+import asyncio
 import logging
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from workflow_execution.observer_agent.observer_agent import observer_agent
+from workflow_execution.observer_agent.observer_agent import aobserver_agent
+from workflow_execution.observer_agent.pre_validation import PASS, UNKNOWN, pre_validator
 from agents.core_engine_agents.human_agent import human_agent
-from workflow_execution.supervisor_agent.supervisor_logic import supervisor_logic_exec
-from utils.helper_functions import compute_total_length
+from workflow_execution.supervisor_agent.supervisor_logic import (
+    ExecutionState,
+    arerun_failed_tasks,
+    asupervisor_logic_exec,
+    settle_plan_cache,
+)
+from utils.token_budget import count_tokens
+from workflow_execution.observer_agent.output_budget import fit_task_outputs
+from utils.columnar_result import render_output
+from utils.workflow_events import emit_event
 
 # Third-party imports
 from dotenv import load_dotenv
@@ -31,59 +41,124 @@ load_dotenv()
 
 MAX_RETRIES = int(os.getenv("ERROR_TOLERANCE_COUNT"))
 MAXIMUM_AGENT_OUTPUT_TOKEN_LENGTH = int(os.getenv("MAXIMUM_AGENT_OUTPUT_TOKEN_LENGTH"))
+# Retry only the tasks rejected by the observer instead of re-planning the whole request
+OBSERVER_INCREMENTAL_RETRY = os.getenv("OBSERVER_INCREMENTAL_RETRY", "true").lower() == "true"
+
+
+def incremental_retry_task_ids(execution_state: Optional[ExecutionState], validation_errors: List[Dict[str, Any]]) -> set:
+    """
+    Returns the IDs of the tasks to re-run on a retry, or an empty set when the request has
+    to be re-planned: incremental retries are disabled, the errors do not all name an agent
+    of the plan, or every task failed.
+    """
+    if not OBSERVER_INCREMENTAL_RETRY or execution_state is None or not execution_state.results:
+        return set()
+    failed_task_ids = execution_state.failed_task_ids(validation_errors)
+    if len(failed_task_ids) == len(execution_state.ai_tasks_list):
+        return set()
+    return failed_task_ids
+
+
+def outputs_to_validate(task_outputs: List[Dict[str, Any]], execution_state: Optional[ExecutionState]) -> List[Dict[str, Any]]:
+    """
+    Returns the outputs checked by the pre-validation rules: the results of every executed
+    task when they are known (empty outputs are left out of `task_outputs`), otherwise the
+    task outputs.
+    """
+    if execution_state is None or not execution_state.results:
+        return task_outputs
+    return [
+        {"function_name": execution_state.ai_tasks_list[task_id - 1].get("function_name", ""), "output": result["output"]}
+        for task_id, result in sorted(execution_state.results.items())
+    ]
 
 #--------------------------------------------
 # SECTION : Observer agent logic execution
 #--------------------------------------------
-def observer_logic_exec(
+async def aobserver_logic_exec(
     user_input: str,
     task_outputs: List[Dict[str, Any]],
-    conversation_history: str, 
+    conversation_history: str,
     user_details: Dict[str, Any],
     total_input_tokens_count: int,
     total_output_tokens_count: int,
     conversation: Dict[str, List[str]],
     retry_context: List,
-    user: str
+    user: str,
+    execution_state: Optional[ExecutionState] = None
 )->tuple[List[Dict[str, Any]], int, int, Dict[str, List[str]]]:
-    
+    """
+    Validates the task outputs with the pre-validation rules and the observer agent, retrying
+    the rejected tasks (or re-planning the request) up to ERROR_TOLERANCE_COUNT times before
+    falling back to the human agent.
+    """
     #initialize the retry count
     retry_count = 0
     while retry_count <= MAX_RETRIES:
 
         if retry_count > 0:
 
-            task_outputs,total_input_tokens_count,total_output_tokens_count = supervisor_logic_exec(
-                user_input,
-                conversation_history,
-                user_details,
-                total_input_tokens_count,
-                total_output_tokens_count,
-                retry_context,user
-            )
+            failed_task_ids = incremental_retry_task_ids(execution_state, validation_errors)
+            if failed_task_ids:
+                # Re-run only the rejected tasks and their dependents, reusing the other outputs
+                task_outputs,total_input_tokens_count,total_output_tokens_count = await arerun_failed_tasks(
+                    execution_state,
+                    failed_task_ids,
+                    validation_errors,
+                    total_input_tokens_count,
+                    total_output_tokens_count,
+                    user
+                )
+            else:
+                task_outputs,total_input_tokens_count,total_output_tokens_count = await asupervisor_logic_exec(
+                    user_input,
+                    conversation_history,
+                    user_details,
+                    total_input_tokens_count,
+                    total_output_tokens_count,
+                    retry_context,user,
+                    execution_state=execution_state
+                )
 
         print('*' * 50)
         print("Retry Count = ", retry_count)
         print('*' * 50)
 
         
-        # Bypass the observer agent if length of the task outputs exceeds a certain threshold
-        if all(compute_total_length(task["output"]) < MAXIMUM_AGENT_OUTPUT_TOKEN_LENGTH for task in task_outputs):
-
-            # Step 3: Validate all agent responses using observer agent
-            # Pass the task outputs, retry count, and additional context to the observer agent
-            is_valid, validation_errors, input_tokens_count, output_tokens_count = observer_agent(
-                task_outputs=task_outputs,
-                retry_count=retry_count,
-                context={"conversation_history": conversation_history, "user_details": user_details}
-            )
+        # Fit the task outputs into the token budget of the observer and summary prompts
+        task_outputs, input_tokens_count, output_tokens_count = await asyncio.to_thread(fit_task_outputs, task_outputs, user_input)
+        total_input_tokens_count += input_tokens_count
+        total_output_tokens_count += output_tokens_count
+
+        # Bypass the observer agent if a task output still exceeds the token limit
+        if all(count_tokens(task["output"]) <= MAXIMUM_AGENT_OUTPUT_TOKEN_LENGTH for task in task_outputs):
+
+            # Step 3: Validate all agent responses, with the deterministic rules first and
+            # with the observer agent when the rules are not conclusive
+            pre_verdict, pre_validation_errors = pre_validator.validate(outputs_to_validate(task_outputs, execution_state), user)
+            if pre_verdict == UNKNOWN:
+                # Pass the task outputs, retry count, and additional context to the observer agent
+                is_valid, validation_errors, input_tokens_count, output_tokens_count = await aobserver_agent(
+                    task_outputs=task_outputs,
+                    retry_count=retry_count,
+                    context={"conversation_history": conversation_history, "user_details": user_details}
+                )
+            else:
+                is_valid, validation_errors, input_tokens_count, output_tokens_count = pre_verdict == PASS, pre_validation_errors, 0, 0
             total_input_tokens_count += input_tokens_count
             total_output_tokens_count += output_tokens_count
-
+            emit_event("observer_verdict", {
+                "retry_count": retry_count,
+                "is_valid": is_valid,
+                "validation_errors": validation_errors,
+                "pre_validated": pre_verdict != UNKNOWN
+            })
+
+            settle_plan_cache(user_input, execution_state, is_valid)
             if is_valid:
                 # Append task outputs to the present conversation
                 conversation["present_conversation"].extend(
-                    [{task["function_name"]: task["output"]} for task in task_outputs]
+                    [{task["function_name"]: render_output(task["output"])} for task in task_outputs]
                 )
 
                 # Generate the agents' response summary for the final Q&A agent
@@ -107,20 +182,23 @@ def observer_logic_exec(
 
                 if retry_count > MAX_RETRIES:
                     # Final fallback to human agent if retries are exhausted
-                    conversation["present_conversation"].append(
-                        {
-                            "human_agent": human_agent({
-                                'input_text': user_input,
-                                'conversation_history': conversation_history,
-                                'user_details': user_details
-                            })
-                        }
-                    )
+                    human_agent_response = await asyncio.to_thread(human_agent, {
+                        'input_text': user_input,
+                        'conversation_history': conversation_history,
+                        'user_details': user_details
+                    })
+                    conversation["present_conversation"].append({"human_agent": human_agent_response})
                     break
         else:
+            emit_event("observer_verdict", {
+                "retry_count": retry_count,
+                "is_valid": None,
+                "validation_errors": [],
+                "skipped": "Agent outputs exceed MAXIMUM_AGENT_OUTPUT_TOKEN_LENGTH"
+            })
             # Bypass the observer agent and append task outputs to the present conversation
             conversation["present_conversation"].extend(
-                [{task["function_name"]: task["output"]} for task in task_outputs]
+                [{task["function_name"]: render_output(task["output"])} for task in task_outputs]
             )
             break
 
@@ -0,0 +1,129 @@
+"""
+Module Name: output_budget.py
+
+Description:
+This module fits the task outputs into the token budget of the prompts built from them before
+they are validated by the observer agent and passed on to the summary agent and the stored
+conversation.
+
+The budget (AGENT_OUTPUTS_TOKEN_BUDGET tokens, by default MAXIMUM_AGENT_OUTPUT_TOKEN_LENGTH) is
+shared by the outputs of a request: outputs smaller than their share are kept as they are and
+the larger ones are reduced with `utils/token_budget.py`, result sets by column projection and
+row sampling and text by hierarchical summarization with the output summarizer chain.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Tuple
+
+# Third-party imports
+from dotenv import load_dotenv
+from langchain_community.callbacks import get_openai_callback
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+# Local application imports
+from models.openai.azure_openai_model import llm_config_loader
+from utils.helper_functions import load_prompt_yaml
+from utils.token_budget import allocate_budget, count_tokens, fit_output
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Tokens shared by the outputs of the tasks of a request
+AGENT_OUTPUTS_TOKEN_BUDGET = int(os.getenv("AGENT_OUTPUTS_TOKEN_BUDGET", os.getenv("MAXIMUM_AGENT_OUTPUT_TOKEN_LENGTH", "8000")))
+# Summarize oversized text outputs with the LLM instead of truncating them
+OUTPUT_BUDGET_SUMMARIZE = os.getenv("OUTPUT_BUDGET_SUMMARIZE", "true").lower() == "true"
+# Chunks of a summarization round summarized concurrently
+OUTPUT_BUDGET_SUMMARY_WORKERS = int(os.getenv("OUTPUT_BUDGET_SUMMARY_WORKERS", "4"))
+
+# -----------------------------------------------------------------------------
+# SECTION: Output Summarizer Chain
+# -----------------------------------------------------------------------------
+
+output_summarizer_system_text = load_prompt_yaml(r"config_files\core_engine\output_summarizer_prompts\system_prompt.yaml")
+
+output_summarizer_prompt = ChatPromptTemplate.from_messages(
+    [("system", output_summarizer_system_text)]
+)
+
+output_summarizer_chain = output_summarizer_prompt | llm_config_loader() | StrOutputParser()
+
+
+def summarize_chunk(user_input: str, text: str, max_tokens: int) -> Tuple[str, int, int]:
+    """
+    Condenses a chunk of an agent output into about a number of tokens.
+
+    Returns:
+        tuple: (the condensed text, input tokens, output tokens)
+    """
+    with get_openai_callback() as cb:
+        summary = output_summarizer_chain.invoke({
+            "user_input": user_input,
+            "agent_output": text,
+            "max_tokens": max_tokens
+        })
+    return summary, cb.prompt_tokens, cb.completion_tokens
+
+# -----------------------------------------------------------------------------
+# SECTION: Task Output Budgeting
+# -----------------------------------------------------------------------------
+
+def fit_task_outputs(task_outputs: List[Dict[str, Any]], user_input: str) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Fits the task outputs of a request into AGENT_OUTPUTS_TOKEN_BUDGET tokens.
+
+    Args:
+        task_outputs (List[Dict[str, Any]]): The task outputs, each with an `output`.
+        user_input (str): The user's question, which the summaries preserve the answer to.
+
+    Returns:
+        tuple: The task outputs with the reduced outputs (and a `budget_note` describing each
+            reduction), and the input and output tokens spent on summarization.
+    """
+    sizes = [count_tokens(task["output"]) for task in task_outputs]
+    if sum(sizes) <= AGENT_OUTPUTS_TOKEN_BUDGET:
+        return task_outputs, 0, 0
+
+    budgets = allocate_budget(sizes, AGENT_OUTPUTS_TOKEN_BUDGET)
+    summarize = partial(summarize_chunk, user_input) if OUTPUT_BUDGET_SUMMARIZE else None
+    fitted_outputs = []
+    input_tokens = 0
+    output_tokens = 0
+    with ThreadPoolExecutor(max_workers=OUTPUT_BUDGET_SUMMARY_WORKERS) as executor:
+        for task, size, budget in zip(task_outputs, sizes, budgets):
+            if size <= budget:
+                fitted_outputs.append(task)
+                continue
+            output, note, input_tokens_count, output_tokens_count = fit_output(
+                task["output"], budget, summarize, executor.map
+            )
+            input_tokens += input_tokens_count
+            output_tokens += output_tokens_count
+            logger.info(f"Task {task.get('task_id')} ({task.get('function_name')}): {note}")
+            fitted_outputs.append({**task, "output": output, "budget_note": note})
+
+    return fitted_outputs, input_tokens, output_tokens
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -0,0 +1,281 @@
+"""
+Module Name: pre_validation.py
+
+Description:
+This module validates the task outputs with deterministic rules before the observer agent is
+called. When the rules are conclusive the observer LLM call is skipped:
+  - fail: an output is obviously broken, e.g. an `{"error": ...}` result of a DB operation,
+    an empty result set or an `Error in <agent>` string from `aexecute_tasks`. The retry is
+    started with rule-based validation errors in the observer format.
+  - pass: every output was accepted by a validator of its agent. The observer is only skipped
+    for passing outputs with PRE_VALIDATION_SKIP_OBSERVER_ON_PASS=true (off by default), since
+    the rules check the shape of an output, not whether it answers the question.
+  - unknown: anything else; the observer agent decides.
+
+Validators are plain functions registered by name with `register_validator` and returning
+"pass", "fail" or "unknown" with a message. Each function of `supervisor_functions.yaml` can
+list the validators of its outputs:
+
+    - db_agent:
+        ...
+        validators:
+          - no_error
+          - non_empty_result
+
+The `no_error` validator applies to every agent. The counters of the verdicts and of the
+skipped observer calls are reported on /runtime-stats.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Third-party imports
+import yaml
+from dotenv import load_dotenv
+
+# Local application imports
+from utils.chain_cache import file_signature
+from utils.columnar_result import ColumnarResult
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+PRE_VALIDATION_ENABLED = os.getenv("PRE_VALIDATION_ENABLED", "true").lower() == "true"
+# Skip the observer agent when every output passes the rules (opt-in)
+PRE_VALIDATION_SKIP_OBSERVER_ON_PASS = os.getenv("PRE_VALIDATION_SKIP_OBSERVER_ON_PASS", "false").lower() == "true"
+
+PASS = "pass"
+FAIL = "fail"
+UNKNOWN = "unknown"
+
+Verdict = Tuple[str, str]
+
+# Validators applied to the outputs of every agent, before the declared ones
+DEFAULT_VALIDATORS = ["no_error"]
+
+# -----------------------------------------------------------------------------
+# SECTION: Validator Registry
+# -----------------------------------------------------------------------------
+
+VALIDATORS: Dict[str, Callable[[Any], Verdict]] = {}
+
+
+def register_validator(name: str) -> Callable:
+    """
+    Registers a validator under the name used in `supervisor_functions.yaml`.
+    """
+    def decorator(validator: Callable[[Any], Verdict]) -> Callable[[Any], Verdict]:
+        VALIDATORS[name] = validator
+        return validator
+    return decorator
+
+
+def parse_output(output: Any) -> Any:
+    """
+    Returns a JSON string output parsed, or the output as is.
+    """
+    if isinstance(output, str) and output.strip()[:1] in ("{", "["):
+        try:
+            return json.loads(output)
+        except json.JSONDecodeError:
+            return output
+    return output
+
+
+@register_validator("no_error")
+def no_error(output: Any) -> Verdict:
+    """
+    Fails error strings of `aexecute_tasks` and `{"error": ...}` results.
+    """
+    output = parse_output(output)
+    if isinstance(output, str) and (output.startswith("Error in ") or output.startswith("Function '")):
+        return FAIL, output
+    if isinstance(output, dict) and set(output) == {"error"}:
+        return FAIL, f"The agent returned an error: {output['error']}"
+    return UNKNOWN, ""
+
+
+@register_validator("non_empty_result")
+def non_empty_result(output: Any) -> Verdict:
+    """
+    Fails empty outputs and empty result sets.
+    """
+    output = parse_output(output)
+    if output is None or (isinstance(output, (str, list, dict, tuple, ColumnarResult)) and len(output) == 0):
+        return FAIL, "The agent returned an empty result. Broaden the filters or check the selected tables and columns."
+    return UNKNOWN, ""
+
+
+@register_validator("tabular_result")
+def tabular_result(output: Any) -> Verdict:
+    """
+    Passes non-empty result sets (rows of column values).
+    """
+    output = parse_output(output)
+    if isinstance(output, ColumnarResult) and output.num_rows > 0:
+        return PASS, ""
+    if isinstance(output, list) and output and all(isinstance(row, dict) for row in output):
+        return PASS, ""
+    return UNKNOWN, ""
+
+
+@register_validator("non_empty_text")
+def non_empty_text(output: Any) -> Verdict:
+    """
+    Passes non-blank text outputs.
+    """
+    if isinstance(output, str) and output.strip():
+        return PASS, ""
+    return UNKNOWN, ""
+
+# -----------------------------------------------------------------------------
+# SECTION: Pre-Validator
+# -----------------------------------------------------------------------------
+
+class PreValidator:
+    """
+    Runs the validators declared for the agents of the task outputs and keeps the counters of
+    the verdicts.
+    """
+
+    def __init__(self):
+        # functions file -> (file signature, {agent name: validator names})
+        self._declarations: Dict[str, Tuple[Tuple, Dict[str, List[str]]]] = {}
+        self._lock = threading.Lock()
+        self._metrics = {"passed": 0, "failed": 0, "observer_calls": 0}
+
+    def validate(self, task_outputs: List[Dict[str, Any]], user: Optional[str]) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Validates the task outputs with the rules of their agents.
+
+        Args:
+            task_outputs (List[Dict[str, Any]]): The outputs to validate, each with its
+                `function_name` and `output`.
+            user (Optional[str]): The user whose supervisor functions declare the validators.
+
+        Returns:
+            tuple: The verdict ("pass", "fail" or "unknown") and, for "fail", the validation
+                errors in the format of the observer agent. Passing outputs are reported as
+                "unknown" unless PRE_VALIDATION_SKIP_OBSERVER_ON_PASS is enabled.
+        """
+        if not PRE_VALIDATION_ENABLED or not task_outputs:
+            return self._record(UNKNOWN), []
+
+        declarations = self.declared_validators(user)
+        validation_errors = []
+        all_passed = True
+        for task in task_outputs:
+            function_name = task.get("function_name", "")
+            verdict, messages = self.validate_output(task.get("output"), DEFAULT_VALIDATORS + declarations.get(function_name, []))
+            if verdict == FAIL:
+                validation_errors.append({
+                    "agent_name": function_name,
+                    "errors": messages,
+                    "suggestions": ["Correct the agent input or parameters so that it returns a valid result."]
+                })
+            all_passed = all_passed and verdict == PASS
+
+        if validation_errors:
+            return self._record(FAIL), validation_errors
+        return self._record(PASS if all_passed and PRE_VALIDATION_SKIP_OBSERVER_ON_PASS else UNKNOWN), []
+
+    @staticmethod
+    def validate_output(output: Any, validator_names: List[str]) -> Tuple[str, List[str]]:
+        """
+        Runs validators on one output: it fails when a validator fails and passes when a
+        validator passes and none fails.
+        """
+        verdicts = []
+        messages = []
+        for name in dict.fromkeys(validator_names):
+            validator = VALIDATORS.get(name)
+            if validator is None:
+                logger.warning(f"Unknown validator {name!r} in supervisor_functions.yaml")
+                continue
+            try:
+                verdict, message = validator(output)
+            except Exception as e:
+                logger.warning(f"Validator {name} failed: {e}")
+                verdict, message = UNKNOWN, ""
+            verdicts.append(verdict)
+            if verdict == FAIL:
+                messages.append(message)
+
+        if FAIL in verdicts:
+            return FAIL, messages
+        return (PASS if PASS in verdicts else UNKNOWN), []
+
+    def declared_validators(self, user: Optional[str]) -> Dict[str, List[str]]:
+        """
+        Returns the validator names declared per function in the user's
+        `supervisor_functions.yaml`, or in the template when the user has none.
+        """
+        functions_path = os.path.join(os.getcwd(), 'user_config_files', user or '', 'supervisor_functions.yaml')
+        if not user or not os.path.exists(functions_path):
+            functions_path = os.path.join(os.getcwd(), 'config_files', 'supervisor_functions.yaml')
+
+        signature = file_signature(functions_path)
+        with self._lock:
+            entry = self._declarations.get(functions_path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        declarations = {}
+        try:
+            with open(functions_path, encoding="utf-8") as file:
+                functions = (yaml.safe_load(file) or {}).get('functions') or []
+            for function in functions:
+                for agent_name, agent_config in function.items():
+                    if isinstance(agent_config, dict) and agent_config.get('validators'):
+                        declarations[agent_name] = [str(name) for name in agent_config['validators']]
+        except (OSError, yaml.YAMLError) as e:
+            logger.warning(f"Could not load the validators from {functions_path}: {e}")
+
+        with self._lock:
+            self._declarations[functions_path] = (signature, declarations)
+        return declarations
+
+    def _record(self, verdict: str) -> str:
+        with self._lock:
+            self._metrics[{PASS: "passed", FAIL: "failed", UNKNOWN: "observer_calls"}[verdict]] += 1
+        return verdict
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the verdict counters and the share of validations that skipped the observer.
+        """
+        with self._lock:
+            stats = dict(self._metrics)
+        total = stats["passed"] + stats["failed"] + stats["observer_calls"]
+        stats["observer_skipped"] = stats["passed"] + stats["failed"]
+        stats["observer_skip_rate"] = round(stats["observer_skipped"] / total, 4) if total else 0.0
+        stats["enabled"] = PRE_VALIDATION_ENABLED
+        stats["skip_observer_on_pass"] = PRE_VALIDATION_SKIP_OBSERVER_ON_PASS
+        return stats
+
+# Process-wide pre-validator shared by every observer run
+pre_validator = PreValidator()
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
@@ -6,6 +6,13 @@ This module provides functionality to resolve dependencies between tasks and str
 input for subsequent tasks. The module defines the input/output models, loads prompts, 
 and processes task dependencies using a language model.
 
+Two ways avoid the per-task LLM call:
+  - Template references: the supervisor plan can reference a field of a previous task output
+    directly in the function params, e.g. `{{task1.output.rows[0].market}}`. When every
+    reference of a task resolves, the params are filled in without calling the LLM.
+  - Batched resolution (DEPENDENCY_RESOLVER_MODE=batched): all dependents of a completed task
+    that still need the LLM are resolved in one structured call.
+
 """
 
 # -----------------------------------------------------------------------------
@@ -13,8 +20,11 @@ and processes task dependencies using a language model.
 # -----------------------------------------------------------------------------
 
 # Standard library imports
-from typing import List,Dict,Any,Union
+from typing import List,Dict,Any,Optional,Set,Union
 import json
+import logging
+import os
+import re
 
 # Third-party imports
 from langchain_community.callbacks import get_openai_callback
@@ -23,10 +33,31 @@ from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.pydantic_v1 import BaseModel
 
+from dotenv import load_dotenv
+
 # Local application imports
 from models.openai.azure_openai_model import llm_config_loader
+from utils.columnar_result import ColumnarResult
 from utils.helper_functions import load_prompt, load_prompt_yaml
 
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+# "single" resolves every dependent task with its own LLM call, "batched" resolves all
+# dependents of a completed task in one call
+DEPENDENCY_RESOLVER_MODE = os.getenv("DEPENDENCY_RESOLVER_MODE", "single").lower()
+
 # -----------------------------------------------------------------------------
 # SECTION: Load Prompts
 # -----------------------------------------------------------------------------
@@ -39,6 +70,13 @@ dependency_resolver_chat_prompt = ChatPromptTemplate.from_messages(
     [("system", dependency_resolver_system_text)]
 )
 
+# Load the batched dependency resolver prompt from a file
+batch_dependency_resolver_system_text = load_prompt_yaml(r"config_files\core_engine\dependency_resolver_agent\batch_system_prompt.yaml")
+
+batch_dependency_resolver_chat_prompt = ChatPromptTemplate.from_messages(
+    [("system", batch_dependency_resolver_system_text)]
+)
+
 def fix_dict_json(json_str):
     """
     Fix Python-style dictionary strings in JSON to proper JSON format.
@@ -104,6 +142,117 @@ class DependencyResolverOutput(BaseModel):
 # Create the chain
 dependency_resolver_chain = dependency_resolver_chat_prompt | llm_config_loader() | StrOutputParser() | json_fixer | json_parser 
 
+batch_dependency_resolver_chain = batch_dependency_resolver_chat_prompt | llm_config_loader() | StrOutputParser() | json_fixer | json_parser
+
+# -----------------------------------------------------------------------------
+# SECTION: Template References
+# -----------------------------------------------------------------------------
+
+# {{taskN.output<path>}} where the path is a sequence of .field and [index] accessors
+TEMPLATE_REFERENCE = re.compile(r"\{\{\s*task(\d+)\.output((?:\.\w+|\[\d+\])*)\s*\}\}")
+PATH_ACCESSOR = re.compile(r"\.(\w+)|\[(\d+)\]")
+
+
+class UnresolvedReference(Exception):
+    """
+    Raised when a template reference does not match the output it refers to.
+    """
+
+
+def template_references(function_params: Any) -> Set[int]:
+    """
+    Returns the IDs of the tasks referenced by templates in function params.
+    """
+    if isinstance(function_params, dict):
+        return set().union(*(template_references(value) for value in function_params.values()))
+    if isinstance(function_params, (list, tuple)):
+        return set().union(*(template_references(value) for value in function_params))
+    if isinstance(function_params, str):
+        return {int(task_id) for task_id, _ in TEMPLATE_REFERENCE.findall(function_params)}
+    return set()
+
+
+def lookup_output_path(output: Any, path: str) -> Any:
+    """
+    Follows a .field/[index] path into a task output. JSON strings are parsed on the way and
+    `rows` on a tabular output (a list of rows or a ColumnarResult) refers to its rows.
+    """
+    value = output
+    for field, index in PATH_ACCESSOR.findall(path):
+        if isinstance(value, ColumnarResult):
+            value = value.to_records()
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                raise UnresolvedReference(f"cannot access {field or index} of a text output")
+        try:
+            if index:
+                value = value[int(index)]
+            elif isinstance(value, list) and field == "rows":
+                continue
+            else:
+                value = value[field]
+        except (KeyError, IndexError, TypeError):
+            raise UnresolvedReference(f"{field or index} not found in the task output")
+    return value
+
+
+def render_template_value(value: Any) -> str:
+    """
+    Renders a referenced value embedded in a longer text.
+    """
+    if isinstance(value, ColumnarResult):
+        return value.to_text()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def resolve_template_params(function_params: Any, task_outputs: Dict[int, Any]) -> Any:
+    """
+    Replaces the template references in function params by the values they refer to. A value
+    that is a single reference takes the referenced value as is, references inside a longer
+    text are rendered as text.
+
+    Raises:
+        UnresolvedReference: If a referenced task has no output yet or a path does not match.
+    """
+    if isinstance(function_params, dict):
+        return {key: resolve_template_params(value, task_outputs) for key, value in function_params.items()}
+    if isinstance(function_params, list):
+        return [resolve_template_params(value, task_outputs) for value in function_params]
+    if not isinstance(function_params, str):
+        return function_params
+
+    def lookup(match):
+        task_id = int(match.group(1))
+        if task_id not in task_outputs:
+            raise UnresolvedReference(f"task {task_id} has no output")
+        return lookup_output_path(task_outputs[task_id], match.group(2))
+
+    whole = TEMPLATE_REFERENCE.fullmatch(function_params.strip())
+    if whole:
+        return lookup(whole)
+    return TEMPLATE_REFERENCE.sub(lambda match: render_template_value(lookup(match)), function_params)
+
+
+def try_template_fast_path(function_params: Any, task_outputs: Dict[int, Any]) -> Optional[Any]:
+    """
+    Resolves the function params of a task from its template references without the LLM.
+
+    Returns:
+        Optional[Any]: The resolved params, or None when the params have no template
+            reference or one of them cannot be resolved (the LLM resolver is used then).
+    """
+    if not template_references(function_params):
+        return None
+    try:
+        return resolve_template_params(function_params, task_outputs)
+    except UnresolvedReference as e:
+        logger.info(f"Template fast path not applicable, falling back to the LLM resolver: {e}")
+        return None
+
 # -----------------------------------------------------------------------------
 # SECTION: Define Dependency Resolver Function
 # -----------------------------------------------------------------------------
@@ -138,6 +287,59 @@ def dependency_resolver(previous_output: str, next_task_info: dict) -> tuple:
     output_tokens_count = cb.completion_tokens
     return structured_input, input_tokens_count, output_tokens_count
 
+
+def batch_dependency_resolver(previous_output: str, next_tasks_info: List[dict]) -> tuple:
+    """
+    Structures the input of several tasks depending on the same previous output in one call.
+
+    The tasks are sent with their `task_index` and the response is matched back by it, so a
+    response that skips or reorders tasks cannot shift params onto the wrong task. Tasks missing
+    from the response, and every task when the call fails, are left out of the result so that
+    the caller can resolve them individually; the tokens of the call are counted either way.
+
+    Args:
+        previous_output (str): The output from the previous task.
+        next_tasks_info (List[dict]): The information of every dependent task, each containing
+            its function params.
+
+    Returns:
+        tuple: A tuple containing:
+            - Dict[int, Any]: Structured input parameters keyed by the index of the task in
+              `next_tasks_info`.
+            - int: Count of input tokens used by the AI model.
+            - int: Count of output tokens generated by the AI model.
+    """
+    structured_inputs = {}
+    with get_openai_callback() as cb:
+        try:
+            ai_response = batch_dependency_resolver_chain.invoke({
+                "previous_output": previous_output,
+                "next_tasks_info": json.dumps(
+                    [{"task_index": index, **task_info} for index, task_info in enumerate(next_tasks_info)],
+                    default=str
+                )
+            })
+            logger.info("AI Response batch_dependency_resolver: %s", ai_response)
+            tasks = ai_response.get("tasks") if isinstance(ai_response, dict) else None
+            for task in tasks if isinstance(tasks, list) else []:
+                if not isinstance(task, dict) or "function_params" not in task:
+                    continue
+                try:
+                    task_index = int(task.get("task_index"))
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= task_index < len(next_tasks_info) and task_index not in structured_inputs:
+                    structured_inputs[task_index] = task["function_params"]
+        except Exception as e:
+            logger.warning(f"Batched dependency resolution failed: {e}")
+
+    if len(structured_inputs) != len(next_tasks_info):
+        logger.warning(
+            "Batched dependency resolver returned the params of %d of %d tasks",
+            len(structured_inputs), len(next_tasks_info)
+        )
+    return structured_inputs, cb.prompt_tokens, cb.completion_tokens
+
 # -----------------------------------------------------------------------------
 # END OF MODULE
 # -----------------------------------------------------------------------------
\ No newline at end of file
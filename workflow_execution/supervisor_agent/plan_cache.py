@@ -0,0 +1,249 @@
+"""
+Module Name: plan_cache.py
+
+Description:
+This module caches the task plans generated by the supervisor agent so repeated or paraphrased
+questions skip the planner LLM call.
+
+Plans are stored per scope: the user, the user's enabled agents, the version (modification
+times) of the supervisor prompt and configuration files, the user details and the latest
+SUPERVISOR_PLAN_CACHE_HISTORY_MESSAGES messages of the conversation history, i.e. what besides
+the question goes into the supervisor prompt. Within a scope a question matches a cached plan
+when its content words (the words besides the stop words) are the same, in the same order, so
+paraphrases differing in stop words, case or punctuation share a plan while questions naming
+another entity, number or date do not.
+
+By default the whole conversation history is part of the scope, since a follow-up question
+("and for last year?") is planned from it. The history of an ongoing thread changes with every
+turn, so plans are then only reused for the first question of new threads. With
+SUPERVISOR_PLAN_CACHE_HISTORY_MESSAGES=0 the history is left out of the scope and questions
+recurring in ongoing threads reuse plans too, at the risk of reusing the plan of a follow-up
+question asked in another thread; that plan is dropped if the observer agent rejects it.
+
+Plans are only stored once the observer agent accepted their outputs, and a cached plan whose
+outputs are rejected is dropped.
+
+Plans expire after SUPERVISOR_PLAN_CACHE_TTL seconds and the least recently used plans are
+evicted beyond SUPERVISOR_PLAN_CACHE_SIZE entries.
+
+"""
+
+# -----------------------------------------------------------------------------
+# SECTION: Imports
+# -----------------------------------------------------------------------------
+
+# Standard library imports
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# Third-party imports
+from dotenv import load_dotenv
+
+# Local application imports
+from utils.chain_cache import file_signature
+from utils.helper_functions import find_directory, get_required_agents
+from utils.lru_ttl_cache import LRUTTLCache
+
+# -----------------------------------------------------------------------------
+# SECTION: Logger Setup
+# -----------------------------------------------------------------------------
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
+
+# -----------------------------------------------------------------------------
+# SECTION: Environment Setup
+# -----------------------------------------------------------------------------
+
+# Load environment variables from .env file
+load_dotenv()
+
+SUPERVISOR_PLAN_CACHE_ENABLED = os.getenv("SUPERVISOR_PLAN_CACHE_ENABLED", "true").lower() == "true"
+SUPERVISOR_PLAN_CACHE_SIZE = int(os.getenv("SUPERVISOR_PLAN_CACHE_SIZE", "512"))
+SUPERVISOR_PLAN_CACHE_TTL = float(os.getenv("SUPERVISOR_PLAN_CACHE_TTL", "3600"))
+# Latest conversation history messages in the plan scope; "all" keeps the whole history
+SUPERVISOR_PLAN_CACHE_HISTORY_MESSAGES = os.getenv("SUPERVISOR_PLAN_CACHE_HISTORY_MESSAGES", "all").lower()
+
+# Words ignored when comparing questions
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "of", "for", "to", "in", "on", "at",
+    "by", "with", "and", "or", "me", "my", "i", "you", "your", "please", "can", "could",
+    "would", "show", "tell", "give", "what", "whats", "which", "do", "does", "did", "about"
+}
+
+# -----------------------------------------------------------------------------
+# SECTION: Question Normalization
+# -----------------------------------------------------------------------------
+
+def normalize_question(question: str) -> str:
+    """
+    Lower-cases a question, strips punctuation and collapses whitespace.
+    """
+    question = re.sub(r"[^\w\s]", " ", str(question).lower())
+    return " ".join(question.split())
+
+
+def question_tokens(normalized_question: str) -> Tuple[str, ...]:
+    """
+    Returns the content words of a normalized question, in order.
+    """
+    return tuple(word for word in normalized_question.split() if word not in STOP_WORDS)
+
+# -----------------------------------------------------------------------------
+# SECTION: Plan Scope
+# -----------------------------------------------------------------------------
+
+def scoped_history(conversation_history: Any) -> Any:
+    """
+    Returns the part of the conversation history that goes into the plan scope, i.e. its
+    latest SUPERVISOR_PLAN_CACHE_HISTORY_MESSAGES messages.
+    """
+    if SUPERVISOR_PLAN_CACHE_HISTORY_MESSAGES == "all":
+        return conversation_history
+    history_messages = int(SUPERVISOR_PLAN_CACHE_HISTORY_MESSAGES)
+    if history_messages <= 0:
+        return []
+    if isinstance(conversation_history, (list, tuple)):
+        return list(conversation_history[-history_messages:])
+    return conversation_history
+
+
+def supervisor_plan_scope(user: str, user_details: Dict[str, Any], conversation_history: Any) -> Tuple:
+    """
+    Builds the part of the cache key that does not depend on the question.
+
+    Args:
+        user (str): The user the plan is generated for.
+        user_details (Dict[str, Any]): User information passed to the supervisor prompt.
+        conversation_history (Any): Conversation history passed to the supervisor prompt, of
+            which the latest SUPERVISOR_PLAN_CACHE_HISTORY_MESSAGES messages are in the scope.
+
+    Returns:
+        tuple: (user, enabled agents, prompt version, context digest)
+    """
+    required_agents = get_required_agents(user)
+    enabled_agents = tuple(sorted(
+        agent['name'] for agent in required_agents if agent.get('enabled') == True
+    ))
+
+    # Files the supervisor chain is built from; a rewritten file changes the prompt version
+    directory = r"{}".format(find_directory(Path.cwd(), 'supervisor_prompts'))
+    user_dir_path = os.path.join(os.getcwd(), 'user_config_files', user, 'supervisor_agent_prompts')
+    prompt_files = [
+        os.path.join(directory, file_name)
+        for file_name in ("system_prompt.yaml", "schema_prompt.yaml", "example_prompt.yaml", "start_prompt.yaml")
+    ] + [
+        user_dir_path + r"\example_prompt.yaml",
+        os.path.join(os.getcwd(), 'user_config_files', user, 'agents_required.yaml'),
+        os.path.join(os.getcwd(), 'config_files', 'agents_required.yaml'),
+        os.path.join(os.getcwd(), r'config_files\supervisor_functions.yaml'),
+        os.path.join(os.getcwd(), r'models\openai\openai_config.yaml')
+    ]
+    prompt_version = tuple(file_signature(path) for path in prompt_files)
+
+    context = json.dumps(
+        {"user_details": user_details, "conversation_history": scoped_history(conversation_history)},
+        sort_keys=True, default=str
+    )
+    context_digest = hashlib.sha256(context.encode("utf-8")).hexdigest()
+    return (user, enabled_agents, prompt_version, context_digest)
+
+# -----------------------------------------------------------------------------
+# SECTION: Plan Cache
+# -----------------------------------------------------------------------------
+
+class SupervisorPlanCache:
+    """
+    Cache of supervisor task plans keyed by the content words of the question, with TTL and
+    LRU eviction.
+
+    Args:
+        max_entries (int): Maximum number of cached plans.
+        ttl (float): Seconds a plan stays valid.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self._cache = LRUTTLCache(capacity=max_entries, default_ttl=ttl)
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def lookup(self, user_input: str, scope: Tuple) -> Optional[Any]:
+        """
+        Returns a copy of the plan cached for the question in the scope, or None on a miss.
+        """
+        normalized = normalize_question(user_input)
+        entry = self._cache.get((scope, question_tokens(normalized)))
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        cached_question, plan = entry
+        if cached_question != normalized:
+            logger.info("Supervisor plan cache hit for a paraphrased question")
+        with self._lock:
+            if cached_question == normalized:
+                self.exact_hits += 1
+            else:
+                self.similar_hits += 1
+        return copy.deepcopy(plan)
+
+    def store(self, user_input: str, scope: Tuple, plan: Any) -> None:
+        """
+        Caches the plan accepted for a question in a scope. Empty plans are not cached.
+        """
+        if not plan:
+            return
+        normalized = normalize_question(user_input)
+        self._cache.put((scope, question_tokens(normalized)), (normalized, copy.deepcopy(plan)))
+
+    def discard(self, user_input: str, scope: Tuple) -> bool:
+        """
+        Drops the plan cached for a question in a scope, e.g. when its outputs were rejected.
+        """
+        return self._cache.invalidate((scope, question_tokens(normalize_question(user_input))))
+
+    def invalidate(self, user: Optional[str] = None) -> int:
+        """
+        Drops the cached plans of a user, or every plan when no user is given.
+        """
+        if user is None:
+            removed = self._cache.stats()["entries"]
+            self._cache.clear()
+            return removed
+        return self._cache.invalidate_where(lambda key: key[0][0] == user)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the hit/miss counters and the metrics of the underlying LRU cache.
+        """
+        cache_stats = self._cache.stats()
+        with self._lock:
+            lookups = self.exact_hits + self.similar_hits + self.misses
+            return {
+                "enabled": SUPERVISOR_PLAN_CACHE_ENABLED,
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.similar_hits) / lookups if lookups else 0.0,
+                "entries": cache_stats["entries"],
+                "evictions": cache_stats["evictions"],
+                "expirations": cache_stats["expirations"],
+                "invalidations": cache_stats["invalidations"]
+            }
+
+# Process-wide plan cache shared by every supervisor agent invocation
+supervisor_plan_cache = SupervisorPlanCache(SUPERVISOR_PLAN_CACHE_SIZE, SUPERVISOR_PLAN_CACHE_TTL)
+
+# -----------------------------------------------------------------------------
+# END OF MODULE
+# -----------------------------------------------------------------------------
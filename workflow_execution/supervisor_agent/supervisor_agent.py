@@ -13,6 +13,8 @@ includes tasks, corresponding function calls, and dependencies between tasks.
 # -----------------------------------------------------------------------------
 
 # Standard library imports
+import asyncio
+import logging
 import os
 from typing import List, Optional
 import json
@@ -28,6 +30,11 @@ from langchain_core.pydantic_v1 import BaseModel, Field
 # Local application imports
 from models.openai.azure_openai_model import llm_config_loader
 from utils.helper_functions import load_prompt_yaml,find_directory,load_functions_prompt,get_required_agents
+from utils.prompt_store import prompt_store
+from workflow_execution.supervisor_agent.plan_cache import SUPERVISOR_PLAN_CACHE_ENABLED, supervisor_plan_cache, supervisor_plan_scope
+
+# Get a logger instance for this module
+logger = logging.getLogger(__name__)
 
 # -----------------------------------------------------------------------------
 # SECTION: Load Prompts
@@ -83,10 +90,13 @@ def loading_prompt_files(user):
     supervisor_system_text = load_prompt_yaml(directory+ r"\system_prompt.yaml")
     supervisor_functions_text = load_functions_prompt(required_agents)
     supervisor_schema_text = load_prompt_yaml(directory+ r"\schema_prompt.yaml")
-    if Path(user_dir_path+ r"\example_prompt.yaml").exists():
-        supervisor_example_text = load_prompt_yaml(user_dir_path+ r"\example_prompt.yaml")
-    else:
-        supervisor_example_text = load_prompt_yaml(directory+ r"\example_prompt.yaml")
+    # The user's example prompt overrides the default one
+    supervisor_example_path = prompt_store.resolve(
+        user, "supervisor_agent", "example",
+        user_dir_path+ r"\example_prompt.yaml",
+        directory+ r"\example_prompt.yaml"
+    )
+    supervisor_example_text = load_prompt_yaml(supervisor_example_path)
     supervisor_start_text = load_prompt_yaml(directory + r"\start_prompt.yaml")
 
 
@@ -131,16 +141,47 @@ def loading_prompt_files(user):
     return supervisor_chain
 
 
+# -----------------------------------------------------------------------------
+# SECTION: Plan Cache Lookup
+# -----------------------------------------------------------------------------
+
+def lookup_cached_plan(user_input: str, full_user_details, conversation_history, retry_context: list, user) -> tuple:
+    """
+    Looks up a cached plan for the question.
+
+    Retries bypass the lookup because the supervisor has to re-plan with the feedback of the
+    observer agent, but still return the scope so the corrected plan can be cached once the
+    observer accepts it.
+
+    Returns:
+        tuple: The scope the plan should be cached under (None if it must not be cached)
+            and the cached plan (None on a miss).
+    """
+    if not SUPERVISOR_PLAN_CACHE_ENABLED:
+        return None, None
+    try:
+        plan_scope = supervisor_plan_scope(user, full_user_details, conversation_history)
+    except Exception as e:
+        logger.warning(f"Supervisor plan cache bypassed: {str(e)}")
+        return None, None
+    if retry_context:
+        return plan_scope, None
+    cached_plan = supervisor_plan_cache.lookup(user_input, plan_scope)
+    if cached_plan is not None:
+        logger.info("Using cached supervisor plan: %s", cached_plan)
+    return plan_scope, cached_plan
+
 # -----------------------------------------------------------------------------
 # SECTION: Supervisor Agent Function
 # -----------------------------------------------------------------------------
 
-def supervisor_agent(user_name: str, user_country: str, full_user_details, user_input: str, conversation_history: list, retry_context: list,user) -> tuple:
+async def asupervisor_agent(user_name: str, user_country: str, full_user_details, user_input: str, conversation_history: list, retry_context: list,user) -> tuple:
     """
     Generate a supervisor response based on the user input.
 
     This function processes the user's input, generates a structured response using the 
     Supervisor agent chain, and returns the response along with token usage statistics.
+    The prompt files are loaded in a worker thread and the LLM call is awaited with `ainvoke`.
 
     Args:
         user_name (str): The name of the user initiating the query.
@@ -152,10 +193,19 @@ def supervisor_agent(user_name: str, user_country: str, full_user_details, user_
             - dict: The AI-generated supervisor response.
             - int: The number of input tokens used.
             - int: The number of output tokens generated.
+            - tuple: The plan cache scope of the question, under which the plan is cached once
+              the observer accepts it (None when it must not be cached).
     """
-    supervisor_chain = loading_prompt_files(user)
+    # Repeated or paraphrased questions reuse the cached plan and skip the LLM call
+    plan_scope, cached_plan = await asyncio.to_thread(
+        lookup_cached_plan, user_input, full_user_details, conversation_history, retry_context, user
+    )
+    if cached_plan is not None:
+        return cached_plan, 0, 0, plan_scope
+
+    supervisor_chain = await asyncio.to_thread(loading_prompt_files, user)
     with get_openai_callback() as cb:
-        ai_response = supervisor_chain.invoke({
+        ai_response = await supervisor_chain.ainvoke({
             "user_name": user_name,
             "user_country": user_country,
             "full_user_details": json.dumps(full_user_details),
@@ -166,7 +216,7 @@ def supervisor_agent(user_name: str, user_country: str, full_user_details, user_
     print("AI Response Supervisor Agent: ", ai_response)
     input_tokens_count = cb.prompt_tokens
     output_tokens_count = cb.completion_tokens
-    return ai_response, input_tokens_count, output_tokens_count
+    return ai_response, input_tokens_count, output_tokens_count, plan_scope
 
 # -----------------------------------------------------------------------------
 # END OF MODULE
@@ -4,15 +4,27 @@ a Supervisor-Worker pattern where tasks are dynamically generated, prioritized,
 based on user inputs and conversation context.
 """
 
-from typing import Any, Dict, List
+from contextlib import contextmanager
+import asyncio
+from typing import Any, Dict, Iterator, List, Optional
 import logging
 import os
 
 # Local application imports
 from agents.generic_conversation_agent import generic_conversation_agent
-from workflow_execution.supervisor_agent.dependency_resolver_agent import dependency_resolver
-from agents.generic_agent import generic_agent
-from workflow_execution.supervisor_agent.supervisor_agent import supervisor_agent
+from workflow_execution.supervisor_agent.dependency_resolver_agent import (
+    DEPENDENCY_RESOLVER_MODE,
+    batch_dependency_resolver,
+    dependency_resolver,
+    template_references,
+    try_template_fast_path,
+)
+from agents.generic_agent import ageneric_agent
+from workflow_execution.supervisor_agent.plan_cache import supervisor_plan_cache
+from workflow_execution.supervisor_agent.supervisor_agent import asupervisor_agent
+from utils.dynamic_imports import get_dboconfig_safe, lazy_import_db_dependencies
+from utils.speculation import Speculation, speculate
+from utils.workflow_events import emit_event
 
 # Third-party imports
 from dotenv import load_dotenv
@@ -31,60 +43,246 @@ logger = logging.getLogger(__name__)
 # Load environment variables from .env file
 load_dotenv()
 
+# Maximum number of supervisor tasks executed concurrently
+MAX_PARALLEL_TASKS = int(os.getenv("MAX_PARALLEL_TASKS", "4"))
+
+# Start table pruning for users with a DB agent while the supervisor is planning
+SPECULATIVE_TABLE_PRUNING = os.getenv("SPECULATIVE_TABLE_PRUNING", "false").lower() == "true"
+
 
 # -----------------------------------------------------------------------------
 # SECTION: Task Executor Implementation
 # -----------------------------------------------------------------------------
 
-def execute_tasks(ai_tasks_list,total_input_tokens_count,total_output_tokens_count,user)->tuple[list[Any], int, int, list[str]]:
+def build_task_dependencies(ai_tasks_list) -> Dict[int, List[int]]:
     """
-    Executes the list of tasks generated by the supervisor agent, handles dependency resolution,
-    and updates task outputs and token counts.
+    Builds the dependency graph of the supervisor tasks from their `depends_on` fields and
+    template references.
+
+    Task IDs are the 1-based positions of the tasks in the list. As before, a `depends_on`
+    of 0 or 1 both refer to the first task. Every task referenced by a template in the params
+    (`{{taskN.output...}}`) is a parent as well, so a task starts only once all the outputs it
+    references are available. A task can only depend on a task that comes before it, which
+    keeps the graph acyclic; any other reference is logged and ignored.
+
     Args:
         ai_tasks_list (list): List of tasks generated by the supervisor agent.
+
     Returns:
-        tuple: (task_outputs, total_input_tokens_count, total_output_tokens_count, generated_snowflake_queries_list)
+        Dict[int, List[int]]: The parent task IDs of every task (empty for independent tasks).
+            The first one is the primary parent, whose output is passed to the dependency
+            resolver: the `depends_on` task, or else the last referenced task.
     """
-    task_outputs = []  # List to store task outputs with sequence IDs
+    dependencies = {}
+    for task_id, task in enumerate(ai_tasks_list, start=1):
+        parent_task_ids = []
+        if task.get("depends_on") is not None:
+            try:
+                parent_task_ids.append(max(int(task["depends_on"]), 1))
+            except (TypeError, ValueError):
+                logger.warning(f"Ignoring invalid depends_on {task['depends_on']!r} of task {task_id}")
+        for referenced_task_id in sorted(template_references(task.get("function_params")), reverse=True):
+            if referenced_task_id not in parent_task_ids:
+                parent_task_ids.append(referenced_task_id)
+        for parent_task_id in [parent for parent in parent_task_ids if parent >= task_id]:
+            logger.warning(f"Ignoring dependency {parent_task_id} of task {task_id}: it must refer to a previous task")
+            parent_task_ids.remove(parent_task_id)
+        dependencies[task_id] = parent_task_ids
+    return dependencies
+
+
+def build_task_dependents(dependencies: Dict[int, List[int]]) -> Dict[int, List[int]]:
+    """
+    Returns the IDs of the tasks depending on each task.
+    """
+    dependents = {task_id: [] for task_id in dependencies}
+    for task_id, parent_task_ids in dependencies.items():
+        for parent_task_id in parent_task_ids:
+            dependents[parent_task_id].append(task_id)
+    return dependents
+
+
+def ready_tasks(task_ids, dependencies: Dict[int, List[int]], results: Dict[int, Any]) -> List[int]:
+    """
+    Returns the tasks among `task_ids` that have not run yet and whose parents have all completed.
+    """
+    return [
+        task_id for task_id in task_ids
+        if task_id not in results and all(parent_task_id in results for parent_task_id in dependencies[task_id])
+    ]
+
+
+def primary_parent_output(task_id: int, dependencies: Dict[int, List[int]], results: Dict[int, Dict[str, Any]]) -> Any:
+    """
+    Returns the output of the primary parent of a task, or None for independent tasks.
+    """
+    parent_task_ids = dependencies[task_id]
+    return results[parent_task_ids[0]]["output"] if parent_task_ids else None
+
+
+def resolve_dependents(dependent_task_output: Any, dependent_tasks: List[tuple[int, Dict[str, Any]]], task_outputs: Dict[int, Any]) -> tuple[Dict[int, Any], int, int]:
+    """
+    Resolves the params of all dependents of a completed task at once (batched mode).
+
+    Tasks whose template references resolve are filled in directly; the remaining ones are
+    resolved with a single batched LLM call. Tasks missing from the result (left out of the
+    batched response, or all of them when the call fails) are resolved individually by
+    `aexecute_single_task`; the tokens of the batched call are returned in every case.
+
+    Args:
+        dependent_task_output (Any): Output of the completed parent task.
+        dependent_tasks (List[tuple[int, Dict[str, Any]]]): The (task ID, task) of every dependent.
+        task_outputs (Dict[int, Any]): Outputs of the completed tasks keyed by task ID.
+
+    Returns:
+        tuple: (resolved params keyed by task ID, input tokens, output tokens)
+    """
+    resolved_params = {}
+    pending = []
+    for task_id, task in dependent_tasks:
+        function_params = try_template_fast_path(task["function_params"], task_outputs)
+        if function_params is not None:
+            resolved_params[task_id] = function_params
+        else:
+            pending.append((task_id, task))
+
+    input_tokens = 0
+    output_tokens = 0
+    if len(pending) > 1:
+        function_params_by_index, input_tokens, output_tokens = batch_dependency_resolver(
+            dependent_task_output,
+            [{"function_params": task["function_params"]} for _, task in pending]
+        )
+        resolved_params.update({
+            task_id: function_params_by_index[index]
+            for index, (task_id, _) in enumerate(pending) if index in function_params_by_index
+        })
+        logger.info("Batched Dependency Resolver Output for tasks %s", [
+            task_id for index, (task_id, _) in enumerate(pending) if index in function_params_by_index
+        ])
+    return resolved_params, input_tokens, output_tokens
+
+
+class ExecutionState:
+    """
+    The plan and the per-task results of the last execution of a request, kept so that an
+    observer retry only re-runs the tasks that failed validation and the plan is only cached
+    once the observer accepts it.
+    """
+
+    def __init__(self):
+        # The plan as generated by the supervisor, without observer feedback
+        self.plan: List[Dict[str, Any]] = []
+        # The plan cache scope of the question, None when the plan must not be cached
+        self.plan_scope: Optional[tuple] = None
+        # The tasks of the last execution, with the feedback of the last retry
+        self.ai_tasks_list: List[Dict[str, Any]] = []
+        self.results: Dict[int, Dict[str, Any]] = {}
+
+    def record(self, ai_tasks_list, results: Dict[int, Dict[str, Any]], retry: bool = False) -> None:
+        """
+        Stores the tasks and the results of an execution; the tasks of a fresh plan (not an
+        incremental retry) also become the plan retries start from.
+        """
+        if not retry:
+            self.plan = list(ai_tasks_list)
+        self.ai_tasks_list = ai_tasks_list
+        self.results = dict(results)
+
+    def failed_task_ids(self, validation_errors: List[Dict[str, Any]]) -> set[int]:
+        """
+        Returns the IDs of the tasks of the agents named by the validation errors, or an empty
+        set when an error does not name an agent of the plan (the plan itself has to change then).
+        """
+        task_ids_by_agent = {}
+        for task_id, task in enumerate(self.ai_tasks_list, start=1):
+            task_ids_by_agent.setdefault(str(task.get("function_name", "")).lower(), set()).add(task_id)
+
+        failed_task_ids = set()
+        for error in validation_errors or []:
+            agent_name = str(error.get("agent_name", "") if isinstance(error, dict) else "").lower()
+            if agent_name not in task_ids_by_agent:
+                return set()
+            failed_task_ids |= task_ids_by_agent[agent_name]
+        return failed_task_ids
 
 
-    for i, task in enumerate(ai_tasks_list, start=1):  # Start sequence from 1
+def retry_task(task: Dict[str, Any], validation_errors: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Returns a copy of a failed task whose question carries the observer feedback on its agent.
+    """
+    function_name = str(task.get("function_name", "")).lower()
+    feedback = [
+        error for error in validation_errors
+        if isinstance(error, dict) and str(error.get("agent_name", "")).lower() == function_name
+    ]
+    function_params = dict(task["function_params"])
+    if feedback and isinstance(function_params.get("user_input"), str):
+        notes = "; ".join(
+            str(item) for error in feedback for item in (error.get("errors") or []) + (error.get("suggestions") or [])
+        )
+        function_params["user_input"] += f"\n\nA previous answer to this question was rejected: {notes}"
+    return {**task, "function_params": function_params}
+
+
+def plan_incremental_retry(execution_state: ExecutionState, failed_task_ids: set[int], validation_errors: List[Dict[str, Any]]) -> tuple[list, Dict[int, Dict[str, Any]]]:
+    """
+    Prepares the re-execution of the failed tasks and of everything downstream of them.
+
+    The feedback is applied to fresh copies of the tasks of the original plan, so the tasks of
+    a later retry only carry the latest feedback.
+
+    Returns:
+        tuple: (the plan with the failed tasks carrying the observer feedback, the results of
+            the tasks that are reused as is)
+    """
+    dependencies = build_task_dependencies(execution_state.plan)
+    rerun_task_ids = set(failed_task_ids)
+    # Task IDs are topologically ordered, so a single pass reaches every downstream task
+    for task_id, parent_task_ids in sorted(dependencies.items()):
+        if rerun_task_ids.intersection(parent_task_ids):
+            rerun_task_ids.add(task_id)
+
+    ai_tasks_list = [
+        retry_task(task, validation_errors) if task_id in failed_task_ids else task
+        for task_id, task in enumerate(execution_state.plan, start=1)
+    ]
+    # Reused results were already counted in the token totals
+    memoized_results = {
+        task_id: {**result, "input_tokens_count": 0, "output_tokens_count": 0}
+        for task_id, result in execution_state.results.items() if task_id not in rerun_task_ids
+    }
+    return ai_tasks_list, memoized_results
+
+
+def batches_dependents(dependent_task_ids: List[int]) -> bool:
+    """
+    Whether the dependents of a completed task are resolved together before they start.
+    """
+    return DEPENDENCY_RESOLVER_MODE == "batched" and len(dependent_task_ids) > 1
+
+
+def collect_task_outputs(ai_tasks_list, results: Dict[int, Dict[str, Any]], total_input_tokens_count: int, total_output_tokens_count: int) -> tuple[list[Any], int, int]:
+    """
+    Aggregates the results of the executed tasks in task ID order.
+
+    Args:
+        ai_tasks_list (list): List of tasks generated by the supervisor agent.
+        results (Dict[int, Dict[str, Any]]): The result of every executed task keyed by task ID.
+        total_input_tokens_count (int): The running total of input tokens.
+        total_output_tokens_count (int): The running total of output tokens.
+
+    Returns:
+        tuple: (task_outputs, total_input_tokens_count, total_output_tokens_count)
+    """
+    task_outputs = []  # List to store task outputs with sequence IDs
+    for task_id in sorted(results):
+        task = ai_tasks_list[task_id - 1]
         function_name = task.get("function_name","")
-        function_params = task["function_params"]
         function_params_ques = task["function_params"].get("user_input", "")
-        task_id = i  # Use sequence number as task ID
-        # Resolve dependencies if any
-        if task.get("depends_on") is not None:
-            dependent_task_output = task_outputs[max(int(task["depends_on"]) - 1, 0)]["output"]
-            next_task_info = {"function_params": function_params}
-            function_params, input_tokens_count, output_tokens_count = dependency_resolver(
-                dependent_task_output,
-                next_task_info
-            )
-            total_input_tokens_count += input_tokens_count
-            total_output_tokens_count += output_tokens_count
-            logger.info("Dependency Resolver Output: %s", function_params)
-       # Retrieve the function object from the global namespace
-        # Execute the agent function
-        scratchpad = None  # Default to None to handle different types of outputs
-        if function_name != "" or function_name is not None:  # Simplified check for non-empty function name
-            try:
-                if function_name == "generic_conversation_agent":
-                    agent_outputs = generic_conversation_agent(function_params)
-                else:
-                    agent_outputs = generic_agent(function_name, function_params, user)
-                
-                # Unpack the function output (same for both agents)
-                scratchpad, input_tokens_count, output_tokens_count = agent_outputs
-                total_input_tokens_count += input_tokens_count
-                total_output_tokens_count += output_tokens_count
-            
-            except Exception as e:
-                scratchpad = f"Error in {function_name}: {str(e)}"
-                logger.error(f"Error executing {function_name}: {e}")
-        else:
-            scratchpad = f"Function '{function_name}' not found."
-            logger.error(f"Function '{function_name}' not found in the global namespace.")
+        scratchpad = results[task_id]["output"]
+        total_input_tokens_count += results[task_id]["input_tokens_count"]
+        total_output_tokens_count += results[task_id]["output_tokens_count"]
  
         # Only store task output if it is non-empty
         if scratchpad not in (None, "", [], {}, ())  and bool(scratchpad):
@@ -107,31 +305,245 @@ def execute_tasks(ai_tasks_list,total_input_tokens_count,total_output_tokens_cou
  
     return task_outputs, total_input_tokens_count, total_output_tokens_count
 
+
+async def aexecute_single_task(task, task_id: int, dependent_task_output: Any, user, task_outputs: Optional[Dict[int, Any]] = None, resolved_params: Any = None) -> Dict[str, Any]:
+    """
+    Resolves the dependencies of a single task, if any, and executes its agent function.
+
+    Template references in the params are filled in from the completed task outputs without
+    calling the LLM; other dependencies are resolved by the dependency resolver. Generic agents
+    are awaited natively; the dependency resolver and the conversation agent run in a worker
+    thread.
+
+    Args:
+        task (dict): The task generated by the supervisor agent.
+        task_id (int): The ID of the task.
+        dependent_task_output (Any): Output of the task this one depends on, or None.
+        user (str): The user the agents are executed for.
+        task_outputs (Optional[Dict[int, Any]]): Outputs of the completed tasks keyed by task ID.
+        resolved_params (Any): Params already resolved by `resolve_dependents`, or None.
+
+    Returns:
+        Dict[str, Any]: The agent output and the tokens spent on the task.
+    """
+    function_name = task.get("function_name","")
+    function_params = task["function_params"]
+    input_tokens = 0
+    output_tokens = 0
+
+    # Resolve dependencies if any
+    if resolved_params is not None:
+        function_params = resolved_params
+    else:
+        template_params = try_template_fast_path(function_params, task_outputs or {})
+        if template_params is not None:
+            function_params = template_params
+            logger.info("Template references resolved for task %s: %s", task_id, function_params)
+        elif dependent_task_output is not None:
+            next_task_info = {"function_params": function_params}
+            function_params, input_tokens_count, output_tokens_count = await asyncio.to_thread(
+                dependency_resolver,
+                dependent_task_output,
+                next_task_info
+            )
+            input_tokens += input_tokens_count
+            output_tokens += output_tokens_count
+            logger.info("Dependency Resolver Output for task %s: %s", task_id, function_params)
+
+    # Execute the agent function
+    try:
+        if function_name == "generic_conversation_agent":
+            agent_outputs = await asyncio.to_thread(generic_conversation_agent, function_params)
+        else:
+            agent_outputs = await ageneric_agent(function_name, function_params, user)
+
+        scratchpad, input_tokens_count, output_tokens_count = agent_outputs
+        input_tokens += input_tokens_count
+        output_tokens += output_tokens_count
+
+    except Exception as e:
+        scratchpad = f"Error in {function_name}: {str(e)}"
+        logger.error(f"Error executing {function_name}: {e}")
+
+    return {
+        "output": scratchpad,
+        "input_tokens_count": input_tokens,
+        "output_tokens_count": output_tokens
+    }
+
+
+async def aexecute_tasks(ai_tasks_list,total_input_tokens_count,total_output_tokens_count,user,execution_state: Optional[ExecutionState] = None,memoized_results: Optional[Dict[int, Dict[str, Any]]] = None)->tuple[list[Any], int, int]:
+    """
+    Executes the list of tasks generated by the supervisor agent, handles dependency resolution,
+    and updates task outputs and token counts.
+
+    The tasks are scheduled as a DAG built from their `depends_on` fields and template
+    references, as asyncio tasks of which at most MAX_PARALLEL_TASKS run at the same time.
+    Independent tasks run concurrently and a dependent task is started as soon as all its
+    parents have completed; in batched resolver mode the dependents that become ready together
+    are first resolved in one call. Outputs and token counts are aggregated in task ID order once
+    every task has finished, so the result does not depend on the completion order.
+
+    Args:
+        ai_tasks_list (list): List of tasks generated by the supervisor agent.
+        execution_state (Optional[ExecutionState]): Receives the plan and the task results.
+        memoized_results (Optional[Dict[int, Dict[str, Any]]]): Results of tasks that are not
+            re-executed, keyed by task ID (incremental retries).
+
+    Returns:
+        tuple: (task_outputs, total_input_tokens_count, total_output_tokens_count)
+    """
+    dependencies = build_task_dependencies(ai_tasks_list)
+    dependents = build_task_dependents(dependencies)
+
+    results = dict(memoized_results or {})
+    resolution_tokens = [0, 0]
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_TASKS)
+
+    def completed_outputs():
+        return {task_id: result["output"] for task_id, result in results.items()}
+
+    async def run(task_id, resolved_params=None):
+        async with semaphore:
+            results[task_id] = await aexecute_single_task(
+                ai_tasks_list[task_id - 1], task_id, primary_parent_output(task_id, dependencies, results), user,
+                completed_outputs(), resolved_params
+            )
+        emit_event("task_output", {
+            "task_id": task_id,
+            "function_name": ai_tasks_list[task_id - 1].get("function_name",""),
+            "output": results[task_id]["output"]
+        })
+
+        # Dependents whose last parent was this task; the check and the scheduling happen
+        # without yielding to the event loop, so each dependent is started once
+        dependent_task_ids = ready_tasks(dependents[task_id], dependencies, results)
+        resolved_dependents = {}
+        if batches_dependents(dependent_task_ids):
+            async with semaphore:
+                resolved_dependents, input_tokens_count, output_tokens_count = await asyncio.to_thread(
+                    resolve_dependents, results[task_id]["output"],
+                    [(dependent_task_id, ai_tasks_list[dependent_task_id - 1]) for dependent_task_id in dependent_task_ids],
+                    completed_outputs()
+                )
+            resolution_tokens[0] += input_tokens_count
+            resolution_tokens[1] += output_tokens_count
+
+        await asyncio.gather(*(
+            run(dependent_task_id, resolved_dependents.get(dependent_task_id))
+            for dependent_task_id in dependent_task_ids
+        ))
+
+    await asyncio.gather(*(run(task_id) for task_id in ready_tasks(dependencies, dependencies, results)))
+
+    if execution_state is not None:
+        execution_state.record(ai_tasks_list, results, retry=memoized_results is not None)
+    return collect_task_outputs(
+        ai_tasks_list, results,
+        total_input_tokens_count + resolution_tokens[0], total_output_tokens_count + resolution_tokens[1]
+    )
+
+#-----------------------------------------------
+# SECTION : Plan cache
+#-----------------------------------------------
+
+def settle_plan_cache(user_input: str, execution_state: Optional[ExecutionState], accepted: bool) -> None:
+    """
+    Caches the plan of the last execution once the observer accepted its outputs, or drops the
+    plan cached for the question when they were rejected, so only validated plans are reused.
+
+    The supervisor plan is cached rather than the executed tasks: after an incremental retry
+    the tasks carry the observer feedback, which must not be replayed on later questions.
+    """
+    if execution_state is None or execution_state.plan_scope is None:
+        return
+    if accepted:
+        supervisor_plan_cache.store(user_input, execution_state.plan_scope, execution_state.plan)
+    elif supervisor_plan_cache.discard(user_input, execution_state.plan_scope):
+        logger.info("Dropped the cached supervisor plan rejected by the observer")
+
+#-----------------------------------------------
+# SECTION : Speculative table pruning
+#-----------------------------------------------
+
+@contextmanager
+def speculative_table_pruning(user_input: str, user, retry_context: List) -> Iterator[Optional[Speculation]]:
+    """
+    Starts `db_table_pruning_agent` on the user's text while the supervisor is planning.
+
+    Table pruning only depends on the user's text, so for users with a DB agent it can run
+    concurrently with the supervisor call instead of after it. `db_query_prompt_loader` picks
+    the result up when the speculation is accepted with `settle_table_pruning`; otherwise it is
+    discarded. Retries are not speculated, as the retried plan usually rephrases the question.
+
+    Yields:
+        Optional[Speculation]: The running speculation, or None when nothing was started.
+    """
+    if not SPECULATIVE_TABLE_PRUNING or retry_context or not user:
+        yield None
+        return
+
+    db_deps = lazy_import_db_dependencies()
+    list_db_functions = db_deps.get("list_db_functions")
+    db_table_pruning_agent = db_deps.get("db_table_pruning_agent")
+    db_functions = list_db_functions(user) if list_db_functions else []
+    if not db_functions or db_table_pruning_agent is None:
+        yield None
+        return
+
+    with speculate("db_table_pruning", user, db_table_pruning_agent, {"user_input": user_input}, user) as speculation:
+        yield speculation
+
+
+def settle_table_pruning(speculation: Optional[Speculation], ai_tasks_list, user) -> None:
+    """
+    Accepts the speculative table pruning when the plan routes the question to exactly one
+    DB agent task, and discards it otherwise.
+    """
+    if speculation is None:
+        return
+    db_tasks = [task for task in ai_tasks_list if get_dboconfig_safe(task.get("function_name", ""), user)]
+    if len(db_tasks) == 1:
+        speculation.accept()
+    else:
+        speculation.discard()
+    logger.info(f"Speculative table pruning {speculation.state} for {len(db_tasks)} DB task(s)")
+
+
+def unused_pruning_tokens(speculation: Optional[Speculation]) -> tuple[int, int]:
+    """
+    Returns the tokens spent by a speculative table pruning whose result was not used.
+    """
+    result = speculation.unused_result() if speculation is not None else None
+    if not result:
+        return 0, 0
+    return result[1], result[2]
+
 #-----------------------------------------------
 # SECTION : Supervisor agent logic execution
 #-----------------------------------------------
 
-def supervisor_logic_exec(user_input: str, 
-    conversation_history: str, 
+async def asupervisor_logic_exec(user_input: str,
+    conversation_history: str,
     user_details: Dict[str, Any],
     total_input_tokens_count: int,
     total_output_tokens_count: int,
     retry_context: List = [],
-    user=None
+    user=None,
+    execution_state: Optional[ExecutionState] = None
 )-> tuple[list[Any], int, int]:
-        
     """
     
     Executes a sequence of tasks based on user input, using a supervisor agent.
 
     This function orchestrates the process of:
 
-    1. **Task Generation:** Uses a `supervisor_agent` to create a list of tasks 
+    1. **Task Generation:** Uses a `asupervisor_agent` to create a list of tasks 
        based on user input, conversation history, user details, and previous 
        retry attempts. The supervisor agent handles task decomposition and 
        potentially incorporates feedback from previous failures.
 
-    2. **Task Execution:** Executes the generated tasks using the `execute_tasks` 
+    2. **Task Execution:** Executes the generated tasks using the `aexecute_tasks` 
        function.
 
     3. **Token Counting:** Tracks the total input and output tokens consumed 
@@ -145,6 +557,8 @@ def supervisor_logic_exec(user_input: str,
         total_input_tokens_count (int):  The running total of input tokens.
         total_output_tokens_count (int): The running total of output tokens.
         retry_context (List): Context from previous failed attempts.
+        execution_state (Optional[ExecutionState]): Receives the plan and the task results, so
+            the observer can re-run only the failed tasks.
 
     Returns:
         - tuple[List[Any], int, int]: A tuple containing:
@@ -153,34 +567,78 @@ def supervisor_logic_exec(user_input: str,
         - total_output_tokens_count (int): Updated total output token count.
     """
     
-    # Step 1: Generate tasks using the supervisor agent, including retry context
-    ai_tasks_list, input_tokens_count, output_tokens_count = supervisor_agent(
-        user_details["user_name"],
-        user_details["country"],
-        user_details,
-        user_input,
-        conversation_history,
-        retry_context=retry_context , # Pass feedback on what went wrong in previous attempts
-        user=user
-    )
-    total_input_tokens_count += input_tokens_count
-    total_output_tokens_count += output_tokens_count
+    with speculative_table_pruning(user_input, user, retry_context) as pruning_speculation:
+        # Step 1: Generate tasks using the supervisor agent, including retry context
+        ai_tasks_list, input_tokens_count, output_tokens_count, plan_scope = await asupervisor_agent(
+            user_details["user_name"],
+            user_details["country"],
+            user_details,
+            user_input,
+            conversation_history,
+            retry_context=retry_context,
+            user=user
+        )
+        total_input_tokens_count += input_tokens_count
+        total_output_tokens_count += output_tokens_count
+        if execution_state is not None:
+            execution_state.plan_scope = plan_scope
 
-        
-    print("Supervisor Agent")
-    print(ai_tasks_list)
-    print('*' * 50)
+        print("Supervisor Agent")
+        print(ai_tasks_list)
+        print('*' * 50)
 
-    logger.info("Supervisor Agent Output: %s", ai_tasks_list)
+        logger.info("Supervisor Agent Output: %s", ai_tasks_list)
+        emit_event("supervisor_plan", {"tasks": ai_tasks_list, "retry_attempt": len(retry_context)})
+        settle_table_pruning(pruning_speculation, ai_tasks_list, user)
 
-    # Step 2: Execute tasks using the execute_tasks function
-    task_outputs, input_tokens_count, output_tokens_count = execute_tasks(ai_tasks_list,total_input_tokens_count,total_output_tokens_count,user)
-    
+        # Step 2: Execute tasks using the aexecute_tasks function
+        task_outputs, input_tokens_count, output_tokens_count = await aexecute_tasks(ai_tasks_list,total_input_tokens_count,total_output_tokens_count,user,execution_state)
+
+        total_input_tokens_count += input_tokens_count
+        total_output_tokens_count += output_tokens_count
+
+    # Tokens of a finished speculation are spent even when its result was not used
+    input_tokens_count, output_tokens_count = unused_pruning_tokens(pruning_speculation)
     total_input_tokens_count += input_tokens_count
     total_output_tokens_count += output_tokens_count
-    
+
     return task_outputs,total_input_tokens_count,total_output_tokens_count
 
+#-----------------------------------------------
+# SECTION : Incremental retries
+#-----------------------------------------------
+
+async def arerun_failed_tasks(
+    execution_state: ExecutionState,
+    failed_task_ids: set[int],
+    validation_errors: List[Dict[str, Any]],
+    total_input_tokens_count: int,
+    total_output_tokens_count: int,
+    user=None
+)-> tuple[list[Any], int, int]:
+    """
+    Re-executes only the tasks that failed validation and their downstream dependents, keeping
+    the plan and reusing the outputs of every other task, so a retry costs in proportion to
+    the failure instead of a full re-plan and re-execution.
+
+    Args:
+        execution_state (ExecutionState): The plan and results of the previous execution.
+        failed_task_ids (set[int]): The IDs of the tasks the observer rejected.
+        validation_errors (List[Dict[str, Any]]): The observer feedback, added to the question
+            of the failed tasks.
+        total_input_tokens_count (int): The running total of input tokens.
+        total_output_tokens_count (int): The running total of output tokens.
+
+    Returns:
+        tuple: (task_outputs, total_input_tokens_count, total_output_tokens_count)
+    """
+    ai_tasks_list, memoized_results = plan_incremental_retry(execution_state, failed_task_ids, validation_errors)
+    logger.info("Re-running tasks %s, reusing tasks %s", sorted(set(execution_state.results) - set(memoized_results)), sorted(memoized_results))
+    return await aexecute_tasks(
+        ai_tasks_list, total_input_tokens_count, total_output_tokens_count, user,
+        execution_state, memoized_results
+    )
+
 # -----------------------------------------------------------------------------
 # END OF MODULE
 # -----------------------------------------------------------------------------
\ No newline at end of file
@@ -15,18 +15,17 @@ among agents, resolves dependencies, and tracks token usage during the conversat
 # Standard library imports
 from typing import Any, Dict, List
 import logging
-import os
 import traceback
 
 # Local application imports
 from agents.core_engine_agents.dependency_resolver_agent import dependency_resolver
-from agents.core_engine_agents.conversation_summary_agent import conversation_summary_agent
 from agents.generic_conversation_agent import generic_conversation_agent
 from agents.generic_agent import generic_agent
 from agents_store.db_agent.utils.query_repository import Queries
-from required_explicit_agents import explicit_agents
-from workflow_execution.observer_agent.observer_logic import observer_logic_exec
-from workflow_execution.supervisor_agent.supervisor_logic import supervisor_logic_exec
+from required_explicit_agents import aexplicit_agents
+from utils.event_loop import run_sync
+from workflow_execution.observer_agent.observer_logic import aobserver_logic_exec
+from workflow_execution.supervisor_agent.supervisor_logic import ExecutionState, asupervisor_logic_exec
 from workflow_execution.explicit_agent.explicit_agent_logic import explicit_logic_exec
 
 # Third-party imports
@@ -46,10 +45,8 @@ logger = logging.getLogger(__name__)
 # Load environment variables from .env file
 load_dotenv()
 
-# Maximum length of conversation history after which it will be summarized
-
-MAXIMUM_CONVERSATION_HISTORY_LENGTH = int(os.getenv("MAXIMUM_CONVERSATION_HISTORY_LENGTH"))
-logger.info(f"Maximum conversation history length set to: {MAXIMUM_CONVERSATION_HISTORY_LENGTH}")
+# The conversation history is bounded before the workflow runs: it holds the rolling summary of
+# the older messages of the thread and its latest messages (persistence/conversation_memory.py)
 
 # -----------------------------------------------------------------------------
 # SECTION: Workflow Graph Implementation
@@ -58,6 +55,9 @@ logger.info(f"Maximum conversation history length set to: {MAXIMUM_CONVERSATION_
 def ask_ellis_workflow_graph(user_input: str, conversation_history: str, user_details: Dict[str, Any],user) -> Dict[str, Any]:
     """
     Main workflow function that coordinates the execution of various agents in the Ask Ellis system.
+
+    Synchronous entry point of the Flask application: runs `aask_ellis_workflow_graph` on the
+    background event loop (`utils/event_loop.py`) and waits for its result.
     
     Args:
         user_input (str): The current input from the user
@@ -67,13 +67,34 @@ def ask_ellis_workflow_graph(user_input: str, conversation_history: str, user_de
     Returns:
         Dict[str, Any]: Final conversation details, generated query, and token counts
     """
-    logger.info("Starting ask_ellis_workflow_graph execution")
+    return run_sync(aask_ellis_workflow_graph(user_input, conversation_history, user_details, user))
+
+
+async def aask_ellis_workflow_graph(user_input: str, conversation_history: str, user_details: Dict[str, Any],user) -> Dict[str, Any]:
+    """
+    Async implementation of the Ask Ellis workflow, awaited by the ASGI application (`asgi_app.py`)
+    and run by `ask_ellis_workflow_graph` for the Flask application.
+
+    Every LLM call of the supervisor, the generic agents, the observer and the summary agent
+    is awaited, so a single worker process can serve many conversations concurrently.
+
+    Args:
+        user_input (str): The current input from the user
+        conversation_history (str): Previous conversation history
+        user_details (Dict[str, Any]): User information and context
+
+    Returns:
+        Dict[str, Any]: Final conversation details, generated query, and token counts
+    """
+    logger.info("Starting aask_ellis_workflow_graph execution")
     logger.info(f"Processing user input: {user_input[:50]}..." if len(user_input) > 50 else f"Processing user input: {user_input}")
 
     # Initialize token counts and retry counters
     total_input_tokens_count = 0
     total_output_tokens_count = 0
     retry_context = []  # To store information about previous attempts and failures
+    execution_state = ExecutionState()  # Plan and task results reused by observer retries
+    Queries.start_request()  # Queries generated by this request only
 
     # Initialize conversation and task outputs
     conversation = {
@@ -86,14 +107,15 @@ def ask_ellis_workflow_graph(user_input: str, conversation_history: str, user_de
     try:
         # Calls supervisor agent logic and returns the output of the supervisor agent
         logger.info("Executing supervisor agent logic")
-        task_outputs, total_input_tokens_count, total_output_tokens_count = supervisor_logic_exec(
+        task_outputs, total_input_tokens_count, total_output_tokens_count = await asupervisor_logic_exec(
                 user_input,
                 conversation_history,
                 user_details,
                 total_input_tokens_count,
                 total_output_tokens_count,
                 retry_context=retry_context,
-                user=user
+                user=user,
+                execution_state=execution_state
             )
         logger.info(f"Supervisor agent execution complete. Input tokens: {total_input_tokens_count}, Output tokens: {total_output_tokens_count}")
     except Exception as e:
@@ -105,7 +127,7 @@ def ask_ellis_workflow_graph(user_input: str, conversation_history: str, user_de
     try:
         # Calls the observer agent logic
         logger.info("Executing observer agent logic")
-        task_outputs, total_input_tokens_count, total_output_tokens_count, conversation = observer_logic_exec(
+        task_outputs, total_input_tokens_count, total_output_tokens_count, conversation = await aobserver_logic_exec(
             user_input,
             task_outputs,
             conversation_history,
@@ -113,7 +135,8 @@ def ask_ellis_workflow_graph(user_input: str, conversation_history: str, user_de
             total_input_tokens_count,
             total_output_tokens_count,
             conversation,
-            retry_context,user
+            retry_context,user,
+            execution_state=execution_state
         )
         logger.info(f"Observer agent execution complete. Input tokens: {total_input_tokens_count}, Output tokens: {total_output_tokens_count}")
     except Exception as e:
@@ -137,7 +160,7 @@ def ask_ellis_workflow_graph(user_input: str, conversation_history: str, user_de
     logger.info("Executing additional explicit agents")
     
     try:
-        total_input_tokens_count, total_output_tokens_count, conversation = explicit_agents(
+        total_input_tokens_count, total_output_tokens_count, conversation = await aexplicit_agents(
             user_input,
             task_outputs,
             total_input_tokens_count,
@@ -150,7 +173,7 @@ def ask_ellis_workflow_graph(user_input: str, conversation_history: str, user_de
         logger.debug(traceback.format_exc())
 
     
-    query = getattr(Queries, "query", "No query generated")
+    query = Queries.generated()
     logger.info(f"Final query generated: {query[:100]}..." if len(str(query)) > 100 else f"Final query generated: {query}")
     print(query)
     
@@ -162,7 +185,7 @@ def ask_ellis_workflow_graph(user_input: str, conversation_history: str, user_de
         "input_tokens_count": total_input_tokens_count,
         "output_tokens_count": total_output_tokens_count
     }
- 
+
 # -----------------------------------------------------------------------------
 # END OF MODULE
 # -----------------------------------------------------------------------------
\ No newline at end of file